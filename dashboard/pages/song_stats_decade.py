@@ -4,44 +4,26 @@ import dash_bootstrap_components as dbc
 import pandas as pd
 import plotly.express as px
 
-from dashboard.utils_pos import load_df, add_decade
-import numpy as np
+from dashboard.utils_pos import load_df, add_decade, explode_tokens
 
 dash.register_page(__name__, path="/song-stats", name="Promedios por canción")
 
 def compute_song_stats(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Calcula métricas por canción usando pos_spacy (np.ndarray de np.ndarray).
+    Calcula métricas por canción a partir de la tabla token-level.
     Retorna: year, decade, tokens_count, unique_words, unique_pos, ttr
     """
-    rows = []
-    for year, seq in df[["year", "pos_spacy"]].itertuples(index=False):
-        if not isinstance(seq, np.ndarray) or len(seq) == 0:
-            continue
+    tok = explode_tokens(df)
+    tok["word"] = tok["token"].astype(str).str.lower()
 
-        tokens = []
-        pos_tags = []
-
-        for it in seq:
-            if isinstance(it, np.ndarray) and it.size >= 2:
-                tok = it[0]
-                pos = it[1]
-                if tok is not None:
-                    tokens.append(str(tok).lower())
-                if pos is not None:
-                    pos_tags.append(str(pos))
-
-        if len(tokens) == 0:
-            continue
-
-        tokens_count = len(tokens)
-        unique_words = len(set(tokens))
-        unique_pos = len(set(pos_tags))
-        ttr = unique_words / tokens_count
-
-        rows.append((int(year), tokens_count, unique_words, unique_pos, ttr))
-
-    out = pd.DataFrame(rows, columns=["year", "tokens_count", "unique_words", "unique_pos", "ttr"])
+    g = tok.groupby("row")
+    out = pd.DataFrame({
+        "year": g["year"].first(),
+        "tokens_count": g.size(),
+        "unique_words": g["word"].nunique(),
+        "unique_pos": g["pos"].nunique(),
+    }).reset_index(drop=True)
+    out["ttr"] = out["unique_words"] / out["tokens_count"]
     out["decade"] = (out["year"] // 10) * 10
     return out
 
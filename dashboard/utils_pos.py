@@ -1,18 +1,45 @@
 import pandas as pd
 from functools import lru_cache
 from pathlib import Path
-import numpy as np
+import pyarrow.parquet as pq
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 PARQUET_PATH = PROJECT_ROOT / "data" / "results" / "pos_spacy.parquet"
+VOCAB_PATH = PROJECT_ROOT / "data" / "processed" / "songs_with_lyrics_vocab.parquet"
 
 @lru_cache(maxsize=1)
 def load_df():
-    df = pd.read_parquet(PARQUET_PATH, columns=["year", "language", "pos_spacy"])
-    df = df.dropna(subset=["year", "pos_spacy"])
+    """
+    Una fila por canción con POS (year, language e ids si están). El índice
+    es la fila de la canción en el parquet: `explode_tokens` filtra por él.
+    """
+    from src.postagging.pos_format import POS_CODES_COL
+
+    # artist_id/song_id (enteros) para agrupar por artista o canción, si el parquet los trae
+    available = pq.read_schema(PARQUET_PATH).names
+    ids = [c for c in ("artist_id", "song_id") if c in available]
+    pos_col = POS_CODES_COL if POS_CODES_COL in available else "pos_spacy"
+
+    table = pq.read_table(PARQUET_PATH, columns=["year", "language", pos_col] + ids)
+    has_pos = table.column(pos_col).is_valid().to_numpy(zero_copy_only=False)
+    df = table.drop_columns([pos_col]).to_pandas()
+    df = df[has_pos & df["year"].notna().to_numpy()]
     df["year"] = df["year"].astype(int)
     return df
 
+@lru_cache(maxsize=1)
+def load_tokens():
+    """
+    Tabla token-level de todo el corpus (row, year, token, pos), armada una
+    vez desde el formato columnar.
+    """
+    from src.postagging.pos_format import pos_tokens
+
+    tok = pos_tokens(PARQUET_PATH, columns=["year"], vocab_path=VOCAB_PATH)
+    tok = tok[tok["year"].notna()]
+    tok["year"] = tok["year"].astype(int)
+    return tok
+
 def add_decade(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     df["decade"] = (df["year"] // 10) * 10
@@ -20,19 +47,8 @@ def add_decade(df: pd.DataFrame) -> pd.DataFrame:
 
 def explode_tokens(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Convierte pos_spacy (np.ndarray de np.ndarray) a tabla token-level.
+    Tokens (row, year, token, pos) de las canciones de `df` (un subconjunto
+    de `load_df()`: se filtra por su índice).
     """
-    out = []
-
-    for year, language, seq in df[["year", "language", "pos_spacy"]].itertuples(index=False):
-        if not isinstance(seq, np.ndarray):
-            continue
-
-        for it in seq:
-            if isinstance(it, np.ndarray) and it.size >= 2:
-                token = it[0]
-                pos = it[1]
-                if pos is not None:
-                    out.append((year, token, pos))
-
-    return pd.DataFrame(out, columns=["year", "token", "pos"])
+    tok = load_tokens()
+    return tok[tok["row"].isin(df.index)].reset_index(drop=True)
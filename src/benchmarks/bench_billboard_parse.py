@@ -0,0 +1,70 @@
+"""
+Benchmark: parseo de páginas year-end (original vs SoupStrainer + lxml).
+
+Compara el tiempo por página de `BillboardTop100Scraper.parse_page` con
+`fast=False` (html.parser, árbol completo) y `fast=True`, y verifica que
+el DataFrame resultante sea idéntico fila a fila.
+
+Uso:
+    python -m src.benchmarks.bench_billboard_parse [--fixtures DIR] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.benchmarks.fixtures import FIXTURES_PATH, load_fixtures
+from src.scrapers.billboard_scraper import BillboardTop100Scraper, _FAST_PARSER
+
+
+def _build_df(pages: dict[int, str], fast: bool) -> tuple[pd.DataFrame, list[float]]:
+    scraper = BillboardTop100Scraper(min(pages), max(pages), use_cache=False)
+    times = []
+
+    for year, page in pages.items():
+        start = time.perf_counter()
+        names, singers, ranks = scraper.parse_page(page, year=year, fast=fast)
+        times.append(time.perf_counter() - start)
+
+        scraper.songs[year] = names
+        scraper.singers[year] = singers
+        scraper.ranks[year] = ranks
+
+    return scraper.build_dataframe(), times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_PATH)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures)
+    avg_kb = sum(len(p) for p in pages.values()) / len(pages) / 1024
+    print(f"{len(pages)} páginas (~{avg_kb:.0f} KB c/u) en {args.fixtures}")
+
+    rows = []
+    for label, fast in [("html.parser (full tree)", False), (f"{_FAST_PARSER} + SoupStrainer", True)]:
+        best = None
+        for _ in range(args.repeat):
+            df, times = _build_df(pages, fast)
+            best = times if best is None or sum(times) < sum(best) else best
+        rows.append((label, sum(best) / len(best) * 1000, sum(best)))
+
+        if fast:
+            pd.testing.assert_frame_equal(df, reference)
+        else:
+            reference = df
+
+    report = pd.DataFrame(rows, columns=["parser", "ms_per_page", "total_seconds"])
+    report["speedup"] = report["ms_per_page"].iloc[0] / report["ms_per_page"]
+    print(report.to_string(index=False))
+    print(f"Output idéntico: {len(reference)} filas")
+
+
+if __name__ == "__main__":
+    main()
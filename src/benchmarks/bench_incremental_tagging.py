@@ -0,0 +1,113 @@
+"""
+Benchmark: POS tagging incremental vs etiquetar todo el corpus.
+
+Sobre el parquet tokenizado (re-escrito con `token_ids`, como el paso 6)
+mide el `run()` del tagger en cuatro escenarios:
+- `completo`: sin resultado anterior (o `incremental=False`).
+- `año nuevo`: el resultado anterior no tiene el último año del corpus.
+- `letras corregidas`: `--changed` canciones con un token cambiado.
+- `sin cambios`: se vuelve a correr sobre el mismo corpus.
+
+Para cada uno reporta cuántas canciones se etiquetaron, el tiempo, el
+speedup contra `completo` y si el parquet resultante tiene exactamente los
+mismos tags que etiquetar todo de nuevo.
+
+Uso:
+    python -m src.benchmarks.bench_incremental_tagging --tagger nltk
+    python -m src.benchmarks.bench_incremental_tagging --tagger spacy --model en_core_web_sm
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.postagging.pos_format import pos_tokens
+from src.preprocess.vocabulary import TOKEN_IDS_COL, Vocabulary, encode_column, parquet_options, read_tokenized
+from src.utils.config import BENCHMARKS_PATH, LYRICS_TOKENIZED_PARQUET
+
+
+def _write_tokenized(df: pd.DataFrame, path: Path, vocab_path: Path) -> None:
+    vocab = Vocabulary()
+    encoded = df.drop(columns="lyrics").assign(**{TOKEN_IDS_COL: encode_column(df["lyrics"], vocab)})
+    table = pa.Table.from_pandas(encoded, preserve_index=False)
+    pq.write_table(table, path, **parquet_options(table.column_names))
+    vocab.save(vocab_path)
+
+
+def _tag(tagger: str, model: str, input_path: Path, output_path: Path, vocab_path: Path, incremental: bool) -> float:
+    start = time.perf_counter()
+    if tagger == "nltk":
+        from src.postagging.nltk_tagger import run
+
+        run(input_path, output_path, vocab_path=vocab_path, incremental=incremental)
+    else:
+        from src.postagging.spacy_tagger import run
+
+        run(input_path, output_path, spacy_model=model, vocab_path=vocab_path, incremental=incremental)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tagger", choices=["nltk", "spacy"], default="nltk")
+    parser.add_argument("--model", default="en_core_web_sm")
+    parser.add_argument("--changed", type=int, default=20, help="Canciones con letra corregida.")
+    args = parser.parse_args()
+
+    corpus = read_tokenized(LYRICS_TOKENIZED_PARQUET)
+    last_year = corpus["year"].max()
+
+    # Corrección: cambiar el último token de `--changed` canciones
+    fixed = corpus.copy()
+    with_tokens = fixed.index[fixed["lyrics"].map(lambda t: t is not None and len(t) > 0)]
+    for i in with_tokens[:: max(1, len(with_tokens) // args.changed)][: args.changed]:
+        fixed.at[i, "lyrics"] = list(fixed.at[i, "lyrics"][:-1]) + ["corrected"]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        def tag(df: pd.DataFrame, output: Path, incremental: bool) -> tuple[float, pd.DataFrame]:
+            _write_tokenized(df, tmp / "tok.parquet", tmp / "vocab.parquet")
+            seconds = _tag(args.tagger, args.model, tmp / "tok.parquet", output, tmp / "vocab.parquet", incremental)
+            return seconds, pos_tokens(output, columns=["year"], vocab_path=tmp / "vocab.parquet")
+
+        full_s, full = tag(corpus, tmp / "full.parquet", incremental=False)
+        _, fixed_full = tag(fixed, tmp / "fixed_full.parquet", incremental=False)
+        rows.append(("completo", len(corpus), full_s, True))
+
+        # Resultado anterior sin el último año; después llega el año nuevo
+        previous = corpus[corpus["year"] != last_year]
+        tag(previous, tmp / "inc.parquet", incremental=False)
+        seconds, result = tag(corpus, tmp / "inc.parquet", incremental=True)
+        rows.append(("año nuevo", int((corpus["year"] == last_year).sum()), seconds, result.equals(full)))
+
+        seconds, result = tag(fixed, tmp / "inc.parquet", incremental=True)
+        rows.append(("letras corregidas", args.changed, seconds, result.equals(fixed_full)))
+
+        seconds, result = tag(fixed, tmp / "inc.parquet", incremental=True)
+        rows.append(("sin cambios", 0, seconds, result.equals(fixed_full)))
+
+    report = pd.DataFrame(rows, columns=["scenario", "songs_new_or_changed", "seconds", "identical"])
+    report.insert(0, "tagger", args.tagger)
+    report["speedup"] = report["seconds"].iloc[0] / report["seconds"]
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+    BENCHMARKS_PATH.mkdir(parents=True, exist_ok=True)
+    path = BENCHMARKS_PATH / "incremental_tagging.csv"
+    report.to_csv(path, index=False)
+    print(f"Resultados guardados en: {path}")
+
+    if not report["identical"].all():
+        raise SystemExit("El resultado incremental no coincide con etiquetar todo de nuevo")
+
+
+if __name__ == "__main__":
+    main()
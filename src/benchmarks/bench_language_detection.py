@@ -0,0 +1,60 @@
+"""
+Benchmark: detección de idioma con texto completo vs muestra acotada.
+
+Sobre las letras de data/processed/songs_with_lyrics_ready.parquet mide
+textos por segundo (serie y pool de procesos) y el acuerdo de cada
+tamaño de muestra con la detección sobre el texto completo. No usa cache.
+
+Uso:
+    python -m src.benchmarks.bench_language_detection --workers 4 --samples 200 500 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from src.preprocess.detect_language import detect_many
+from src.utils.config import LYRICS_CLEAN_PARQUET
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--samples", type=int, nargs="+", default=[200, 500, 1000])
+    parser.add_argument("--limit", type=int, default=None, help="Usar solo las primeras N letras.")
+    args = parser.parse_args()
+
+    lyrics = pd.read_parquet(LYRICS_CLEAN_PARQUET, columns=["lyrics"])["lyrics"].dropna().unique().tolist()
+    if args.limit:
+        lyrics = lyrics[:args.limit]
+
+    avg_chars = sum(len(t) for t in lyrics) / len(lyrics)
+    print(f"{len(lyrics)} letras distintas, {avg_chars:.0f} caracteres en promedio")
+
+    configs = [("full", None, 1)]
+    if args.workers > 1:
+        configs.append(("full", None, args.workers))
+    configs += [(f"sample_{n}", n, args.workers) for n in args.samples]
+
+    rows = []
+    reference = None
+    for label, max_chars, workers in configs:
+        start = time.perf_counter()
+        result = detect_many(lyrics, workers=workers, max_chars=max_chars)
+        elapsed = time.perf_counter() - start
+
+        if reference is None:
+            reference = result
+        agreement = sum(a == b for a, b in zip(result, reference)) / len(reference)
+        rows.append((label, workers, elapsed, len(lyrics) / elapsed, agreement))
+
+    report = pd.DataFrame(rows, columns=["mode", "workers", "seconds", "texts_per_second", "agreement_vs_full"])
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
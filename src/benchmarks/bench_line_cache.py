@@ -0,0 +1,159 @@
+"""
+Benchmark: POS tagging por canción vs por línea con cache de segmentos.
+
+Limpia las letras conservando los saltos de línea (`clean_lyrics` con
+`keep_lines=True`), las tokeniza con `tokenize_lines` y etiqueta el
+corpus de dos formas:
+- `canción`: cada canción distinta entera (modo por defecto de los taggers).
+- `líneas`: `segments.tag_by_lines`, cada línea distinta una sola vez.
+
+Reporta el tiempo y el speedup, el hit rate de la cache (líneas, y tokens,
+que ya estaban etiquetados) y cuánto cambian los tags por perder el contexto de
+las líneas vecinas: coincidencia con `canción` sobre todos los tokens, en
+los bordes de línea (primer y último token) y en el interior. La
+coincidencia solo vale con los modelos reales (en_core_web_sm y el
+perceptrón de NLTK con sus datos) y con letras que traigan sus saltos de
+línea; con eso todavía no se midió.
+
+Si las letras de entrada no traen saltos de línea (p. ej. el parquet
+limpio de una corrida anterior, que unía todo en una línea), las líneas
+se reconstruyen cortando antes de cada palabra con mayúscula inicial
+(salvo "I" y sus contracciones): es una aproximación, y se avisa.
+
+Uso:
+    python -m src.benchmarks.bench_line_cache --tagger nltk
+    python -m src.benchmarks.bench_line_cache --tagger spacy --input data/raw/top100_songs_with_lyrics.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.cleaners.lyrics_text_cleaner import clean_lyrics
+from src.postagging.segments import tag_by_lines
+from src.preprocess.lyrics_tokenize import tokenize_lines
+from src.utils.config import BENCHMARKS_PATH, LYRICS_CLEAN_PARQUET, LYRICS_RAW_CSV
+from src.utils.helpers import apply_unique
+
+
+# Palabras con mayúscula que no suelen empezar línea
+_NOT_LINE_START = {"I", "Im", "Ill", "Ive", "Id"}
+
+
+def infer_lines(text: str | None) -> str | None:
+    """
+    Texto en una línea -> una línea por cada palabra con mayúscula inicial.
+    """
+    if text is None:
+        return None
+    lines, current = [], []
+    for word in text.split():
+        if current and word[0].isupper() and word not in _NOT_LINE_START:
+            lines.append(" ".join(current))
+            current = []
+        current.append(word)
+    if current:
+        lines.append(" ".join(current))
+    return "\n".join(lines)
+
+
+def _load(path: Path) -> pd.Series:
+    if path.suffix == ".parquet":
+        lyrics = pd.read_parquet(path, columns=["lyrics"])["lyrics"]
+    else:
+        lyrics = pd.read_csv(path, encoding="utf-8", usecols=["lyrics"])["lyrics"]
+    return lyrics.astype("string").fillna(pd.NA)
+
+
+def _taggers(name: str, model: str):
+    """
+    (etiquetar canciones, etiquetar líneas ya distintas) del tagger `name`.
+    """
+    if name == "nltk":
+        from src.postagging.nltk_tagger import tag_distinct, tag_many
+
+        return lambda token_lists: list(tag_many(pd.Series(token_lists, dtype=object))), tag_distinct
+
+    from src.postagging.spacy_tagger import load_pos_model, tag_pretokenized
+
+    nlp = load_pos_model(model)
+    return lambda token_lists: tag_pretokenized(nlp, token_lists), lambda token_lists: tag_pretokenized(nlp, token_lists)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tagger", choices=["nltk", "spacy"], default="nltk")
+    parser.add_argument("--model", default="en_core_web_sm")
+    parser.add_argument("--input", type=Path, default=None, help="CSV/parquet con columna lyrics.")
+    parser.add_argument("--limit", type=int, default=None, help="Usar solo las primeras N canciones.")
+    args = parser.parse_args()
+
+    path = args.input or (LYRICS_RAW_CSV if LYRICS_RAW_CSV.exists() else LYRICS_CLEAN_PARQUET)
+    lyrics = _load(path)
+    if args.limit:
+        lyrics = lyrics.head(args.limit)
+
+    clean = apply_unique(lyrics, partial(clean_lyrics, keep_lines=True))
+    inferred = not clean.dropna().str.contains("\n").any()
+    if inferred:
+        print(f"{path.name} no tiene saltos de línea: se reconstruyen por mayúsculas (aproximado)")
+        clean = apply_unique(clean, infer_lines)
+
+    tokenized = apply_unique(clean, tokenize_lines)
+    songs = [None if t is None else t[0] for t in tokenized]
+    lines = [None if t is None else t[1] for t in tokenized]
+    present = [i for i, t in enumerate(songs) if t is not None]
+    total_tokens = sum(len(songs[i]) for i in present)
+    print(f"{len(songs)} canciones, {total_tokens} tokens, {sum(len(lines[i]) for i in present)} líneas")
+
+    tag_songs, tag_lines = _taggers(args.tagger, args.model)
+
+    start = time.perf_counter()
+    by_song = tag_songs([songs[i] for i in present])
+    song_s = time.perf_counter() - start
+    print(f"canción: {song_s:.2f} s")
+
+    start = time.perf_counter()
+    by_line, stats = tag_by_lines([songs[i] for i in present], [lines[i] for i in present], tag_lines)
+    line_s = time.perf_counter() - start
+    print(f"líneas: {line_s:.2f} s")
+
+    # Coincidencia de tags, separando bordes de línea del interior
+    same = np.concatenate([np.asarray(a, dtype=object) == np.asarray(b, dtype=object) for a, b in zip(by_song, by_line)])
+    edge = np.zeros(len(same), dtype=bool)
+    offset = 0
+    for i in present:
+        ends = offset + np.cumsum(lines[i])
+        edge[ends - 1] = True
+        edge[ends - lines[i]] = True
+        offset = ends[-1]
+
+    report = pd.DataFrame([
+        {"mode": "canción", "seconds": song_s, "hit_rate": None, "token_hit_rate": None, "agreement": 1.0,
+         "agreement_edges": 1.0, "agreement_interior": 1.0},
+        {"mode": "líneas", "seconds": line_s, "hit_rate": stats["hit_rate"],
+         "token_hit_rate": stats["token_hit_rate"], "agreement": same.mean(),
+         "agreement_edges": same[edge].mean(), "agreement_interior": same[~edge].mean()},
+    ])
+    report.insert(0, "tagger", args.tagger)
+    report.insert(1, "lines_inferred", inferred)
+    report["lines"] = [None, stats["lines"]]
+    report["distinct_lines"] = [None, stats["distinct"]]
+    report["speedup"] = report["seconds"].iloc[0] / report["seconds"]
+    report["tokens_per_second"] = total_tokens / report["seconds"]
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+    BENCHMARKS_PATH.mkdir(parents=True, exist_ok=True)
+    out = BENCHMARKS_PATH / "line_cache.csv"
+    report.to_csv(out, index=False)
+    print(f"Resultados guardados en: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark + chequeo de equivalencia: limpieza de letras.
+
+Compara `clean_lyrics` (patrones precompilados, pases fusionados) contra
+la versión original de 7 `re.sub` (copiada acá como referencia) sobre el
+corpus real:
+- equivalencia: las dos deben dar exactamente el mismo texto en cada fila,
+  si no, el script termina con error y muestra los primeros casos distintos;
+- velocidad: letras por segundo de cada una, por fila y con `apply_unique`.
+
+Por defecto usa el CSV crudo de letras (data/raw/top100_songs_with_lyrics.csv).
+
+Uso:
+    python -m src.benchmarks.bench_lyrics_cleaner --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.cleaners.lyrics_text_cleaner import clean_lyrics
+from src.utils.config import LYRICS_RAW_CSV
+from src.utils.helpers import apply_unique
+
+
+def reference_clean_lyrics(text: str) -> str | None:
+    """
+    `clean_lyrics` tal como estaba antes de precompilar/fusionar los pases.
+    """
+    if pd.isna(text):
+        return None
+
+    text = str(text)
+    text = re.sub(r"^Paroles de la chanson.*?\n?", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\[.*?\]", " ", text)
+    text = re.sub(r"\(.*?\)", " ", text)
+    text = re.sub(r"\{.*?\}", " ", text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"[^a-zA-ZÀ-ÿ0-9\s]", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+def _timed(func, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", type=Path, default=LYRICS_RAW_CSV)
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por caso (se reporta la mejor).")
+    args = parser.parse_args()
+
+    lyrics = pd.read_csv(args.input, encoding="utf-8", usecols=["lyrics"])["lyrics"]
+    lyrics = lyrics.astype("string").fillna(pd.NA)
+    print(f"{len(lyrics)} letras ({lyrics.nunique()} distintas) desde {args.input}")
+
+    # Equivalencia fila a fila
+    expected = lyrics.map(reference_clean_lyrics, na_action="ignore")
+    actual = lyrics.map(clean_lyrics, na_action="ignore")
+    diff = ~((expected == actual) | (expected.isna() & actual.isna())).fillna(False)
+    if diff.any():
+        print(f"[ERROR] {int(diff.sum())} letras con resultado distinto. Primeros casos:")
+        for i in lyrics.index[diff][:5]:
+            print(f"- fila {i}:\n  original:  {expected[i]!r:.200}\n  nueva:     {actual[i]!r:.200}")
+        sys.exit(1)
+    print("Equivalencia: OK (salida idéntica en todas las filas)")
+
+    cases = [
+        ("referencia por fila", lambda: lyrics.map(reference_clean_lyrics, na_action="ignore")),
+        ("nueva por fila", lambda: lyrics.map(clean_lyrics, na_action="ignore")),
+        ("referencia apply_unique", lambda: apply_unique(lyrics, reference_clean_lyrics)),
+        ("nueva apply_unique", lambda: apply_unique(lyrics, clean_lyrics)),
+    ]
+
+    rows = []
+    for label, func in cases:
+        seconds, _ = _timed(func, args.repeat)
+        rows.append((label, seconds, len(lyrics) / seconds))
+
+    report = pd.DataFrame(rows, columns=["mode", "seconds", "lyrics_per_second"])
+    report["speedup"] = report["seconds"].iloc[0] / report["seconds"]
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: throughput de get_lyrics.run (secuencial vs concurrente).
+
+Usa un servidor local (StubServer) con latencia fija, así que mide
+solo el efecto de la concurrencia y del rate limiter.
+
+Uso:
+    python -m src.benchmarks.bench_lyrics_fetch --songs 200 --latency 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import pandas as pd
+
+from src.benchmarks.stub_server import StubServer
+from src.scrapers.get_lyrics import run as get_lyrics_run
+from src.utils.config import RAW_DATA_PATH
+
+
+def load_songs(n: int) -> pd.DataFrame:
+    df = pd.read_csv(RAW_DATA_PATH / "top100_songs_names.csv", encoding="utf-8")
+    return df[["year", "rank", "artist", "song"]].head(n)
+
+
+def bench(df: pd.DataFrame, base_url: str, **kwargs) -> tuple[float, pd.DataFrame]:
+    start = time.perf_counter()
+    out = get_lyrics_run(df, base_url=base_url, use_cache=False, **kwargs)
+    return time.perf_counter() - start, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--songs", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia por request del stub (s).")
+    parser.add_argument("--rate", type=float, default=50.0, help="Requests/s del token bucket.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 8, 16])
+    args = parser.parse_args()
+
+    df = load_songs(args.songs)
+    rows = []
+
+    with StubServer(latency=args.latency) as server:
+        # Secuencial original: sleep fijo de 0.2 s
+        elapsed, reference = bench(df, server.lyrics_url, sleep_seconds=0.2)
+        rows.append(("serial (sleep=0.2)", 1, elapsed))
+
+        for workers in args.workers:
+            elapsed, out = bench(df, server.lyrics_url, workers=workers, rate_limit=args.rate)
+            # Mismo resultado y mismo orden que el modo secuencial
+            assert out["lyrics"].equals(reference["lyrics"]), "resultado distinto al secuencial"
+            rows.append((f"concurrent (rate={args.rate:g}/s)", workers, elapsed))
+
+    report = pd.DataFrame(rows, columns=["mode", "workers", "seconds"])
+    report["songs_per_second"] = len(df) / report["seconds"]
+    print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: pico de memoria de una corrida de src.start con y sin --copy-free.
+
+Cada corrida es un `python -m src.start --no-cache` nuevo (sin cache, para
+que todas las etapas se ejecuten de verdad) y se mide el pico de RSS del
+proceso con `wait4`. Por defecto corre los pasos 3–9: los pasos 1 y 2 (red)
+no se re-ejecutan si sus CSV ya existen.
+
+- `copias`: cada etapa hace `df.copy()` de su entrada (comportamiento anterior).
+- `copy-free`: copy-on-write de pandas; las etapas comparten las columnas
+  que no modifican.
+
+Uso:
+    python -m src.benchmarks.bench_memory
+    python -m src.benchmarks.bench_memory --steps 3 4 5 6 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from src.utils.config import BASE_PATH, BENCHMARKS_PATH
+
+
+MODES = {
+    "copias": [],
+    "copy-free": ["--copy-free"],
+}
+
+
+def _run(steps: list[str], extra: list[str]) -> dict:
+    cmd = [sys.executable, "-m", "src.start", "--steps", *steps, "--no-banner", "--no-cache", *extra]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=BASE_PATH, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss está en KB en Linux
+    return {"peak_mb": usage.ru_maxrss / 1024, "seconds": elapsed, "exit_code": os.waitstatus_to_exitcode(status)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", nargs="+", default=["3", "4", "5", "6", "7", "8", "9"])
+    parser.add_argument("--repeat", type=int, default=1, help="Corridas por modo (se reporta la mediana).")
+    args = parser.parse_args()
+
+    rows = []
+    for mode, extra in MODES.items():
+        runs = [_run(args.steps, extra) for _ in range(args.repeat)]
+        rows.append({
+            "mode": mode,
+            "steps": " ".join(args.steps),
+            "peak_mb": statistics.median(r["peak_mb"] for r in runs),
+            "seconds": statistics.median(r["seconds"] for r in runs),
+            "exit_code": max(r["exit_code"] for r in runs),
+        })
+        print(f"{mode}: listo")
+
+    report = pd.DataFrame(rows)
+    report["peak_vs_copias"] = report["peak_mb"] / report["peak_mb"].iloc[0]
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+    if (report["exit_code"] != 0).any():
+        print("Atención: alguna corrida terminó con error; el pico no cubre todos los pasos.")
+
+    BENCHMARKS_PATH.mkdir(parents=True, exist_ok=True)
+    path = BENCHMARKS_PATH / "memory.csv"
+    report.to_csv(path, index=False)
+    print(f"Resultados guardados en: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: POS tagging NLTK, implementación anterior vs batches en paralelo.
+
+Sobre songs_with_lyrics_tokenized.parquet mide canciones/s y tokens/s de:
+- `anterior`: `nltk.pos_tag` por canción (`apply_unique(tag_tokens)`).
+- `batched`: `tag_many` con el tagger cargado una vez por worker, para
+  cada combinación de `--workers` y `--batch-size`.
+
+Verifica que todas las variantes den exactamente los mismos tags.
+
+Uso:
+    python -m src.benchmarks.bench_nltk_tagging --workers 1 2 4 --batch-size 64 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import pandas as pd
+
+from src.postagging.nltk_tagger import tag_many, tag_tokens
+from src.preprocess.vocabulary import read_tokenized
+from src.utils.config import BENCHMARKS_PATH, LYRICS_TOKENIZED_PARQUET
+from src.utils.helpers import apply_unique, as_hashable
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[64, 256])
+    parser.add_argument("--limit", type=int, default=None, help="Usar solo las primeras N canciones.")
+    args = parser.parse_args()
+
+    lyrics = read_tokenized(LYRICS_TOKENIZED_PARQUET, columns=["lyrics"])["lyrics"]
+    if args.limit:
+        lyrics = lyrics.head(args.limit)
+    total_tokens = int(lyrics.dropna().map(len).sum())
+
+    rows = []
+
+    start = time.perf_counter()
+    reference = apply_unique(lyrics, tag_tokens, key=as_hashable)
+    reference = reference.map(lambda p: None if p is None else [tag for _, tag in p])
+    rows.append(("anterior", 1, None, time.perf_counter() - start, True))
+    print(f"anterior: {rows[-1][3]:.2f} s")
+
+    for workers in args.workers:
+        for batch_size in args.batch_size:
+            start = time.perf_counter()
+            result = tag_many(lyrics, workers=workers, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            rows.append(("batched", workers, batch_size, elapsed, result.equals(reference)))
+            print(f"batched x{workers} batch {batch_size}: {elapsed:.2f} s")
+
+    report = pd.DataFrame(rows, columns=["mode", "workers", "batch_size", "seconds", "identical"])
+    report["songs_per_second"] = len(lyrics) / report["seconds"]
+    report["tokens_per_second"] = total_tokens / report["seconds"]
+    report["speedup"] = report["seconds"].iloc[0] / report["seconds"]
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+    BENCHMARKS_PATH.mkdir(parents=True, exist_ok=True)
+    path = BENCHMARKS_PATH / "nltk_tagging.csv"
+    report.to_csv(path, index=False)
+    print(f"Resultados guardados en: {path}")
+
+    if not report["identical"].all():
+        raise SystemExit("Alguna variante no coincide con la implementación anterior")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: curva de escalado de `parallel_map` en las etapas por fila.
+
+Para cada etapa (limpieza de letras, tokenización, detección de idioma y
+artista principal del chart) mide filas por segundo con 1, 2, 4, ... workers
+sobre el corpus completo, sin deduplicar (mide el costo de la función, no
+la cache), y verifica que el resultado sea idéntico al serial.
+
+Uso:
+    python -m src.benchmarks.bench_parallel_apply --workers 1 2 4 8 16 32
+    python -m src.benchmarks.bench_parallel_apply --start-method spawn
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from src.cleaners.lyrics_text_cleaner import clean_lyrics
+from src.cleaners.top100_cleaner import BillboardTop100Cleaner
+from src.preprocess.detect_language import _init_worker, detect_language
+from src.preprocess.lyrics_tokenize import tokenize
+from src.utils.config import BENCHMARKS_PATH, CHART_RAW_CSV, LYRICS_CLEAN_PARQUET
+from src.utils.parallel import parallel_map
+
+
+def _default_workers() -> list[int]:
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=_default_workers())
+    parser.add_argument("--start-method", choices=["fork", "spawn", "forkserver"], default=None)
+    parser.add_argument("--limit", type=int, default=None, help="Usar solo las primeras N filas.")
+    args = parser.parse_args()
+
+    lyrics = pd.read_parquet(LYRICS_CLEAN_PARQUET, columns=["lyrics"])["lyrics"].tolist()
+    artists = pd.read_csv(CHART_RAW_CSV, encoding="utf-8")["artist"].tolist()
+    if args.limit:
+        lyrics, artists = lyrics[:args.limit], artists[:args.limit]
+
+    tokens_input = [clean_lyrics(t) for t in lyrics]
+    stages = [
+        ("clean_lyrics", clean_lyrics, lyrics, None),
+        ("tokenize", tokenize, tokens_input, None),
+        ("detect_language", detect_language, lyrics, _init_worker),
+        ("extract_primary_artist", BillboardTop100Cleaner()._extract_primary_artist, artists, None),
+    ]
+
+    rows = []
+    for name, func, items, initializer in stages:
+        reference = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            result = parallel_map(
+                func, items, workers=workers, min_items=0,
+                initializer=initializer, start_method=args.start_method,
+            )
+            elapsed = time.perf_counter() - start
+
+            if reference is None:
+                reference = result
+            rows.append({
+                "stage": name,
+                "workers": workers,
+                "rows": len(items),
+                "seconds": elapsed,
+                "rows_per_second": len(items) / elapsed,
+                # equals() trata NaN == NaN (tras pickle no es el mismo objeto)
+                "identical": pd.Series(result, dtype=object).equals(pd.Series(reference, dtype=object)),
+            })
+            print(f"{name} x{workers}: {elapsed:.2f} s")
+
+    report = pd.DataFrame(rows)
+    base = report.groupby("stage")["seconds"].transform("first")
+    report["speedup"] = base / report["seconds"]
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+    BENCHMARKS_PATH.mkdir(parents=True, exist_ok=True)
+    path = BENCHMARKS_PATH / "parallel_apply.csv"
+    report.to_csv(path, index=False)
+    print(f"Resultados guardados en: {path}")
+
+
+if __name__ == "__main__":
+    main()
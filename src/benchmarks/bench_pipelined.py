@@ -0,0 +1,205 @@
+"""
+Benchmark: pasos 2–6 en secuencia vs modo pipelined (src.preprocess.pipelined).
+
+Usa el servidor local (StubServer) para las letras y el backend de
+traducción offline con latencia, así que mide solo la superposición de
+etapas: en secuencia el total es la suma de las etapas; pipelined debería
+acercarse a la más lenta. Verifica que ambos modos produzcan los mismos
+tokens por (year, rank) y, con `--tag`, los mismos tags.
+
+Al final mide el corte: con una traducción que falla en el segundo batch,
+cuánto tarda `pipelined.run` en relanzar el error (falla si pasa de
+`--abort-timeout`; antes la descarga seguía hasta pedir todas las letras).
+
+El pipelined corre primero: la cache de idioma queda caliente para el
+secuencial, no al revés.
+
+Uso:
+    python -m src.benchmarks.bench_pipelined --songs 400 --latency 0.05
+    python -m src.benchmarks.bench_pipelined --tag   # incluye POS NLTK (paso 7)
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.benchmarks.stub_server import StubServer
+from src.cleaners.lyrics_text_cleaner import clean_frame
+from src.postagging.pos_format import pos_tokens
+from src.preprocess import detect_language, lyrics_tokenize, pipelined, translate_to_english
+from src.preprocess.vocabulary import read_tokenized
+from src.scrapers import get_lyrics
+from src.utils.config import BENCHMARKS_PATH, RAW_DATA_PATH
+
+
+def load_songs(n: int) -> pd.DataFrame:
+    df = pd.read_csv(RAW_DATA_PATH / "top100_songs_names.csv", encoding="utf-8")
+    return df[["year", "rank", "artist", "song"]].head(n)
+
+
+def sequential(df: pd.DataFrame, tmp: Path, base_url: str, args) -> dict[str, float]:
+    engine = translate_to_english.TranslationEngine(
+        backend=translate_to_english.OfflineBackend(args.translate_latency), use_cache=False
+    )
+    times = {}
+
+    t0 = time.perf_counter()
+    out = get_lyrics.run(df, output_csv=tmp / "seq_lyrics.csv", workers=args.fetch_workers,
+                         rate_limit=args.rate, base_url=base_url, use_cache=False)
+    times["fetch"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    out = detect_language.run(clean_frame(out, workers=args.workers), workers=args.workers)
+    times["clean+detect"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    out = translate_to_english.run(out, save_snapshot=False, engine=engine)
+    times["translate"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    out = lyrics_tokenize.run(out, output_path=tmp / "seq_tokenized.parquet", workers=args.workers,
+                              vocab_path=tmp / "seq_vocab.parquet")
+    if args.tag:
+        from src.postagging.nltk_tagger import run as nltk_run
+        nltk_run(tmp / "seq_tokenized.parquet", tmp / "seq_pos.parquet", vocab_path=tmp / "seq_vocab.parquet")
+    times["tokenize+tag"] = time.perf_counter() - t0
+    return times
+
+
+class _FailingEngine(translate_to_english.TranslationEngine):
+    """
+    Falla en el segundo batch de traducción.
+    """
+
+    def __init__(self):
+        super().__init__(backend=translate_to_english.OfflineBackend(), use_cache=False)
+        self.calls = 0
+        self.failed_at: float | None = None
+
+    def translate_many(self, items: list[tuple[str, str]]) -> list[str | None]:
+        self.calls += 1
+        if self.calls == 2:
+            self.failed_at = time.perf_counter()
+            raise RuntimeError("fallo simulado en la traducción")
+        return super().translate_many(items)
+
+
+def check_abort(df: pd.DataFrame, tmp: Path, base_url: str, args) -> float:
+    """
+    Segundos entre el fallo de la traducción y el fin de `pipelined.run`.
+    """
+    engine = _FailingEngine()
+    try:
+        pipelined.run(
+            df,
+            lyrics_csv=tmp / "abort_lyrics.csv",
+            output_path=tmp / "abort_tokenized.parquet",
+            translated_path=None,
+            vocab_path=tmp / "abort_vocab.parquet",
+            pos_path=None,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            fetch_workers=args.fetch_workers,
+            rate_limit=args.rate,
+            base_url=base_url,
+            use_cache=False,
+            engine=engine,
+        )
+    except RuntimeError:
+        return time.perf_counter() - engine.failed_at
+    raise SystemExit("pipelined.run no relanzó el error de la traducción")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--songs", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia por request del stub (s).")
+    parser.add_argument("--rate", type=float, default=50.0, help="Requests/s del token bucket.")
+    parser.add_argument("--translate-latency", type=float, default=0.1, help="Latencia por chunk traducido (s).")
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para las etapas CPU.")
+    parser.add_argument("--batch-size", type=int, default=pipelined.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--tag", action="store_true", help="Incluir el POS tagging NLTK.")
+    parser.add_argument("--abort-timeout", type=float, default=2.0,
+                        help="Máximo (s) entre el fallo de una etapa y el fin de la corrida.")
+    args = parser.parse_args()
+
+    df = load_songs(args.songs)
+
+    with tempfile.TemporaryDirectory() as tmp_dir, StubServer(latency=args.latency) as server:
+        tmp = Path(tmp_dir)
+
+        engine = translate_to_english.TranslationEngine(
+            backend=translate_to_english.OfflineBackend(args.translate_latency), use_cache=False
+        )
+        t0 = time.perf_counter()
+        stages = pipelined.run(
+            df,
+            lyrics_csv=tmp / "pipe_lyrics.csv",
+            output_path=tmp / "pipe_tokenized.parquet",
+            translated_path=None,
+            vocab_path=tmp / "pipe_vocab.parquet",
+            pos_path=tmp / "pipe_pos.parquet" if args.tag else None,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            fetch_workers=args.fetch_workers,
+            rate_limit=args.rate,
+            base_url=server.lyrics_url,
+            use_cache=False,
+            engine=engine,
+        )
+        pipelined_total = time.perf_counter() - t0
+
+        times = sequential(df, tmp, server.lyrics_url, args)
+        sequential_total = sum(times.values())
+
+        keys = ["year", "rank"]
+        a = read_tokenized(tmp / "pipe_tokenized.parquet", tmp / "pipe_vocab.parquet").sort_values(keys)
+        b = read_tokenized(tmp / "seq_tokenized.parquet", tmp / "seq_vocab.parquet").sort_values(keys)
+        identical = (
+            len(a) == len(b)
+            and a[keys].to_numpy().tolist() == b[keys].to_numpy().tolist()
+            and all(
+                (x is None and y is None) or (x is not None and y is not None and list(x) == list(y))
+                for x, y in zip(a["lyrics"], b["lyrics"])
+            )
+        )
+        abort_s = check_abort(df, tmp, server.lyrics_url, args)
+
+        if args.tag:
+            # Cada POS se decodifica con su vocabulario (los ids difieren entre modos)
+            pos = [
+                pos_tokens(tmp / f"{mode}_pos.parquet", columns=keys, vocab_path=tmp / f"{mode}_vocab.parquet")
+                .sort_values(keys, kind="stable")[keys + ["token", "pos"]]
+                .reset_index(drop=True)
+                for mode in ("pipe", "seq")
+            ]
+            identical = identical and pos[0].equals(pos[1])
+
+    rows = [("secuencial", stage, seconds) for stage, seconds in times.items()]
+    rows.append(("secuencial", "total", sequential_total))
+    rows += [("pipelined", s, busy) for s, busy in zip(stages["stage"], stages["busy_s"])]
+    rows.append(("pipelined", "total", pipelined_total))
+    rows.append(("pipelined", "abort", abort_s))
+
+    report = pd.DataFrame(rows, columns=["mode", "stage", "seconds"])
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+    print(f"Speedup: {sequential_total / pipelined_total:.2f}x "
+          f"(etapa secuencial más lenta: {max(times.values()):.2f} s); mismos resultados: {identical}")
+
+    BENCHMARKS_PATH.mkdir(parents=True, exist_ok=True)
+    path = BENCHMARKS_PATH / "pipelined.csv"
+    report.to_csv(path, index=False)
+    print(f"Resultados guardados en: {path}")
+
+    if abort_s > args.abort_timeout:
+        raise SystemExit(f"Tras el fallo de una etapa la corrida tardó {abort_s:.1f} s en cortar")
+
+
+if __name__ == "__main__":
+    main()
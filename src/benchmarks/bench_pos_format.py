@@ -0,0 +1,137 @@
+"""
+Benchmark: formato del parquet de POS, pares [token, tag] vs columnar.
+
+Etiqueta el parquet tokenizado una vez (NLTK o spaCy) y guarda el mismo
+resultado en los dos formatos:
+- `anterior`: columna de pares [token, tag] (strings), `df.to_parquet`.
+- `columnar`: `token_ids` int32 + `pos_codes` uint8 + diccionario de tags
+  (`pos_format.write_pos`).
+
+Mide tamaño del archivo, tiempo de escritura, de lectura (una fila por
+canción) y de armar la tabla token-level que usa el dashboard (el
+`explode_tokens` anterior vs `pos_tokens`), y verifica que las dos tablas
+token-level sean idénticas.
+
+Uso:
+    python -m src.benchmarks.bench_pos_format --tagger nltk
+    python -m src.benchmarks.bench_pos_format --tagger spacy --limit 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.postagging.pos_format import pos_tokens, write_pos
+from src.preprocess.vocabulary import Vocabulary, encode_column, read_tokenized
+from src.utils.config import BENCHMARKS_PATH, LYRICS_TOKENIZED_PARQUET
+
+
+def _tag(lyrics: pd.Series, tagger: str, model: str) -> tuple[pd.Series, list[str]]:
+    if tagger == "nltk":
+        from src.postagging.nltk_tagger import known_tags, tag_many
+
+        return tag_many(lyrics), known_tags()
+
+    from src.postagging.spacy_tagger import load_pos_model, tag_pretokenized, upos_tags
+
+    tags = tag_pretokenized(load_pos_model(model), list(lyrics))
+    return pd.Series(tags, index=lyrics.index, dtype=object), upos_tags()
+
+
+def _timed(func, repeat: int) -> tuple[object, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def _legacy_explode(df: pd.DataFrame, pos_col: str) -> pd.DataFrame:
+    """
+    `explode_tokens` anterior del dashboard (recorre los pares en Python).
+    """
+    out = []
+    for year, seq in df[["year", pos_col]].itertuples(index=False):
+        if seq is None:
+            continue
+        for it in seq:
+            if it is not None and it.size >= 2 and it[1] is not None:
+                out.append((year, it[0], it[1]))
+    return pd.DataFrame(out, columns=["year", "token", "pos"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tagger", choices=["nltk", "spacy"], default="nltk")
+    parser.add_argument("--model", default="en_core_web_sm")
+    parser.add_argument("--limit", type=int, default=None, help="Usar solo las primeras N canciones.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por medición (se reporta la mejor).")
+    args = parser.parse_args()
+
+    df = read_tokenized(LYRICS_TOKENIZED_PARQUET)
+    if args.limit:
+        df = df.head(args.limit)
+    pos_col = f"pos_{args.tagger}"
+
+    print(f"Etiquetando {len(df)} canciones con {args.tagger}...")
+    tags, known = _tag(df["lyrics"], args.tagger, args.model)
+    meta = df.drop(columns="lyrics")
+
+    vocab = Vocabulary()
+    token_ids = encode_column(df["lyrics"], vocab)
+    pairs = [
+        None if t is None else [[w, p] for w, p in zip(tokens, t)]
+        for tokens, t in zip(df["lyrics"], tags)
+    ]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        vocab_path = tmp / "vocab.parquet"
+        vocab.save(vocab_path)
+
+        legacy_path = tmp / "anterior.parquet"
+        legacy = meta.assign(**{pos_col: pairs})
+        _, write_s = _timed(lambda: legacy.to_parquet(legacy_path, index=False), args.repeat)
+        _, read_s = _timed(lambda: pd.read_parquet(legacy_path), args.repeat)
+        reference, tokens_s = _timed(
+            lambda: _legacy_explode(pd.read_parquet(legacy_path, columns=["year", pos_col]), pos_col), args.repeat
+        )
+        rows.append(("anterior", legacy_path.stat().st_size, write_s, read_s, tokens_s, True))
+
+        compact_path = tmp / "columnar.parquet"
+        _, write_s = _timed(
+            lambda: write_pos(compact_path, meta, tags, args.tagger, known, token_ids=token_ids, vocab_path=vocab_path),
+            args.repeat,
+        )
+        _, read_s = _timed(lambda: pd.read_parquet(compact_path), args.repeat)
+        tok, tokens_s = _timed(lambda: pos_tokens(compact_path, vocab_path=vocab_path), args.repeat)
+        identical = tok[["year", "token", "pos"]].equals(reference)
+        rows.append(("columnar", compact_path.stat().st_size, write_s, read_s, tokens_s, identical))
+
+    report = pd.DataFrame(rows, columns=["format", "bytes", "write_s", "read_s", "tokens_s", "identical"])
+    report["mb"] = report["bytes"] / 2**20
+    for col in ("bytes", "write_s", "read_s", "tokens_s"):
+        report[f"{col}_ratio"] = report[col].iloc[0] / report[col]
+    report.insert(0, "tagger", args.tagger)
+    report.insert(1, "songs", len(df))
+    report.insert(2, "tokens", len(reference))
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+    BENCHMARKS_PATH.mkdir(parents=True, exist_ok=True)
+    path = BENCHMARKS_PATH / "pos_format.csv"
+    report.to_csv(path, index=False)
+    print(f"Resultados guardados en: {path}")
+
+    if not report["identical"].all():
+        raise SystemExit("El formato columnar no reproduce la tabla token-level anterior")
+
+
+if __name__ == "__main__":
+    main()
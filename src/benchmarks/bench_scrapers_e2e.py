@@ -0,0 +1,112 @@
+"""
+Benchmark end-to-end de los scrapers contra el servidor local.
+
+Para cada escenario (latencia, 429, 5xx, 404) levanta un StubServer con
+las fixtures year-end y mide, para BillboardTop100Scraper y get_lyrics.run:
+tiempo total, items por segundo y overhead de reintentos
+(requests recibidas por el servidor / requests necesarias - 1).
+
+Uso:
+    python -m src.benchmarks.bench_scrapers_e2e --songs 300 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import pandas as pd
+
+from src.benchmarks.fixtures import load_fixtures
+from src.benchmarks.stub_server import StubServer
+from src.scrapers.billboard_scraper import BillboardTop100Scraper
+from src.scrapers.get_lyrics import run as get_lyrics_run
+from src.utils.config import BENCHMARKS_PATH
+
+
+SCENARIOS = {
+    "baseline": {},
+    "latency_50ms": {"latency": 0.05},
+    "429_10pct": {"error_429": 0.10},
+    "5xx_10pct": {"error_5xx": 0.10},
+    "404_20pct": {"not_found": 0.20},
+}
+
+
+def bench_billboard(server: StubServer, pages: dict[int, str], workers: int) -> dict:
+    server.reset_stats()
+    scraper = BillboardTop100Scraper(
+        min(pages), max(pages), use_cache=False, base_url=server.wiki_url, workers=workers
+    )
+
+    start = time.perf_counter()
+    df = scraper.run()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "scraper": "billboard",
+        "items": len(pages),
+        "rows": len(df),
+        "seconds": elapsed,
+        "items_per_second": len(pages) / elapsed,
+        "requests": server.stats["total"],
+        "retry_overhead": server.stats["total"] / len(pages) - 1,
+    }
+
+
+def bench_lyrics(server: StubServer, songs: pd.DataFrame, workers: int) -> dict:
+    server.reset_stats()
+
+    start = time.perf_counter()
+    df = get_lyrics_run(
+        songs,
+        base_url=server.lyrics_url,
+        use_cache=False,
+        workers=workers,
+        rate_limit=1000,
+        sleep_seconds=0,
+    )
+    elapsed = time.perf_counter() - start
+
+    fetched = int(df["fetch_status"].notna().sum())
+    return {
+        "scraper": "lyrics",
+        "items": fetched,
+        "rows": int(df["lyrics"].notna().sum()),
+        "seconds": elapsed,
+        "items_per_second": fetched / elapsed if elapsed else 0.0,
+        "requests": server.stats["total"],
+        "retry_overhead": server.stats["total"] / max(df["fetch_status"].notna().sum(), 1) - 1,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--songs", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    args = parser.parse_args()
+
+    pages = load_fixtures()
+    chart = BillboardTop100Scraper(min(pages), max(pages), use_cache=False)
+    for year, page in pages.items():
+        chart.songs[year], chart.singers[year], chart.ranks[year] = chart.parse_page(page, year)
+    songs = chart.build_dataframe().drop_duplicates(["artist", "song"]).head(args.songs)
+
+    rows = []
+    for name in args.scenarios:
+        with StubServer(pages=pages, **SCENARIOS[name]) as server:
+            for result in (bench_billboard(server, pages, args.workers), bench_lyrics(server, songs, args.workers)):
+                rows.append({"scenario": name, "workers": args.workers, **result})
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+    BENCHMARKS_PATH.mkdir(parents=True, exist_ok=True)
+    out = BENCHMARKS_PATH / "scrapers_e2e.csv"
+    report.to_csv(out, index=False)
+    print(f"Guardado en: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: spaCy POS sobre texto (modo anterior) vs tokens pre-armados.
+
+Sobre las secuencias de tokens distintas del parquet tokenizado mide
+canciones/s de:
+- `texto`: " ".join(tokens) y spaCy tokeniza de nuevo, modelo con los
+  componentes que deshabilitaba el tagger anterior.
+- `doc`: `Doc(words=tokens)` con solo los componentes de POS, para cada
+  combinación de `--n-process` y `--batch-size`.
+
+Reporta también la alineación: en cuántas canciones los tokens de spaCy
+coinciden exactamente con `lyrics` (en modo `doc` es siempre el 100%), y
+que todas las corridas `doc` den los mismos tags.
+
+Uso:
+    python -m src.benchmarks.bench_spacy_tagging --limit 2000 --n-process 1 2 4 --batch-size 64 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import pandas as pd
+
+from src.postagging.spacy_tagger import load_pos_model, tag_pretokenized, tag_texts
+from src.preprocess.vocabulary import read_tokenized
+from src.utils.config import BENCHMARKS_PATH, LYRICS_TOKENIZED_PARQUET
+from src.utils.helpers import as_hashable
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="en_core_web_sm")
+    parser.add_argument("--limit", type=int, default=2000, help="Canciones distintas a etiquetar.")
+    parser.add_argument("--n-process", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[64, 256])
+    args = parser.parse_args()
+
+    import spacy
+
+    lyrics = read_tokenized(LYRICS_TOKENIZED_PARQUET, columns=["lyrics"])["lyrics"].dropna()
+    tokens = [list(t) for t in dict.fromkeys(lyrics.map(as_hashable)) if len(t)][:args.limit]
+    total_tokens = sum(len(t) for t in tokens)
+
+    rows = []
+
+    nlp_text = spacy.load(args.model, disable=["ner", "parser", "lemmatizer"])
+    start = time.perf_counter()
+    by_text = tag_texts(nlp_text, [" ".join(t) for t in tokens])
+    elapsed = time.perf_counter() - start
+    aligned = sum(p is not None and [w for w, _ in p] == t for p, t in zip(by_text, tokens))
+    rows.append(("texto", 1, 128, elapsed, aligned))
+    print(f"texto: {elapsed:.2f} s")
+
+    nlp = load_pos_model(args.model)
+    print(f"Componentes activos (modo doc): {nlp.pipe_names}")
+    reference = None
+    for n_process in args.n_process:
+        for batch_size in args.batch_size:
+            start = time.perf_counter()
+            tagged = tag_pretokenized(nlp, tokens, batch_size=batch_size, n_process=n_process)
+            elapsed = time.perf_counter() - start
+
+            if reference is None:
+                reference = tagged
+            if tagged != reference:
+                raise SystemExit(f"doc x{n_process} (batch {batch_size}): tags distintos a la primera corrida")
+            aligned = sum(p is not None and len(p) == len(t) for p, t in zip(tagged, tokens))
+            rows.append(("doc", n_process, batch_size, elapsed, aligned))
+            print(f"doc x{n_process} batch {batch_size}: {elapsed:.2f} s")
+
+    report = pd.DataFrame(rows, columns=["mode", "n_process", "batch_size", "seconds", "aligned"])
+    report["songs_per_second"] = len(tokens) / report["seconds"]
+    report["tokens_per_second"] = total_tokens / report["seconds"]
+    report["aligned"] = report["aligned"] / len(tokens)
+    report["speedup"] = report["seconds"].iloc[0] / report["seconds"]
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+    BENCHMARKS_PATH.mkdir(parents=True, exist_ok=True)
+    path = BENCHMARKS_PATH / "spacy_tagging.csv"
+    report.to_csv(path, index=False)
+    print(f"Resultados guardados en: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: tiempo de arranque de src.start y costo de import de cada paso.
+
+Cada medición corre en un intérprete nuevo (sin módulos en cache):
+- `src.start`: lo que paga cualquier invocación del CLI (--help, un paso...).
+- `paso N`: lo que agrega importar los módulos del paso N sobre src.start.
+- `todos`: importar todos los pasos de una vez (el comportamiento anterior,
+  con los imports al inicio de src.start).
+
+Un paso cuyas dependencias no están instaladas (p.ej. spaCy) aparece con
+el error en lugar del tiempo.
+
+Uso:
+    python -m src.benchmarks.bench_startup --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+import pandas as pd
+
+from src.start import STEP_MODULES
+from src.utils.config import BASE_PATH, BENCHMARKS_PATH
+
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import src.start
+t1 = time.perf_counter()
+error = None
+try:
+    for name in sys.argv[1:]:
+        __import__(name)
+except Exception as exc:
+    error = f"{type(exc).__name__}: {exc}"
+t2 = time.perf_counter()
+print(json.dumps({"start": t1 - t0, "modules": t2 - t1, "error": error}))
+"""
+
+
+def _probe(modules: list[str]) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE, *modules],
+        cwd=BASE_PATH, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Mediciones por caso (se reporta la mediana).")
+    args = parser.parse_args()
+
+    cases = [("src.start", [])]
+    cases += [(f"paso {step}", modules) for step, modules in STEP_MODULES.items()]
+    cases.append(("todos", [m for modules in STEP_MODULES.values() for m in modules]))
+
+    rows = []
+    for label, modules in cases:
+        runs = [_probe(modules) for _ in range(args.repeat)]
+        rows.append({
+            "case": label,
+            "start_ms": statistics.median(r["start"] for r in runs) * 1000,
+            "import_ms": statistics.median(r["modules"] for r in runs) * 1000,
+            "error": runs[-1]["error"] or "",
+        })
+        print(f"{label}: listo")
+
+    report = pd.DataFrame(rows)
+    report["total_ms"] = report["start_ms"] + report["import_ms"]
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.0f}"))
+
+    BENCHMARKS_PATH.mkdir(parents=True, exist_ok=True)
+    path = BENCHMARKS_PATH / "startup.csv"
+    report.to_csv(path, index=False)
+    print(f"Resultados guardados en: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Fixtures HTML para benchmarks del scraper de Billboard.
+
+Genera páginas con la estructura de las year-end de Wikipedia (head pesado,
+navegación, tabla `wikitable` con Rank | Title | Artist(s), navboxes y
+referencias) a partir de data/raw/top100_songs_names.csv. Si en el
+directorio ya hay HTML real guardado ({year}.html) se usa tal cual.
+"""
+
+from __future__ import annotations
+
+import html
+from pathlib import Path
+
+import pandas as pd
+
+from src.utils.config import CACHE_DATA_PATH, RAW_DATA_PATH
+
+
+FIXTURES_PATH = CACHE_DATA_PATH / "fixtures" / "billboard"
+
+_HEAD = (
+    "<!DOCTYPE html><html><head><meta charset=\"UTF-8\">"
+    "<title>Billboard Year-End Hot 100 singles of {year} - Wikipedia</title>"
+    + "".join(f"<link rel=\"stylesheet\" href=\"/w/load.php?modules=skin.{i}\">" for i in range(20))
+    + "<script>" + "var wgConfig={{}};" * 400 + "</script></head><body>"
+)
+
+_NAV = "<div id=\"mw-navigation\"><ul>" + "".join(
+    f"<li><a href=\"/wiki/Portal:{i}\">Portal {i}</a></li>" for i in range(150)
+) + "</ul></div>"
+
+
+def _navbox(title: str, n_links: int) -> str:
+    links = " · ".join(f"<a href=\"/wiki/{title}_{i}\">{title} {i}</a>" for i in range(n_links))
+    return (
+        f"<table class=\"navbox\"><tr><th>{title}</th></tr>"
+        f"<tr><td class=\"navbox-list\"><div>{links}</div></td></tr></table>"
+    )
+
+
+def build_year_page(year: int, rows: pd.DataFrame) -> str:
+    """
+    Construye el HTML de un año con columnas rank, song, artist.
+    """
+    body = [
+        _HEAD.format(year=year),
+        _NAV,
+        f"<h1>Billboard Year-End Hot 100 singles of {year}</h1>",
+        "<table class=\"infobox\"><tr><td>Year-end chart</td></tr></table>",
+        "<p>" + "Lorem ipsum dolor sit amet. " * 40 + "</p>",
+        "<table class=\"wikitable sortable\"><tbody>",
+        "<tr><th>Rank</th><th>Title</th><th>Artist(s)</th></tr>",
+    ]
+
+    for rank, song, artist in rows[["rank", "song", "artist"]].itertuples(index=False):
+        song = html.escape(str(song))
+        artist = html.escape(str(artist)) if pd.notna(artist) else ""
+        body.append(
+            f"<tr><td>{rank}</td>"
+            f"<td>\"<a href=\"/wiki/{song}\" title=\"{song}\">{song}</a>\"</td>"
+            f"<td><a href=\"/wiki/{artist}\" title=\"{artist}\">{artist}</a></td></tr>"
+        )
+
+    body.append("</tbody></table>")
+    body.append("<h2>See also</h2><ul>" + "".join(f"<li><a href=\"/wiki/{y}\">{y}</a></li>" for y in range(1946, 2025)) + "</ul>")
+    body.append("<ol class=\"references\">" + "".join(f"<li id=\"cite-{i}\"><cite>Ref {i}</cite></li>" for i in range(60)) + "</ol>")
+    body.append(_navbox("Billboard_Year-End", 200))
+    body.append(_navbox("Hot_100", 300))
+    body.append("</body></html>")
+    return "\n".join(body)
+
+
+def write_fixtures(path: Path = FIXTURES_PATH, overwrite: bool = False) -> Path:
+    """
+    Escribe un {year}.html por año del CSV crudo (solo los que faltan).
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    df = pd.read_csv(RAW_DATA_PATH / "top100_songs_names.csv", encoding="utf-8")
+
+    for year, rows in df.groupby("year"):
+        out = path / f"{year}.html"
+        if overwrite or not out.exists():
+            out.write_text(build_year_page(int(year), rows), encoding="utf-8")
+
+    return path
+
+
+def load_fixtures(path: Path = FIXTURES_PATH) -> dict[int, str]:
+    """
+    Devuelve {year: html}. Genera las fixtures si el directorio está vacío.
+    """
+    if not path.exists() or not any(path.glob("*.html")):
+        write_fixtures(path)
+
+    return {
+        int(f.stem): f.read_text(encoding="utf-8")
+        for f in sorted(path.glob("*.html"))
+        if f.stem.isdigit()
+    }
@@ -0,0 +1,179 @@
+"""
+Servidor HTTP local que reemplaza a Wikipedia y a lyrics.ovh.
+
+Rutas:
+- `GET /wiki/Billboard_Year-End_Hot_100_singles_of_{year}`: página year-end
+  guardada (ver `src.benchmarks.fixtures`).
+- `GET /v1/{artist}/{title}`: JSON sintético con la forma de lyrics.ovh.
+
+Permite inyectar latencia, 429, 5xx y 404 (tasas con semilla fija), y
+cuenta las requests recibidas por status para medir reintentos.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+
+WIKI_PREFIX = "/wiki/Billboard_Year-End_Hot_100_singles_of_"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # El servidor real es un _StubHTTPServer con la configuración
+    server: "_StubHTTPServer"
+
+    def do_GET(self):  # noqa: N802 (nombre impuesto por BaseHTTPRequestHandler)
+        srv = self.server
+
+        if srv.latency:
+            time.sleep(srv.latency)
+
+        fault = srv.draw_fault()
+        if fault is not None:
+            self._send(fault, {"error": "injected"})
+            return
+
+        if self.path.startswith(WIKI_PREFIX):
+            self._serve_page(self.path[len(WIKI_PREFIX):])
+        elif self.path.startswith("/v1/"):
+            self._serve_lyrics(self.path)
+        else:
+            self._send(404, {"error": "Not found"})
+
+    def _serve_page(self, year: str) -> None:
+        page = self.server.pages.get(int(year)) if year.isdigit() else None
+        if page is None:
+            self._send(404, {"error": "Not found"})
+            return
+
+        body = page.encode("utf-8")
+        self._write(200, "text/html; charset=UTF-8", body)
+
+    def _serve_lyrics(self, path: str) -> None:
+        parts = path.strip("/").split("/")
+        if len(parts) != 3:
+            self._send(404, {"error": "No lyrics found"})
+            return
+
+        artist, title = unquote(parts[1]), unquote(parts[2])
+        if self.server.is_missing(f"{artist}/{title}"):
+            self._send(404, {"error": "No lyrics found"})
+            return
+
+        self._send(200, {"lyrics": f"Paroles de la chanson {title} par {artist}\n{title}\nla la la\n" * 4})
+
+    def _send(self, status: int, payload: dict) -> None:
+        self._write(status, "application/json", json.dumps(payload).encode("utf-8"))
+
+    def _write(self, status: int, content_type: str, body: bytes) -> None:
+        self.server.count(status)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # silenciar log por request
+        return
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pages, latency, error_429, error_5xx, not_found, seed):
+        super().__init__(address, _StubHandler)
+        self.pages = pages
+        self.latency = latency
+        self.error_429 = error_429
+        self.error_5xx = error_5xx
+        self.not_found = not_found
+
+        self.stats = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw_fault(self) -> int | None:
+        with self._lock:
+            x = self._rng.random()
+        if x < self.error_429:
+            return 429
+        if x < self.error_429 + self.error_5xx:
+            return 503
+        return None
+
+    def is_missing(self, key: str) -> bool:
+        # Determinístico por canción: el mismo título siempre da 404
+        return (zlib.crc32(key.encode("utf-8")) % 10_000) / 10_000 < self.not_found
+
+    def count(self, status: int) -> None:
+        with self._lock:
+            self.stats[status] += 1
+            self.stats["total"] += 1
+
+
+class StubServer:
+    """
+    Levanta el servidor en un hilo (puerto libre) y lo apaga al salir.
+
+    >>> with StubServer(latency=0.05, error_5xx=0.1, pages=load_fixtures()) as server:
+    ...     BillboardTop100Scraper(base_url=server.wiki_url, use_cache=False).run()
+    ...     get_lyrics.run(df, base_url=server.lyrics_url, use_cache=False)
+    ...     server.stats  # Counter({200: ..., 503: ..., 'total': ...})
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_429: float = 0.0,
+        error_5xx: float = 0.0,
+        not_found: float = 0.0,
+        pages: dict[int, str] | None = None,
+        seed: int = 42,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self._httpd = _StubHTTPServer(
+            (host, port), pages or {}, latency, error_429, error_5xx, not_found, seed
+        )
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def lyrics_url(self) -> str:
+        return f"{self.url}/v1"
+
+    @property
+    def wiki_url(self) -> str:
+        return f"{self.url}{WIKI_PREFIX}"
+
+    @property
+    def stats(self) -> Counter:
+        return self._httpd.stats
+
+    def reset_stats(self) -> None:
+        self._httpd.stats.clear()
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
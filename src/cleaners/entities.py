@@ -0,0 +1,157 @@
+"""
+Tablas de entidades: artistas y canciones con ids enteros estables.
+
+- `artist_aliases.csv`: cada string de artista crudo del chart (p. ej.
+  "Drake featuring Rihanna") -> artista principal normalizado + `artist_id`.
+  Es la memo de `_extract_primary_artist`: un string crudo se normaliza
+  una sola vez, en la primera corrida que lo ve.
+- `artists.csv`: `artist_id`, clave (casefold, sin comillas) y nombre.
+- `songs.csv`: `song_id`, `artist_id`, clave del título y título.
+
+Los ids nunca cambian: los nuevos se asignan a continuación del máximo.
+Con `artist_id`/`song_id` en las filas del chart, el resume de lyrics, la
+deduplicación de canciones y los group-by trabajan sobre enteros.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from src.utils.config import ARTIST_ALIASES_CSV, ARTISTS_CSV, SONGS_CSV
+from src.utils.helpers import stage_copy
+from src.utils.parallel import parallel_map
+
+
+ENTITY_COLUMNS = ["artist_id", "song_id"]
+
+
+def entity_key(text) -> str | None:
+    """
+    Clave de comparación: sin comillas, sin espacios en los bordes y casefold
+    (lo mismo que `get_lyrics.song_key` hace por columna).
+    """
+    if text is None or (isinstance(text, float) and pd.isna(text)) or text is pd.NA:
+        return None
+    return str(text).replace('"', "").replace("'", "").strip().casefold()
+
+
+def _read(path: Path, columns: list[str]) -> pd.DataFrame:
+    if path.exists():
+        return pd.read_csv(path, encoding="utf-8", keep_default_na=False, na_values=[""])[columns]
+    return pd.DataFrame(columns=columns)
+
+
+class EntityRegistry:
+    """
+    Registro persistente de artistas y canciones. `assign(df)` agrega
+    `artist`, `artist_id` y `song_id`; `save()` escribe lo nuevo.
+    """
+
+    def __init__(
+        self,
+        normalize: Callable[[str], str],
+        artists_path: Path = ARTISTS_CSV,
+        songs_path: Path = SONGS_CSV,
+        aliases_path: Path = ARTIST_ALIASES_CSV,
+    ):
+        self.normalize = normalize
+        self.artists_path = artists_path
+        self.songs_path = songs_path
+        self.aliases_path = aliases_path
+
+        artists = _read(artists_path, ["artist_id", "artist_key", "artist"])
+        songs = _read(songs_path, ["song_id", "artist_id", "song_key", "song"])
+        aliases = _read(aliases_path, ["artist_raw", "artist", "artist_id"])
+
+        self._artists = dict(zip(artists["artist_key"], artists["artist_id"].astype(int)))
+        self._songs = {
+            (int(a), k): int(s) for s, a, k in zip(songs["song_id"], songs["artist_id"], songs["song_key"])
+        }
+        self._aliases = {
+            raw: (name, int(aid)) for raw, name, aid in zip(aliases["artist_raw"], aliases["artist"], aliases["artist_id"])
+        }
+
+        self._next_artist = max(self._artists.values(), default=-1) + 1
+        self._next_song = max(self._songs.values(), default=-1) + 1
+
+        self._new_artists: list[tuple[int, str, str]] = []
+        self._new_songs: list[tuple[int, int, str, str]] = []
+        self._new_aliases: list[tuple[str, str, int]] = []
+        self.normalized = 0
+
+    def _artist_id(self, name: str) -> int:
+        key = entity_key(name)
+        if key not in self._artists:
+            self._artists[key] = self._next_artist
+            self._next_artist += 1
+            self._new_artists.append((self._artists[key], key, name))
+        return self._artists[key]
+
+    def _song_id(self, artist_id: int, title: str) -> int:
+        key = (artist_id, entity_key(title))
+        if key not in self._songs:
+            self._songs[key] = self._next_song
+            self._next_song += 1
+            self._new_songs.append((self._songs[key], artist_id, key[1], title))
+        return self._songs[key]
+
+    def artists(self, raw: pd.Series, workers: int | None = 1) -> tuple[pd.Series, pd.Series]:
+        """
+        Artista crudo -> (artista principal, artist_id). Solo se normalizan
+        los strings crudos que nunca se vieron.
+        """
+        todo = [r for r in pd.unique(raw.dropna()) if r not in self._aliases]
+        for r, name in zip(todo, parallel_map(self.normalize, todo, workers=workers)):
+            self._aliases[r] = (name, self._artist_id(name))
+            self._new_aliases.append((r, name, self._aliases[r][1]))
+        self.normalized += len(todo)
+
+        memo = raw.map(self._aliases)
+        names = memo.map(lambda m: m[0], na_action="ignore")
+        ids = memo.map(lambda m: m[1], na_action="ignore").astype("Int64")
+        return names, ids
+
+    def songs(self, artist_ids: pd.Series, titles: pd.Series) -> pd.Series:
+        ids = [
+            pd.NA if pd.isna(a) or entity_key(t) is None else self._song_id(int(a), t)
+            for a, t in zip(artist_ids, titles)
+        ]
+        return pd.Series(ids, index=titles.index, dtype="Int64")
+
+    def assign(
+        self,
+        df: pd.DataFrame,
+        raw_artist_col: str = "artist_original",
+        workers: int | None = 1,
+    ) -> pd.DataFrame:
+        """
+        Devuelve `df` con `artist` (principal), `artist_id` y `song_id`.
+        """
+        out = stage_copy(df)
+        out["artist"], out["artist_id"] = self.artists(out[raw_artist_col], workers=workers)
+        out["song_id"] = self.songs(out["artist_id"], out["song"])
+        return out
+
+    def save(self) -> None:
+        """
+        Agrega a los CSV las entidades nuevas (las existentes no se tocan).
+        """
+        tables = [
+            (self.artists_path, ["artist_id", "artist_key", "artist"], self._new_artists),
+            (self.songs_path, ["song_id", "artist_id", "song_key", "song"], self._new_songs),
+            (self.aliases_path, ["artist_raw", "artist", "artist_id"], self._new_aliases),
+        ]
+        for path, columns, rows in tables:
+            if not rows:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            pd.DataFrame(rows, columns=columns).to_csv(
+                path, mode="a", header=not path.exists(), index=False, encoding="utf-8"
+            )
+            rows.clear()
+
+        print(f"Entidades: {len(self._artists)} artistas, {len(self._songs)} canciones "
+              f"({self.normalized} strings de artista normalizados en esta corrida)")
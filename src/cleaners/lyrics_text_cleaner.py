@@ -3,16 +3,33 @@ Lyrics Text Cleaner.
 
 Lee desde RAW_DATA_PATH,
 limpia texto de lyrics y guarda en PROCESSED_DATA_PATH.
+
+Por defecto cada letra queda en una sola línea. Con `keep_lines=True`
+(`--line-cache` en src.start) se conservan los saltos de línea (una línea
+por renglón no vacío, separadas por "\n"): el tokenizador guarda cuántos
+tokens tiene cada línea y los taggers pueden etiquetar por línea (cache de
+estribillos).
 """
 
 import re
+from functools import partial
+
 import pandas as pd
-from src.utils.config import RAW_DATA_PATH, PROCESSED_DATA_PATH
+from src.utils.config import LYRICS_RAW_CSV, PROCESSED_DATA_PATH
+from src.utils.helpers import apply_unique
+
 
+INPUT_CSV = LYRICS_RAW_CSV
 
-INPUT_CSV = RAW_DATA_PATH / "top100_songs_with_lyrics.csv"
+# Patrones precompilados (antes eran 7 re.sub sin compilar por fila)
+_HEADER_RE = re.compile(r"^Paroles de la chanson.*?\n?", flags=re.IGNORECASE)
+_SQUARE_RE = re.compile(r"\[.*?\]")
+_ROUND_RE = re.compile(r"\(.*?\)")
+_CURLY_RE = re.compile(r"\{.*?\}")
+_SPECIAL_RE = re.compile(r"[^a-zA-ZÀ-ÿ0-9\s]+")
 
-def clean_lyrics(text: str) -> str | None:
+
+def clean_lyrics(text: str, keep_lines: bool = False) -> str | None:
 
     if pd.isna(text):
         return None
@@ -20,44 +37,55 @@ def clean_lyrics(text: str) -> str | None:
     text = str(text)
 
     # Eliminar encabezado tipo "Paroles de la chanson ..."
-    text = re.sub(
-        r"^Paroles de la chanson.*?\n?",
-        "",
-        text,
-        flags=re.IGNORECASE
-    )
+    text = _HEADER_RE.sub("", text)
 
     # Eliminar contenido entre [], (), {}
-    text = re.sub(r"\[.*?\]", " ", text)
-    text = re.sub(r"\(.*?\)", " ", text)
-    text = re.sub(r"\{.*?\}", " ", text)
-
-    # Convertir saltos de línea en espacio
-    text = re.sub(r"\s+", " ", text)
-
-    # Eliminar caracteres especiales (mantener letras con acentos, números y espacio)
-    text = re.sub(r"[^a-zA-ZÀ-ÿ0-9\s]", "", text)
-
-    # Normalizar espacios
-    text = re.sub(r"\s+", " ", text).strip()
+    # (en ese orden y por separado: fusionarlos cambia el resultado cuando
+    # los paréntesis se cruzan; se saltea el pase si no hay apertura)
+    if "[" in text:
+        text = _SQUARE_RE.sub(" ", text)
+    if "(" in text:
+        text = _ROUND_RE.sub(" ", text)
+    if "{" in text:
+        text = _CURLY_RE.sub(" ", text)
+
+    # Eliminar caracteres especiales (mantener letras con acentos, números y espacios)
+    text = _SPECIAL_RE.sub("", text)
+
+    if not keep_lines:
+        # Saltos de línea y espacios repetidos -> un espacio.
+        # split() corta en los mismos caracteres que \s, así que esto equivale
+        # a los dos re.sub(r"\s+", " ", ...) + strip() anteriores
+        return " ".join(text.split())
+
+    # Igual, pero línea por línea (sin las líneas que quedan vacías)
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def clean_frame(df: pd.DataFrame, workers: int | None = 1, keep_lines: bool = False) -> pd.DataFrame:
+    """
+    Limpia la columna `lyrics` de un DataFrame ya cargado (el CSV completo
+    o un batch) y deja solo las columnas que usa el resto del pipeline
+    (más `artist_id`/`song_id` si vienen).
+    Con `workers != 1` la limpieza corre en un pool de procesos.
+    """
+    # Una canción repetida en varios años se limpia una sola vez
+    lyrics = apply_unique(
+        df["lyrics"].astype("string").fillna(pd.NA),
+        partial(clean_lyrics, keep_lines=keep_lines),
+        workers=workers,
+    )
 
-    return text
+    columns = ["year", "rank", "artist", "song"] + [c for c in ("artist_id", "song_id") if c in df.columns]
+    return df[columns].assign(lyrics=lyrics)
 
 
-def run() -> pd.DataFrame:
+def run(workers: int | None = 1, keep_lines: bool = False) -> pd.DataFrame:
 
     df = pd.read_csv(INPUT_CSV, encoding="utf-8")
 
-    df["lyrics"] = (
-        df["lyrics"]
-        .astype("string")
-        .fillna(pd.NA)
-        .apply(clean_lyrics)
-    )
-
-    df = df[["year", "rank", "artist", "song", "lyrics"]]
-
-    return df
+    return clean_frame(df, workers=workers, keep_lines=keep_lines)
 
 if __name__ == "__main__":
     run()
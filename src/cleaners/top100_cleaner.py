@@ -6,11 +6,22 @@ y sobrescribe la columna `artist` dejando únicamente
 el primer artista cuando hay colaboraciones.
 
 Este DataFrame luego se usa directamente para el scraper de lyrics.
+
+`clean_incremental` mantiene una tabla limpia persistente (CHART_CLEAN_CSV)
+y solo limpia las filas nuevas o cambiadas. Además asigna `artist_id` y
+`song_id` (ver `src.cleaners.entities`): cada string de artista crudo se
+normaliza una sola vez entre corridas.
 """
 
 import re
+from pathlib import Path
+
 import pandas as pd
 
+from src.cleaners.entities import ENTITY_COLUMNS, EntityRegistry
+from src.utils.config import CHART_CLEAN_CSV
+from src.utils.helpers import apply_unique, changed_rows, stage_copy, upsert_rows
+
 
 class BillboardTop100Cleaner:
     _COLLAB_SPLIT = re.compile(
@@ -55,15 +66,64 @@ class BillboardTop100Cleaner:
 
         return parts[0] if parts else artist
 
-    def clean(self, df: pd.DataFrame) -> pd.DataFrame:
+    def clean(self, df: pd.DataFrame, workers: int | None = 1) -> pd.DataFrame:
         """
         Sobrescribe la columna `artist` con el artista limpio.
+        Con `workers != 1` se limpia en un pool de procesos.
         """
 
         if "artist" not in df.columns:
             raise ValueError("Column 'artist' not found")
 
-        df = df.copy()
-        df["artist"] = df["artist"].apply(self._extract_primary_artist)
+        df = stage_copy(df)
+        df["artist"] = apply_unique(df["artist"], self._extract_primary_artist, workers=workers)
 
         return df
+
+    def clean_incremental(
+        self,
+        df: pd.DataFrame,
+        store_path: Path = CHART_CLEAN_CSV,
+        workers: int | None = 1,
+        registry: EntityRegistry | None = None,
+    ) -> pd.DataFrame:
+        """
+        Limpia solo las filas de `df` (tabla cruda completa o parcial) que no
+        están en la tabla limpia persistente o cuyo song/artist original cambió.
+
+        Actualiza `store_path` y devuelve únicamente esas filas ya limpias
+        (con las columnas `artist_original`, `artist_id` y `song_id`).
+        """
+        keys = ["year", "rank"]
+        columns = keys + ["song", "artist", "artist_original"] + ENTITY_COLUMNS
+
+        if registry is None:
+            registry = EntityRegistry(normalize=self._extract_primary_artist)
+
+        if store_path.exists():
+            stored = pd.read_csv(store_path, encoding="utf-8")
+        else:
+            stored = pd.DataFrame(columns=columns)
+
+        # Tabla guardada antes de que existieran los ids: completarlos
+        if not stored.empty and not set(ENTITY_COLUMNS) <= set(stored.columns):
+            stored = registry.assign(stored, workers=workers)[columns]
+            store_path.parent.mkdir(parents=True, exist_ok=True)
+            stored.to_csv(store_path, index=False, encoding="utf-8")
+
+        raw = df.rename(columns={"artist": "artist_original"})
+        delta = changed_rows(raw, stored, keys, ["song", "artist_original"])
+
+        if delta.empty:
+            registry.save()
+            print(f"Tabla limpia al día: {len(stored)} filas en {store_path}")
+            return stored.iloc[0:0]
+
+        delta = registry.assign(delta, workers=workers)[columns]
+        registry.save()
+
+        store_path.parent.mkdir(parents=True, exist_ok=True)
+        upsert_rows(stored, delta, keys).to_csv(store_path, index=False, encoding="utf-8")
+        print(f"Tabla limpia actualizada: {len(delta)} filas nuevas/cambiadas -> {store_path}")
+
+        return delta.reset_index(drop=True)
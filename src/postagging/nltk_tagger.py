@@ -2,20 +2,48 @@
 NLTK POS Tagger.
 
 Lee tokens desde Parquet (processed) y genera POS tags con NLTK.
-Guarda resultado en data/results.
+Guarda resultado en data/results, en el formato columnar de
+`pos_format` (ids de token + códigos uint8 de tags PTB).
+
+Por defecto (`batched=True`) cada proceso carga el perceptron tagger una
+sola vez y etiqueta las canciones en batches de `batch_size`, repartidos
+en un pool de `workers` procesos; el resultado es el mismo que llamar
+`nltk.pos_tag` canción por canción (`tag_tokens`, que devuelve pares
+[token, tag]; el resto de las funciones devuelve solo los tags).
+
+Es incremental: cada canción guarda el hash de su secuencia de tokens y
+el parquet el modelo (`model_name`); en la corrida siguiente solo se
+etiquetan las canciones nuevas o con letra cambiada, y el resto se toma
+del parquet anterior (`incremental=False` etiqueta todo).
+
+Con `line_cache=True` se etiqueta línea por línea (`segments`): cada
+línea distinta del corpus pasa una sola vez por el tagger.
 """
 
 from __future__ import annotations
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import nltk
 
-from src.utils.config import PROCESSED_DATA_PATH, RESULTS_DATA_PATH
+from src.postagging.pos_format import previous_tags, token_hashes, write_pos
+from src.postagging.segments import tag_by_lines
+from src.preprocess.lyrics_tokenize import LINE_LENGTHS_COL
+from src.preprocess.vocabulary import TOKEN_IDS_COL, read_tokenized
+from src.utils.config import LYRICS_TOKENIZED_PARQUET, LYRICS_VOCAB_PARQUET, POS_NLTK_PARQUET
+from src.utils.helpers import apply_unique, as_hashable
+from src.utils.parallel import parallel_map
 
 
-INPUT_FILE = PROCESSED_DATA_PATH / "songs_with_lyrics_tokenized.parquet"
-OUTPUT_FILE = RESULTS_DATA_PATH / "pos_nltk.parquet"
+INPUT_FILE = LYRICS_TOKENIZED_PARQUET
+OUTPUT_FILE = POS_NLTK_PARQUET
+
+DEFAULT_BATCH_SIZE = 256
+
+# Tagger de este proceso (lo carga `_init_tagger`, una vez por worker)
+_tagger = None
 
 
 def tag_tokens(tokens):
@@ -43,26 +71,154 @@ def tag_tokens(tokens):
     return [[token, tag] for token, tag in tagged]
 
 
-def run(input_path: Path = INPUT_FILE, output_path: Path = OUTPUT_FILE) -> pd.DataFrame:
+def _init_tagger(lang: str = "eng") -> None:
+    """
+    Carga el perceptron tagger que usa `nltk.pos_tag` (una vez por proceso).
+    """
+    global _tagger
+    from nltk.tag.perceptron import PerceptronTagger
+
+    _tagger = PerceptronTagger(lang=lang)
+
+
+def known_tags() -> list[str]:
+    """
+    Tags que puede devolver el tagger (diccionario de `pos_codes`).
+    """
+    if _tagger is None:
+        _init_tagger()
+    classes = getattr(getattr(_tagger, "model", None), "classes", ())
+    return sorted(classes)
+
+
+def model_name(line_cache: bool = False) -> str:
+    """
+    Tagger, versión y modo (se guarda en el parquet; si cambia, se re-etiqueta todo).
+    """
+    if _tagger is None:
+        _init_tagger()
+    weights = getattr(getattr(_tagger, "model", None), "weights", {})
+    mode = " (líneas)" if line_cache else ""
+    return f"nltk {nltk.__version__} {type(_tagger).__name__} eng ({len(weights)} features){mode}"
+
+
+def tag_batch(token_lists: list) -> list[list[str] | None]:
+    """
+    Tags de cada canción de un batch, con el tagger ya cargado.
+    """
+    if _tagger is None:
+        _init_tagger()
+
+    results = []
+    for tokens in token_lists:
+        if tokens is None or (isinstance(tokens, float) and pd.isna(tokens)) or len(tokens) == 0:
+            results.append(None)
+        else:
+            results.append([pos for _, pos in _tagger.tag(list(tokens))])
+    return results
+
+
+def tag_distinct(
+    token_lists: list,
+    workers: int | None = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> list[list[str] | None]:
+    """
+    Tags de cada lista de `token_lists` (ya sin repetidas), en batches
+    repartidos entre `workers` procesos.
+    """
+    batches = [token_lists[i:i + batch_size] for i in range(0, len(token_lists), batch_size)]
+    tagged = parallel_map(tag_batch, batches, workers=workers, min_items=2, initializer=_init_tagger, desc="NLTK")
+    return [pos for batch in tagged for pos in batch]
+
+
+def tag_many(
+    series: pd.Series,
+    workers: int | None = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> pd.Series:
+    """
+    Tags de cada canción de `series` (listas de tokens). Cada secuencia
+    distinta se etiqueta una vez; los batches se reparten entre `workers`
+    procesos.
+    """
+    codes, _ = pd.factorize(series.map(as_hashable))
+    first = pd.Series(np.arange(len(codes))).groupby(codes).first()
+    unique_tokens = [series.iat[i] for i in first]
+
+    results = dict(zip(first.index, tag_distinct(unique_tokens, workers=workers, batch_size=batch_size)))
+
+    return pd.Series([results[c] for c in codes], index=series.index, dtype=object)
+
+
+def run(
+    input_path: Path = INPUT_FILE,
+    output_path: Path = OUTPUT_FILE,
+    workers: int | None = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    batched: bool = True,
+    vocab_path: Path = LYRICS_VOCAB_PARQUET,
+    incremental: bool = True,
+    line_cache: bool = False,
+) -> pd.DataFrame:
     """
     Lee el parquet tokenizado, aplica POS tagging con NLTK y guarda un parquet en results.
+    Con `batched=False` usa el modo anterior (`nltk.pos_tag` por canción, un solo core).
+    Con `incremental=True` reutiliza los tags de `output_path` de las canciones
+    cuya secuencia de tokens no cambió. Con `line_cache=True` etiqueta cada
+    línea distinta una vez (necesita `line_lengths` en el parquet tokenizado).
+    Devuelve una fila por canción con `pos_nltk` (lista de tags alineada con `lyrics`).
     """
     # Si no los tienes descargados, descomenta (solo una vez):
     # nltk.download("punkt")
     # nltk.download("averaged_perceptron_tagger")
 
-    df = pd.read_parquet(input_path)
+    df = read_tokenized(input_path, vocab_path)
 
     required = {"year", "rank", "artist", "song", "lyrics"}
     missing = required - set(df.columns)
     if missing:
         raise ValueError(f"Missing columns: {sorted(missing)}")
 
-    out = df.copy()
-    out["pos_nltk"] = out["lyrics"].apply(tag_tokens)
-
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    out.to_parquet(output_path, index=False)
+    lines = None
+    if line_cache:
+        if LINE_LENGTHS_COL not in df.columns:
+            print(f"{input_path.name} no tiene {LINE_LENGTHS_COL}: cada canción cuenta como una línea")
+        lines = df[LINE_LENGTHS_COL] if LINE_LENGTHS_COL in df.columns else pd.Series(None, index=df.index)
+
+    model = model_name(line_cache)
+    hashes = token_hashes(df["lyrics"], lines)
+    known, _ = previous_tags(output_path, model) if incremental else ({}, None)
+    pending = pd.Series([h is not None and h not in known for h in hashes], index=df.index)
+    reused = sum(h in known for h in hashes)
+    print(f"POS NLTK: {int(pending.sum())} canciones a etiquetar, {reused} del resultado anterior")
+
+    # `df` se leyó acá: no hace falta copiarlo
+    out = df
+    # Canciones repetidas (misma secuencia de tokens) se etiquetan una vez
+    lyrics = out.loc[pending, "lyrics"]
+    if line_cache:
+        tagged, _ = tag_by_lines(
+            list(lyrics), list(lines[pending]),
+            lambda segments: tag_distinct(segments, workers=workers, batch_size=batch_size),
+        )
+    elif batched:
+        tagged = tag_many(lyrics, workers=workers, batch_size=batch_size)
+    else:
+        pairs = apply_unique(lyrics, tag_tokens, key=as_hashable, desc="NLTK")
+        tagged = pairs.map(lambda p: None if p is None else [tag for _, tag in p])
+    known.update(zip((h for h, p in zip(hashes, pending) if p), tagged))
+    out["pos_nltk"] = [known.get(h) for h in hashes]
+
+    meta = out.drop(columns=["lyrics", "pos_nltk", LINE_LENGTHS_COL], errors="ignore")
+    write_args = dict(tags=known_tags(), hashes=hashes, model=model)
+    if TOKEN_IDS_COL in pq.read_schema(input_path).names:
+        token_ids = pq.read_table(input_path, columns=[TOKEN_IDS_COL]).column(TOKEN_IDS_COL)
+        write_pos(
+            output_path, meta, out["pos_nltk"], "nltk", token_ids=token_ids, vocab_path=vocab_path, **write_args
+        )
+    else:
+        write_pos(output_path, meta, out["pos_nltk"], "nltk", tokens=list(out["lyrics"]), **write_args)
 
     print(f"Saved NLTK POS to: {output_path}")
     print(f"Rows with POS: {out['pos_nltk'].notna().sum()} / {len(out)}")
@@ -0,0 +1,408 @@
+"""
+Formato columnar de los parquet de POS (pos_spacy.parquet, pos_nltk.parquet).
+
+En lugar de una lista de pares [token, tag] (strings) por canción, cada
+fila guarda dos listas paralelas:
+- `token_ids` (list<int32>, ids del vocabulario del paso 6) o, si el
+  tagger tokenizó por su cuenta, `tokens` (list<string>);
+- `pos_codes` (list<uint8>), índices en el diccionario de tags.
+
+El diccionario de tags (lista de strings) y el nombre del tagger van en
+la metadata del parquet. Los `token_ids` solo se decodifican con el
+vocabulario con el que se escribieron: la metadata guarda su tamaño y su
+huella (`vocabulary.fingerprint`) y la lectura falla si el vocabulario
+actual es otro (p. ej. se volvió a correr el paso 6 sin volver a etiquetar).
+
+Para el tagging incremental cada fila lleva además `token_hash` (hash de
+la secuencia de tokens de la canción) y la metadata el modelo con el que
+se etiquetó (nombre y versión). `previous_tags` devuelve, de un parquet
+ya escrito con el mismo modelo, los tags por hash: solo las canciones
+nuevas o con letra cambiada vuelven a pasar por el tagger.
+
+- `write_pos`: lo usan los `run()` de los taggers.
+- `read_pos`: una fila por canción, con las listas como arrays.
+- `pos_tokens`: tabla a nivel token (row, columnas pedidas, token, pos),
+  armada en Arrow/numpy sin recorrer las canciones en Python. Es lo que
+  consume el dashboard.
+
+Los parquet anteriores (pares [token, tag] en `pos_spacy` / `pos_nltk`)
+se siguen pudiendo leer con las mismas funciones.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.preprocess.vocabulary import TOKEN_IDS_COL, fingerprint
+from src.utils.config import LYRICS_VOCAB_PARQUET
+
+
+POS_CODES_COL = "pos_codes"
+TOKENS_COL = "tokens"
+TOKEN_HASH_COL = "token_hash"
+
+TAGS_METADATA_KEY = b"euterpe.pos_tags"
+TAGGER_METADATA_KEY = b"euterpe.pos_tagger"
+MODEL_METADATA_KEY = b"euterpe.pos_model"
+VOCAB_METADATA_KEY = b"euterpe.vocab"
+
+# Columnas del formato anterior
+LEGACY_POS_COLUMNS = ["pos_spacy", "pos_nltk"]
+
+
+def _list_array(values: list, value_type: pa.DataType) -> pa.ListArray:
+    """
+    Lista de arrays/listas (o None) -> ListArray, armando offsets y valores
+    de una sola vez.
+    """
+    lengths = np.array([0 if v is None else len(v) for v in values], dtype=np.int32)
+    offsets = np.zeros(len(values) + 1, dtype=np.int32)
+    np.cumsum(lengths, out=offsets[1:])
+
+    present = [np.asarray(v) for v in values if v is not None and len(v)]
+    flat = pa.array(np.concatenate(present) if present else [], type=value_type)
+    mask = pa.array([v is None for v in values], type=pa.bool_())
+    return pa.ListArray.from_arrays(pa.array(offsets), flat, mask=mask)
+
+
+def parquet_options(columns: list[str]) -> dict:
+    """
+    Opciones de escritura: zstd; diccionario de parquet para la metadata y
+    `pos_codes` (pocos valores distintos), BYTE_STREAM_SPLIT para los ids.
+    """
+    ids = [c for c in columns if c in (TOKEN_IDS_COL, TOKENS_COL)]
+    return {
+        "compression": "zstd",
+        "use_dictionary": [c for c in columns if c not in ids and c not in (POS_CODES_COL, TOKEN_HASH_COL)]
+        + [f"{POS_CODES_COL}.list.element"],
+        "column_encoding": {f"{TOKEN_IDS_COL}.list.element": "BYTE_STREAM_SPLIT"} if TOKEN_IDS_COL in ids else None,
+    }
+
+
+def encode_tags(
+    tag_lists: list,
+    tags: list[str] = (),
+    strict: bool = False,
+) -> tuple[list[np.ndarray | None], list[str]]:
+    """
+    Listas de tags (strings) -> arrays uint8 de índices en el diccionario.
+
+    El diccionario es `tags` más los tags que aparezcan y no estén (ordenado);
+    con `strict=True` un tag que no esté en `tags` es un error (escritura por
+    batches, donde el diccionario ya quedó fijo en el esquema).
+    """
+    present = [np.asarray(t, dtype=object) for t in tag_lists if t is not None]
+    flat = np.concatenate(present) if present else np.array([], dtype=object)
+
+    # Una sola pasada de hash; después se remapea a índices del diccionario
+    local_codes, uniques = pd.factorize(flat)
+    if (local_codes < 0).any():
+        raise ValueError("Missing tag (None) inside a tag list")
+    unknown = set(uniques) - set(tags)
+    if unknown and strict:
+        raise ValueError(f"Tags not in dictionary: {sorted(unknown)}")
+    tags = list(tags) if strict else sorted(set(tags) | unknown)
+    if len(tags) > 256:
+        raise ValueError(f"Tag dictionary too large for uint8: {len(tags)} tags")
+
+    index = {tag: i for i, tag in enumerate(tags)}
+    remap = np.array([index[tag] for tag in uniques], dtype=np.uint8)
+    flat = remap[local_codes]
+    out, start = [], 0
+    for t in tag_lists:
+        if t is None:
+            out.append(None)
+        else:
+            out.append(flat[start:start + len(t)])
+            start += len(t)
+    return out, tags
+
+
+def _tags_metadata(tags: list[str], tagger: str, model: str) -> dict[bytes, bytes]:
+    return {
+        TAGS_METADATA_KEY: json.dumps(list(tags)).encode("utf-8"),
+        TAGGER_METADATA_KEY: tagger.encode("utf-8"),
+        MODEL_METADATA_KEY: model.encode("utf-8"),
+    }
+
+
+def vocab_metadata(vocab_tokens) -> dict[bytes, bytes]:
+    """
+    Metadata con el tamaño y la huella del vocabulario de los `token_ids`.
+    """
+    value = {"size": len(vocab_tokens), "fingerprint": fingerprint(vocab_tokens)}
+    return {VOCAB_METADATA_KEY: json.dumps(value).encode("utf-8")}
+
+
+def _vocab_tokens(vocab_path: Path) -> np.ndarray:
+    return pq.read_table(vocab_path).sort_by("token_id").column("token").to_numpy(zero_copy_only=False)
+
+
+def check_vocabulary(path: Path, vocab_tokens) -> None:
+    """
+    Verifica que los `token_ids` de `path` se decodifiquen con `vocab_tokens`
+    (tokens en orden de id). Los parquet escritos antes de guardar la huella
+    no se pueden verificar: solo se avisa.
+    """
+    metadata = pq.read_metadata(path).metadata or {}
+    if VOCAB_METADATA_KEY not in metadata:
+        print(f"{path.name}: sin huella del vocabulario, no se puede verificar que los token_ids coincidan")
+        return
+    expected = json.loads(metadata[VOCAB_METADATA_KEY])
+    size = expected["size"]
+    if len(vocab_tokens) < size or fingerprint(vocab_tokens, size) != expected["fingerprint"]:
+        raise ValueError(
+            f"{path} was written with a different vocabulary (token_ids would decode to the wrong tokens); "
+            "re-run the POS tagger after tokenizing"
+        )
+
+
+def token_hash(tokens, line_lengths=None) -> int | None:
+    """
+    Hash (uint64) de una secuencia de tokens; None o vacía -> None.
+    Depende solo de los strings, no de los ids del vocabulario (que cambian
+    entre corridas del paso 6). Con `line_lengths` (tagging por líneas)
+    también cuentan los cortes de línea.
+    """
+    if tokens is None or (isinstance(tokens, float) and pd.isna(tokens)) or len(tokens) == 0:
+        return None
+    data = "\x1f".join(tokens)
+    if line_lengths is not None and not (isinstance(line_lengths, float) and pd.isna(line_lengths)):
+        data += "\x1e" + ",".join(str(n) for n in line_lengths)
+    return int.from_bytes(hashlib.blake2b(data.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def token_hashes(token_lists, line_lengths=None) -> list[int | None]:
+    if line_lengths is None:
+        return [token_hash(t) for t in token_lists]
+    return [token_hash(t, n) for t, n in zip(token_lists, line_lengths)]
+
+
+def write_pos(
+    path: Path,
+    meta: pd.DataFrame,
+    tag_lists: list,
+    tagger: str,
+    tags: list[str] = (),
+    token_ids: pa.ChunkedArray | pa.Array | list | None = None,
+    tokens: list | None = None,
+    hashes: list[int | None] | None = None,
+    model: str = "",
+    vocab_path: Path = LYRICS_VOCAB_PARQUET,
+) -> pa.Table:
+    """
+    Escribe el parquet de POS: columnas de `meta` (year, rank...), `token_ids`
+    (o `tokens`), `pos_codes` y `token_hash` (si se pasan `hashes`).
+    `tag_lists[i]` son los tags de la canción i (None si no tiene tokens),
+    alineados 1:1 con sus tokens. `tags`: tags conocidos del tagger (el
+    diccionario se completa con los que aparezcan). `model`: nombre y
+    versión del modelo, para `previous_tags`. `vocab_path`: vocabulario de
+    los `token_ids` (se guarda su huella).
+    """
+    if (token_ids is None) == (tokens is None):
+        raise ValueError("Pass exactly one of token_ids or tokens")
+
+    codes, tags = encode_tags(tag_lists, tags)
+
+    table = pa.Table.from_pandas(meta, preserve_index=False)
+    if isinstance(token_ids, (pa.Array, pa.ChunkedArray)):
+        table = table.append_column(TOKEN_IDS_COL, token_ids.cast(pa.list_(pa.int32())))
+    elif token_ids is not None:
+        table = table.append_column(TOKEN_IDS_COL, _list_array(list(token_ids), pa.int32()))
+    else:
+        table = table.append_column(TOKENS_COL, _list_array(tokens, pa.string()))
+    table = table.append_column(POS_CODES_COL, _list_array(codes, pa.uint8()))
+    if hashes is not None:
+        table = table.append_column(TOKEN_HASH_COL, pa.array(hashes, type=pa.uint64()))
+    metadata = {**(table.schema.metadata or {}), **_tags_metadata(tags, tagger, model)}
+    if token_ids is not None:
+        metadata.update(vocab_metadata(_vocab_tokens(vocab_path)))
+    table = table.replace_schema_metadata(metadata)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, path, **parquet_options(table.column_names))
+    return table
+
+
+def pos_schema(meta_schema: pa.Schema, tags: list[str], tagger: str, model: str = "") -> pa.Schema:
+    """
+    Esquema del formato columnar con `token_ids`, `token_hash` y diccionario
+    fijo `tags`, para escribir por batches (modo pipelined). El vocabulario
+    recién se conoce al final: agregar `vocab_metadata` antes de cerrar el
+    writer (`ParquetWriter.add_key_value_metadata`).
+    """
+    return (
+        meta_schema.append(pa.field(TOKEN_IDS_COL, pa.list_(pa.int32())))
+        .append(pa.field(POS_CODES_COL, pa.list_(pa.uint8())))
+        .append(pa.field(TOKEN_HASH_COL, pa.uint64()))
+        .with_metadata(_tags_metadata(tags, tagger, model))
+    )
+
+
+def pos_record_batch(
+    meta: pd.DataFrame,
+    token_ids: list,
+    tag_lists: list,
+    hashes: list[int | None],
+    schema: pa.Schema,
+) -> pa.RecordBatch:
+    """
+    Un batch con el esquema de `pos_schema` (tags fuera del diccionario -> error).
+    """
+    generated = (TOKEN_IDS_COL, POS_CODES_COL, TOKEN_HASH_COL)
+    meta_schema = pa.schema([f for f in schema if f.name not in generated])
+    batch = pa.RecordBatch.from_pandas(
+        meta.reindex(columns=meta_schema.names), schema=meta_schema, preserve_index=False
+    )
+    codes, _ = encode_tags(tag_lists, json.loads(schema.metadata[TAGS_METADATA_KEY]), strict=True)
+    return pa.RecordBatch.from_arrays(
+        batch.columns + [
+            _list_array(token_ids, pa.int32()),
+            _list_array(codes, pa.uint8()),
+            pa.array(hashes, type=pa.uint64()),
+        ],
+        schema=schema,
+    )
+
+
+def tag_dictionary(path: Path) -> list[str]:
+    """
+    Diccionario de tags del parquet (`pos_codes` son índices en esta lista).
+    """
+    metadata = pq.read_schema(path).metadata or {}
+    return json.loads(metadata[TAGS_METADATA_KEY])
+
+
+def previous_tags(path: Path, model: str) -> tuple[dict[int, list[str]], dict[int, list[str]] | None]:
+    """
+    Tags ya calculados en `path` por hash de canción: ({hash: tags}, {hash:
+    tokens} si el archivo guarda `tokens`, si no None). Vacío si el archivo
+    no existe, es del formato anterior o se etiquetó con otro modelo.
+    """
+    if not path.exists():
+        return {}, None
+
+    schema = pq.read_schema(path)
+    metadata = schema.metadata or {}
+    if TOKEN_HASH_COL not in schema.names or POS_CODES_COL not in schema.names:
+        print(f"{path.name}: sin hashes por canción, se etiqueta todo")
+        return {}, None
+    previous_model = metadata.get(MODEL_METADATA_KEY, b"").decode("utf-8")
+    if previous_model != model:
+        print(f"{path.name}: etiquetado con otro modelo ({previous_model or '?'}), se etiqueta todo")
+        return {}, None
+
+    with_tokens = TOKENS_COL in schema.names
+    columns = [TOKEN_HASH_COL, POS_CODES_COL] + ([TOKENS_COL] if with_tokens else [])
+    table = pq.read_table(path, columns=columns)
+    table = table.filter(pc.is_valid(table.column(POS_CODES_COL)))
+
+    hashes = table.column(TOKEN_HASH_COL).to_pylist()
+    codes = table.column(POS_CODES_COL).combine_chunks()
+    # Un solo take sobre todos los tags y después un corte por canción
+    tags = np.asarray(json.loads(metadata[TAGS_METADATA_KEY]), dtype=object)[codes.flatten().to_numpy()]
+    bounds = codes.offsets.to_numpy()[1:-1] - codes.offsets[0].as_py()
+    tags_by_hash = dict(zip(hashes, (t.tolist() for t in np.split(tags, bounds))))
+
+    tokens_by_hash = None
+    if with_tokens:
+        tokens = table.column(TOKENS_COL).combine_chunks()
+        flat = tokens.flatten().to_numpy(zero_copy_only=False)
+        bounds = tokens.offsets.to_numpy()[1:-1] - tokens.offsets[0].as_py()
+        tokens_by_hash = dict(zip(hashes, (t.tolist() for t in np.split(flat, bounds))))
+
+    tags_by_hash.pop(None, None)
+    if tokens_by_hash is not None:
+        tokens_by_hash.pop(None, None)
+    return tags_by_hash, tokens_by_hash
+
+
+def _legacy_column(names: list[str]) -> str | None:
+    return next((c for c in LEGACY_POS_COLUMNS if c in names), None)
+
+
+def read_pos(
+    path: Path,
+    columns: list[str] | None = None,
+    vocab_path: Path = LYRICS_VOCAB_PARQUET,
+) -> pd.DataFrame:
+    """
+    Una fila por canción: `columns` (por defecto todas las de metadata),
+    `token_ids` o `tokens`, y `pos_codes`. Decodificar con `tag_dictionary`
+    y el vocabulario de `vocab_path` (se verifica que sea el de los ids),
+    o usar `pos_tokens`.
+    """
+    names = pq.read_schema(path).names
+    if POS_CODES_COL not in names:
+        raise ValueError(f"{path} uses the legacy [token, tag] format; use pos_tokens()")
+    if TOKEN_IDS_COL in names:
+        check_vocabulary(path, _vocab_tokens(vocab_path))
+
+    lists = [c for c in (TOKEN_IDS_COL, TOKENS_COL, POS_CODES_COL) if c in names]
+    if columns is not None:
+        columns = [c for c in columns if c not in lists] + lists
+    return pq.read_table(path, columns=columns).to_pandas()
+
+
+def _legacy_tokens(path: Path, columns: list[str]) -> pd.DataFrame:
+    names = pq.read_schema(path).names
+    pos_col = _legacy_column(names)
+    df = pq.read_table(path, columns=columns + [pos_col]).to_pandas()
+
+    rows = []
+    for row, seq in enumerate(df[pos_col]):
+        if seq is None or not hasattr(seq, "__len__"):
+            continue
+        for it in seq:
+            if it is not None and len(it) >= 2 and it[1] is not None:
+                rows.append((row, it[0], it[1]))
+
+    tok = pd.DataFrame(rows, columns=["row", "token", "pos"])
+    return tok.join(df[columns], on="row")[["row"] + columns + ["token", "pos"]]
+
+
+def pos_tokens(
+    path: Path,
+    columns: list[str] | None = None,
+    vocab_path: Path = LYRICS_VOCAB_PARQUET,
+) -> pd.DataFrame:
+    """
+    Tabla a nivel token: `row` (fila de la canción en el parquet), las
+    `columns` de esa canción (por defecto year), `token` y `pos` (strings).
+    """
+    columns = ["year"] if columns is None else list(columns)
+    names = pq.read_schema(path).names
+    if POS_CODES_COL not in names:
+        return _legacy_tokens(path, columns)
+
+    token_col = TOKEN_IDS_COL if TOKEN_IDS_COL in names else TOKENS_COL
+    table = pq.read_table(path, columns=columns + [token_col, POS_CODES_COL])
+
+    codes = table.column(POS_CODES_COL).combine_chunks()
+    # Solo las canciones con tags (las nulas no aportan tokens)
+    rows = pc.list_parent_indices(codes).to_numpy()
+    pos = np.asarray(tag_dictionary(path), dtype=object)[codes.flatten().to_numpy()]
+
+    tokens = table.column(token_col).combine_chunks()
+    tokens = tokens.take(pa.array(np.flatnonzero(codes.is_valid().to_numpy(zero_copy_only=False))))
+    if token_col == TOKEN_IDS_COL:
+        vocab = _vocab_tokens(vocab_path)
+        check_vocabulary(path, vocab)
+        token = vocab[tokens.flatten().to_numpy()]
+    else:
+        token = tokens.flatten().to_numpy(zero_copy_only=False)
+
+    out = {"row": rows}
+    for c in columns:
+        out[c] = table.column(c).to_numpy()[rows]
+    out["token"] = token
+    out["pos"] = pos
+    return pd.DataFrame(out)
@@ -0,0 +1,83 @@
+"""
+POS tagging por líneas con cache de segmentos.
+
+Las letras repiten mucho: estribillos y ganchos aparecen varias veces en
+la misma canción y en otras. Con `line_lengths` (paso 6) cada canción se
+parte en sus líneas; cada secuencia de tokens distinta (la clave es la
+tupla de tokens, ya normalizados por el tokenizador) se etiqueta una sola
+vez y sus tags se reutilizan en todas las apariciones.
+
+Las líneas vienen del paso 3 con `keep_lines=True` (`--line-cache` en
+src.start). Las letras traducidas en el paso 5 llegan en una sola línea
+(la traducción trabaja por chunks de texto plano) y cuentan como una.
+
+El tagger ve cada línea sin el contexto de las vecinas, así que los tags
+de los bordes pueden diferir de etiquetar la canción entera.
+`src.benchmarks.bench_line_cache` mide cuánto, pero esa diferencia
+todavía no está medida con los modelos reales: por eso el modo es opcional.
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import pandas as pd
+
+
+def tag_by_lines(
+    token_lists: list,
+    line_lengths: list,
+    tag: Callable[[list[list[str]]], list[list[str] | None]],
+) -> tuple[list[list[str] | None], dict]:
+    """
+    Tags de cada canción de `token_lists`, etiquetando con `tag` cada línea
+    distinta una sola vez. `line_lengths[i]` son los tokens por línea de la
+    canción i (None -> la canción entera es una línea). Devuelve también
+    las estadísticas de la cache (líneas, distintas, hit rate).
+    """
+    index: dict[tuple, int] = {}
+    segments: list[tuple] = []
+    songs: list[list[int] | None] = []
+
+    for tokens, lengths in zip(token_lists, line_lengths):
+        if tokens is None or (isinstance(tokens, float) and pd.isna(tokens)) or len(tokens) == 0:
+            songs.append(None)
+            continue
+        if lengths is None or (isinstance(lengths, float) and pd.isna(lengths)) or len(lengths) == 0:
+            lengths = [len(tokens)]
+        if sum(lengths) != len(tokens):
+            raise ValueError(f"line_lengths sum to {sum(lengths)} for {len(tokens)} tokens")
+
+        ids = []
+        start = 0
+        for n in lengths:
+            key = tuple(tokens[start:start + n])
+            start += n
+            i = index.get(key)
+            if i is None:
+                i = index[key] = len(segments)
+                segments.append(key)
+            ids.append(i)
+        songs.append(ids)
+
+    tagged = tag([list(s) for s in segments]) if segments else []
+
+    results = []
+    for ids in songs:
+        results.append(None if ids is None else [t for i in ids for t in tagged[i] or ()])
+
+    total = sum(len(ids) for ids in songs if ids is not None)
+    total_tokens = sum(len(r) for r in results if r is not None)
+    tagged_tokens = sum(len(s) for s in segments)
+    stats = {
+        "lines": total,
+        "distinct": len(segments),
+        "hit_rate": 1 - len(segments) / total if total else 0.0,
+        # Tokens que no pasaron por el tagger (las líneas repetidas suelen ser cortas)
+        "token_hit_rate": 1 - tagged_tokens / total_tokens if total_tokens else 0.0,
+    }
+    print(
+        f"Cache de líneas: {stats['lines']} líneas, {stats['distinct']} distintas "
+        f"(hit rate {stats['hit_rate']:.1%}; {stats['token_hit_rate']:.1%} de los tokens)"
+    )
+    return results, stats
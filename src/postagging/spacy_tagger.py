@@ -2,53 +2,225 @@
 spaCy POS Tagger.
 
 Lee tokens desde Parquet (processed) y genera POS tags con spaCy.
-Guarda resultado en data/results.
+Guarda resultado en data/results, en el formato columnar de
+`pos_format` (ids de token + códigos uint8 de UPOS).
+
+Por defecto los tokens del paso 6 entran a spaCy como `Doc(words=...)`
+ya armados: spaCy no vuelve a tokenizar, así que cada tag corresponde
+exactamente a un token de `lyrics`. Solo corren los componentes que
+necesita el POS (POS_COMPONENTS), `nlp.pipe` puede repartirse en
+`n_process` procesos y los tags se leen de cada Doc con `to_array(POS)`
+en lugar de recorrer los tokens.
+
+Con `pretokenized=False` se usa el modo anterior (unir tokens con espacios
+y dejar que spaCy tokenice el texto).
+
+Como en el tagger NLTK, la corrida es incremental: solo pasan por spaCy
+las canciones cuyo hash de tokens no está en el parquet anterior
+etiquetado con el mismo modelo y modo (`model_name`), y con
+`line_cache=True` se etiqueta cada línea distinta una sola vez (`segments`).
 """
 
 from __future__ import annotations
 from pathlib import Path
+
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
+
+from src.postagging.pos_format import previous_tags, token_hashes, write_pos
+from src.postagging.segments import tag_by_lines
+from src.preprocess.lyrics_tokenize import LINE_LENGTHS_COL
+from src.preprocess.vocabulary import TOKEN_IDS_COL, read_tokenized
+from src.utils.config import LYRICS_TOKENIZED_PARQUET, LYRICS_VOCAB_PARQUET, POS_SPACY_PARQUET
+from src.utils.instrumentation import progress
+
+
+INPUT_FILE = LYRICS_TOKENIZED_PARQUET
+OUTPUT_FILE = POS_SPACY_PARQUET
+
+# Lo que hace falta para `token.pos_`: tagger + attribute_ruler (mapea tag -> POS)
+# y la capa que comparten (tok2vec / transformer). `morphologizer` en modelos
+# de otros idiomas.
+POS_COMPONENTS = ["tok2vec", "transformer", "tagger", "morphologizer", "attribute_ruler"]
 
-from src.utils.config import PROCESSED_DATA_PATH, RESULTS_DATA_PATH
+# Componentes que ni se cargan (no aportan al POS)
+EXCLUDED_COMPONENTS = ["parser", "ner", "lemmatizer", "senter", "entity_ruler", "textcat"]
 
 
-INPUT_FILE = PROCESSED_DATA_PATH / "songs_with_lyrics_tokenized.parquet"
-OUTPUT_FILE = RESULTS_DATA_PATH / "pos_spacy.parquet"
+def load_pos_model(spacy_model: str = "en_core_web_sm"):
+    """
+    Carga `spacy_model` con solo los componentes de POS_COMPONENTS activos.
+    """
+    import spacy  # lazy import
+
+    nlp = spacy.load(spacy_model, exclude=EXCLUDED_COMPONENTS)
+    nlp.select_pipes(enable=[name for name in nlp.pipe_names if name in POS_COMPONENTS])
+    return nlp
+
+
+def _pos_lookup() -> np.ndarray:
+    """
+    Array id de POS (spacy.parts_of_speech) -> nombre ("" = sin tag).
+    """
+    from spacy.parts_of_speech import IDS
+
+    lookup = np.full(max(IDS.values()) + 1, "", dtype=object)
+    for name, pos_id in IDS.items():
+        lookup[pos_id] = name
+    return lookup
+
+
+def model_name(nlp, pretokenized: bool = True, line_cache: bool = False) -> str:
+    """
+    Modelo, versión y modo (se guarda en el parquet; si cambia, se re-etiqueta todo).
+    """
+    import spacy
+
+    meta = nlp.meta
+    mode = ("doc" if pretokenized else "texto") + (", líneas" if line_cache else "")
+    return f"spacy {spacy.__version__} {meta.get('lang')}_{meta.get('name')} {meta.get('version')} ({mode})"
+
+
+def upos_tags() -> list[str]:
+    """
+    Tags UPOS de spaCy (diccionario de `pos_codes`).
+    """
+    from spacy.parts_of_speech import IDS
+
+    return sorted(name for name in IDS if name)
+
+
+def tag_pretokenized(
+    nlp,
+    token_lists: list,
+    batch_size: int = 256,
+    n_process: int = 1,
+) -> list[list[str] | None]:
+    """
+    POS de cada lista de tokens sin re-tokenizar: un tag por token de
+    entrada, en el mismo orden. None o vacío -> None.
+    """
+    from spacy.attrs import POS
+    from spacy.tokens import Doc
+
+    lookup = _pos_lookup()
+    words = [None if t is None or len(t) == 0 else [str(w) for w in t] for t in token_lists]
+    present = [w for w in words if w is not None]
+
+    docs = nlp.pipe(
+        (Doc(nlp.vocab, words=w) for w in present), batch_size=batch_size, n_process=n_process
+    )
+    tags = (lookup[doc.to_array(POS)] for doc in progress(docs, total=len(present), desc="spaCy"))
+
+    results = []
+    for w in words:
+        if w is None:
+            results.append(None)
+            continue
+        doc_tags = next(tags)
+        if len(doc_tags) != len(w):
+            raise ValueError(f"spaCy returned {len(doc_tags)} tags for {len(w)} tokens")
+        results.append(doc_tags.tolist())
+    return results
+
+
+def tag_texts(nlp, texts: list[str], batch_size: int = 128) -> list[list[tuple[str, str]] | None]:
+    """
+    Modo anterior: spaCy tokeniza cada texto (sus tokens pueden no coincidir
+    con los de `lyrics`).
+    """
+    results = []
+    for doc in progress(nlp.pipe(texts, batch_size=batch_size), total=len(texts), desc="spaCy"):
+        if not doc.text.strip():
+            results.append(None)
+        else:
+            results.append([(token.text, token.pos_) for token in doc])
+    return results
 
 
 def run(
     input_path: Path = INPUT_FILE,
     output_path: Path = OUTPUT_FILE,
     spacy_model: str = "en_core_web_sm",
-    batch_size: int = 128
+    batch_size: int = 256,
+    n_process: int = 1,
+    pretokenized: bool = True,
+    vocab_path: Path = LYRICS_VOCAB_PARQUET,
+    incremental: bool = True,
+    line_cache: bool = False,
 ) -> pd.DataFrame:
-    import spacy  # lazy import
-
-    df = pd.read_parquet(input_path)
+    """
+    Lee el parquet tokenizado, aplica POS tagging con spaCy y guarda el
+    parquet de POS. Devuelve una fila por canción con `pos_spacy` (lista
+    de tags, alineada con `lyrics` en modo `pretokenized`). Con
+    `incremental=True` reutiliza los tags de `output_path` de las canciones
+    cuya secuencia de tokens no cambió. Con `line_cache=True` (solo modo
+    `pretokenized`) etiqueta cada línea distinta una vez.
+    """
+    df = read_tokenized(input_path, vocab_path)
 
     required = {"year", "rank", "artist", "song", "lyrics"}
     missing = required - set(df.columns)
     if missing:
         raise ValueError(f"Missing columns: {sorted(missing)}")
 
-    nlp = spacy.load(spacy_model, disable=["ner", "parser", "lemmatizer"])
-    # usamos tagger/attribute_ruler si aplica
-    # Nota: spaCy POS opera sobre texto, no tokens sueltos, así que unimos tokens con espacio.
-
-    texts = df["lyrics"].apply(lambda t: "" if t is None else " ".join(t)).tolist()
-
-    pos_spacy = []
-    for doc in nlp.pipe(texts, batch_size=batch_size):
-        if not doc.text.strip():
-            pos_spacy.append(None)
-        else:
-            pos_spacy.append([(token.text, token.pos_) for token in doc])
-
-    out = df.copy()
-    out["pos_spacy"] = pos_spacy
-
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    out.to_parquet(output_path, index=False)
+    if line_cache and not pretokenized:
+        raise ValueError("line_cache requires pretokenized=True")
+
+    lines = None
+    if line_cache:
+        if LINE_LENGTHS_COL not in df.columns:
+            print(f"{input_path.name} no tiene {LINE_LENGTHS_COL}: cada canción cuenta como una línea")
+        lines = df[LINE_LENGTHS_COL] if LINE_LENGTHS_COL in df.columns else pd.Series(None, index=df.index)
+
+    nlp = load_pos_model(spacy_model)
+    model = model_name(nlp, pretokenized, line_cache)
+
+    hashes = token_hashes(df["lyrics"], lines)
+    known, known_tokens = previous_tags(output_path, model) if incremental else ({}, None)
+
+    # Cada secuencia de tokens distinta y sin tags previos pasa una sola vez por spaCy
+    first: dict[int, int] = {}
+    for i, h in enumerate(hashes):
+        if h is not None and h not in known:
+            first.setdefault(h, i)
+    reused = sum(h in known for h in hashes)
+    print(f"POS spaCy: {len(first)} secuencias a etiquetar, {reused} canciones del resultado anterior")
+    token_lists = [df["lyrics"].iat[i] for i in first.values()]
+
+    if line_cache:
+        tagged, _ = tag_by_lines(
+            token_lists, [lines.iat[i] for i in first.values()],
+            lambda segments: tag_pretokenized(nlp, segments, batch_size=batch_size, n_process=n_process),
+        )
+        known.update(zip(first, tagged))
+    elif pretokenized:
+        tagged = tag_pretokenized(nlp, token_lists, batch_size=batch_size, n_process=n_process)
+        known.update(zip(first, tagged))
+    else:
+        # Nota: spaCy POS opera sobre texto, no tokens sueltos, así que unimos tokens con espacio.
+        tagged = tag_texts(nlp, [" ".join(t) for t in token_lists], batch_size=batch_size)
+        # Los tokens de spaCy no son los de `lyrics`: se guardan como strings
+        known_tokens = known_tokens or {}
+        for h, p in zip(first, tagged):
+            known[h] = None if p is None else [t for _, t in p]
+            known_tokens[h] = None if p is None else [w for w, _ in p]
+
+    # `df` se leyó acá: no hace falta copiarlo
+    out = df
+    out["pos_spacy"] = [known.get(h) for h in hashes]
+
+    meta = out.drop(columns=["lyrics", "pos_spacy", LINE_LENGTHS_COL], errors="ignore")
+    write_args = dict(tags=upos_tags(), hashes=hashes, model=model)
+    if pretokenized and TOKEN_IDS_COL in pq.read_schema(input_path).names:
+        token_ids = pq.read_table(input_path, columns=[TOKEN_IDS_COL]).column(TOKEN_IDS_COL)
+        write_pos(
+            output_path, meta, out["pos_spacy"], "spacy", token_ids=token_ids, vocab_path=vocab_path, **write_args
+        )
+    else:
+        tokens = list(out["lyrics"]) if pretokenized else [known_tokens.get(h) for h in hashes]
+        write_pos(output_path, meta, out["pos_spacy"], "spacy", tokens=tokens, **write_args)
     print(f"Saved spaCy POS to: {output_path}")
 
     return out
@@ -3,18 +3,66 @@ Language Detection (offline using langdetect).
 
 Recibe DataFrame limpio y devuelve DataFrame
 con columna `language` agregada.
+
+- Cada letra distinta se detecta una sola vez y el resultado se guarda
+  en una cache persistente (hash del texto + tamaño de muestra).
+- Con `workers > 1` la detección corre en un pool de procesos; cada
+  worker fija `DetectorFactory.seed` para que el resultado sea el mismo
+  que en serie.
+- Con `max_chars` se detecta sobre una muestra acotada del texto
+  (ventanas repartidas a lo largo de la letra) en lugar del texto completo.
 """
 
 from __future__ import annotations
 
+from functools import partial
+
 import pandas as pd
 from langdetect import detect, DetectorFactory
 
+from src.utils.helpers import stage_copy
+from src.utils.kv_cache import KeyValueCache, content_hash
+from src.utils.parallel import parallel_map
+
 # Hace el resultado determinístico
 DetectorFactory.seed = 42
 
+# Por debajo de esto no vale la pena levantar procesos
+MIN_PARALLEL_TEXTS = 200
+
+SAMPLE_WINDOWS = 4
+
+
+def _init_worker(seed: int = 42) -> None:
+    DetectorFactory.seed = seed
+
+
+def sample_text(text: str, max_chars: int, windows: int = SAMPLE_WINDOWS) -> str:
+    """
+    Devuelve como máximo `max_chars` caracteres de `text`: `windows` ventanas
+    repartidas uniformemente (inicio, medio, final), cortadas en espacios.
+    """
+    if len(text) <= max_chars:
+        return text
+
+    size = max_chars // windows
+    step = (len(text) - size) / max(windows - 1, 1)
+    parts = []
+
+    for i in range(windows):
+        start = int(i * step)
+        window = text[start:start + size]
+        # No cortar palabras a la mitad
+        if start > 0 and " " in window:
+            window = window[window.index(" ") + 1:]
+        if start + size < len(text) and " " in window:
+            window = window[:window.rindex(" ")]
+        parts.append(window)
 
-def detect_language(text: str) -> str | None:
+    return " ".join(parts)
+
+
+def detect_language(text: str, max_chars: int | None = None) -> str | None:
     if pd.isna(text):
         return None
 
@@ -24,13 +72,37 @@ def detect_language(text: str) -> str | None:
     if len(text) < 50:
         return None
 
+    if max_chars is not None:
+        text = sample_text(text, max_chars)
+
     try:
         return detect(text)
     except:
         return None
 
 
-def run(df: pd.DataFrame) -> pd.DataFrame:
+def detect_many(
+    texts: list[str],
+    workers: int | None = None,
+    max_chars: int | None = None,
+) -> list[str | None]:
+    """
+    Detecta el idioma de cada texto; en paralelo si hay suficientes textos.
+    """
+    func = partial(detect_language, max_chars=max_chars)
+    return parallel_map(
+        func, texts, workers=workers, min_items=MIN_PARALLEL_TEXTS, initializer=_init_worker,
+        desc="idioma",
+    )
+
+
+def run(
+    df: pd.DataFrame,
+    workers: int | None = None,
+    max_chars: int | None = None,
+    use_cache: bool = True,
+    cache: KeyValueCache | None = None,
+) -> pd.DataFrame:
     """
     Agrega columna `language` al DataFrame.
 
@@ -38,6 +110,14 @@ def run(df: pd.DataFrame) -> pd.DataFrame:
     ----------
     df : pd.DataFrame
         Debe contener columna `lyrics`.
+    workers : int | None
+        Procesos para la detección (None = todos los cores).
+    max_chars : int | None
+        Si se indica, detecta sobre una muestra de como máximo ese tamaño.
+    use_cache : bool
+        Usa/guarda resultados en la cache persistente por hash de la letra.
+    cache : KeyValueCache | None
+        Cache a usar; por defecto la tabla `language` en data/cache.
 
     Returns
     -------
@@ -47,7 +127,32 @@ def run(df: pd.DataFrame) -> pd.DataFrame:
     if "lyrics" not in df.columns:
         raise ValueError("Column 'lyrics' not found")
 
-    out = df.copy()
-    out["language"] = out["lyrics"].apply(detect_language)
+    if use_cache and cache is None:
+        cache = KeyValueCache("language")
+    elif not use_cache:
+        cache = None
+
+    out = stage_copy(df)
+
+    # Cada letra distinta se procesa una sola vez
+    codes, uniques = pd.factorize(out["lyrics"])
+    # Los saltos de línea (que conserva el cleaner) no cambian el idioma:
+    # se detecta sobre el texto en una línea, igual que antes, con la misma clave
+    texts = [" ".join(str(t).split()) for t in uniques]
+    keys = [content_hash("langdetect", max_chars, t) for t in texts]
+
+    found = cache.get_many(keys) if cache is not None else {}
+    todo = [i for i, key in enumerate(keys) if key not in found]
+
+    detected = detect_many([texts[i] for i in todo], workers=workers, max_chars=max_chars)
+    new = {keys[i]: lang for i, lang in zip(todo, detected)}
+    found.update(new)
+
+    if cache is not None:
+        cache.put_many(new)
+        cache.report()
+
+    languages = [found[key] for key in keys]
+    out["language"] = [languages[c] if c >= 0 else None for c in codes]
 
     return out
@@ -2,24 +2,33 @@
 Lyrics Tokenizer (in-memory).
 
 Recibe un DataFrame con lyrics (texto) y sobrescribe la columna `lyrics`
-con lista de tokens.
+con lista de tokens. La columna `line_lengths` guarda cuántos tokens tiene
+cada línea de la letra (las líneas sin tokens no cuentan; la suma es el
+largo de `lyrics`), para etiquetar por línea.
 
 Opcional:
-- Guarda un parquet tokenizado si se provee `output_path`.
+- Guarda un parquet tokenizado si se provee `output_path`. En disco cada
+  canción va como `token_ids` (list<int32>) más un vocabulario global en
+  `vocab_path` (ver `src.preprocess.vocabulary`; leer con `read_tokenized`).
 """
 
 from __future__ import annotations
 from pathlib import Path
 import re
+import numpy as np
 import pandas as pd
 
-from src.utils.config import PROCESSED_DATA_PATH
+from src.preprocess.vocabulary import TOKEN_IDS_COL, Vocabulary, encode_column, parquet_options
+from src.utils.config import LYRICS_TOKENIZED_PARQUET, LYRICS_VOCAB_PARQUET
+from src.utils.helpers import apply_unique, stage_copy
 
 
-OUTPUT_DEFAULT = PROCESSED_DATA_PATH / "songs_with_lyrics_tokenized.parquet"
+OUTPUT_DEFAULT = LYRICS_TOKENIZED_PARQUET
 
 _TOKEN_RE = re.compile(r"[A-Za-zÀ-ÿ0-9_]+")
 
+LINE_LENGTHS_COL = "line_lengths"
+
 
 def tokenize(text: str) -> list[str] | None:
     if pd.isna(text):
@@ -34,19 +43,47 @@ def tokenize(text: str) -> list[str] | None:
     return tokens if tokens else None
 
 
-def run(df: pd.DataFrame, output_path: Path | None = OUTPUT_DEFAULT) -> pd.DataFrame:
+def tokenize_lines(text: str) -> tuple[list[str], np.ndarray] | None:
+    """
+    Como `tokenize`, más la cantidad de tokens de cada línea (int32).
+    """
+    if pd.isna(text):
+        return None
+
+    tokens, lengths = [], []
+    for line in str(text).lower().splitlines():
+        found = _TOKEN_RE.findall(line)
+        if found:
+            tokens.extend(found)
+            lengths.append(len(found))
+
+    return (tokens, np.array(lengths, dtype=np.int32)) if tokens else None
+
+
+def run(
+    df: pd.DataFrame,
+    output_path: Path | None = OUTPUT_DEFAULT,
+    workers: int | None = 1,
+    vocab_path: Path = LYRICS_VOCAB_PARQUET,
+) -> pd.DataFrame:
     if not isinstance(df, pd.DataFrame):
         raise TypeError("run() expects a pandas DataFrame")
 
     if "lyrics" not in df.columns:
         raise ValueError("Column 'lyrics' not found")
 
-    out = df.copy()
-    out["lyrics"] = out["lyrics"].apply(tokenize)
+    out = stage_copy(df)
+    tokenized = apply_unique(out["lyrics"], tokenize_lines, workers=workers, desc="tokenización")
+    out["lyrics"] = [None if t is None else t[0] for t in tokenized]
+    out[LINE_LENGTHS_COL] = [None if t is None else t[1] for t in tokenized]
 
     if output_path is not None:
+        vocab = Vocabulary()
+        compact = out.drop(columns="lyrics").assign(**{TOKEN_IDS_COL: encode_column(out["lyrics"], vocab)})
+
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        out.to_parquet(output_path, index=False)
-        print(f"DataSet tokenizado y guardado en: {output_path}")
+        compact.to_parquet(output_path, index=False, **parquet_options(compact.columns))
+        vocab.save(vocab_path)
+        print(f"DataSet tokenizado y guardado en: {output_path} (vocabulario: {len(vocab)} tokens en {vocab_path})")
 
     return out
@@ -0,0 +1,392 @@
+"""
+Modo pipelined: fetch → clean → detect → translate → tokenize → tag en paralelo.
+
+En el modo normal cada paso espera a que el anterior termine con todo el
+corpus. Acá las filas pasan de una etapa a la siguiente en batches de
+`batch_size` a través de colas acotadas (`queue_size` batches), así que
+mientras se descargan letras ya se están limpiando, traduciendo y
+etiquetando las anteriores. El tiempo total se acerca al de la etapa más
+lenta (normalmente la descarga) en lugar de la suma de todas.
+
+- Descarga (`get_lyrics.run` con `on_rows`) y traducción: hilos (I/O).
+- Limpieza + idioma y tokenización + POS NLTK: pool de `workers` procesos,
+  con hasta `workers` batches en vuelo por etapa (el orden se conserva).
+- Escritura: hilo principal; el vocabulario se arma en un solo lugar.
+
+Si una etapa falla, las demás se detienen (la descarga deja de pedir
+letras y cancela las requests que no empezaron) y `run` relanza el error.
+
+Escribe lo mismo que los pasos 2–7: el CSV de letras (con su journal), el
+parquet traducido, el tokenizado (`token_ids`) con su vocabulario y el
+parquet de POS NLTK. Las filas quedan en el orden en que se resolvieron
+(primero las ya descargadas), no en el del chart. spaCy (paso 8) y la
+comparación (paso 9) siguen corriendo aparte sobre el tokenizado.
+
+Uso:
+    python -m src.preprocess.pipelined --workers 4 --fetch-workers 8
+    python -m src.preprocess.pipelined --no-tag
+"""
+
+from __future__ import annotations
+
+import argparse
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.cleaners.lyrics_text_cleaner import clean_frame
+from src.preprocess import detect_language, lyrics_tokenize, translate_to_english
+from src.postagging import pos_format
+from src.preprocess.streaming import TOKENIZED_SCHEMA, TRANSLATED_SCHEMA
+from src.preprocess.vocabulary import TOKEN_IDS_COL, Vocabulary, encode_column, parquet_options
+from src.scrapers import get_lyrics
+from src.utils.config import (
+    LYRICS_API_URL,
+    LYRICS_RAW_CSV,
+    LYRICS_TOKENIZED_PARQUET,
+    LYRICS_TRANSLATED_PARQUET,
+    LYRICS_VOCAB_PARQUET,
+    POS_NLTK_PARQUET,
+)
+from src.utils.kv_cache import KeyValueCache
+from src.utils.parallel import resolve_workers
+
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_QUEUE_SIZE = 4
+
+# Columnas de cada canción en el parquet de POS (más token_ids, pos_codes y token_hash)
+POS_META_SCHEMA = pa.schema(
+    [f for f in TOKENIZED_SCHEMA if f.name not in (TOKEN_IDS_COL, lyrics_tokenize.LINE_LENGTHS_COL)]
+)
+
+# Marca de fin de stream en las colas
+_DONE = object()
+
+# Cache de idioma por proceso worker (se abre una vez, no por batch)
+_language_cache: KeyValueCache | None = None
+
+
+class _Aborted(Exception):
+    """Otra etapa falló: hay que dejar de producir y consumir."""
+
+
+def _put(q: queue.Queue, item: Any, abort: threading.Event) -> None:
+    while True:
+        if abort.is_set():
+            raise _Aborted
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _get(q: queue.Queue, abort: threading.Event) -> Any:
+    while True:
+        if abort.is_set():
+            raise _Aborted
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+
+
+def _timed(func: Callable[[Any], Any], item: Any) -> tuple[Any, float]:
+    start = time.perf_counter()
+    return func(item), time.perf_counter() - start
+
+
+# -------------------------------------------------
+# Etapas CPU (corren en los procesos del pool)
+# -------------------------------------------------
+
+def clean_and_detect(batch: pd.DataFrame) -> pd.DataFrame:
+    global _language_cache
+    if _language_cache is None:
+        _language_cache = KeyValueCache("language")
+
+    df = clean_frame(batch)
+    return detect_language.run(df, workers=1, cache=_language_cache)
+
+
+def tokenize_and_tag(batch: pd.DataFrame, tag: bool = True) -> pd.DataFrame:
+    df = lyrics_tokenize.run(batch, output_path=None, workers=1)
+    if tag:
+        from src.postagging.nltk_tagger import tag_many
+
+        df["pos_nltk"] = tag_many(df["lyrics"])
+    return df
+
+
+# -------------------------------------------------
+# Runner
+# -------------------------------------------------
+
+class _StageThread(threading.Thread):
+    """
+    Lee batches de `inbox`, aplica `func` y deja el resultado en `outbox`.
+    Con `pool`, `func` corre en el pool con hasta `in_flight` batches a la
+    vez; los resultados salen en el orden de entrada.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        inbox: queue.Queue,
+        outbox: queue.Queue,
+        abort: threading.Event,
+        pool: Executor | None = None,
+        in_flight: int = 1,
+    ):
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.abort = abort
+        self.pool = pool
+        self.in_flight = max(1, in_flight)
+        self.busy = 0.0
+        self.batches = 0
+        self.error: BaseException | None = None
+
+    def _emit(self, done: tuple[Any, float]) -> None:
+        result, seconds = done
+        self.busy += seconds
+        self.batches += 1
+        _put(self.outbox, result, self.abort)
+
+    def run(self) -> None:
+        try:
+            pending = deque()
+            while True:
+                item = _get(self.inbox, self.abort)
+                if item is _DONE:
+                    break
+                if self.pool is None:
+                    self._emit(_timed(self.func, item))
+                    continue
+
+                pending.append(self.pool.submit(_timed, self.func, item))
+                while len(pending) >= self.in_flight:
+                    self._emit(pending.popleft().result())
+
+            while pending:
+                self._emit(pending.popleft().result())
+            _put(self.outbox, _DONE, self.abort)
+        except _Aborted:
+            pass
+        except BaseException as exc:
+            self.error = exc
+            self.abort.set()
+
+
+class _FetchThread(threading.Thread):
+    """
+    Corre `get_lyrics.run` y pone en `outbox` las filas a medida que se
+    resuelven, en batches de `batch_size`. `busy` no cuenta el tiempo
+    bloqueado esperando lugar en la cola.
+    """
+
+    def __init__(self, df: pd.DataFrame, outbox: queue.Queue, abort: threading.Event, batch_size: int, **kwargs):
+        super().__init__(name="fetch", daemon=True)
+        self.df = df
+        self.outbox = outbox
+        self.abort = abort
+        self.batch_size = batch_size
+        self.kwargs = kwargs
+        self.busy = 0.0
+        self.batches = 0
+        self.blocked = 0.0
+        self.error: BaseException | None = None
+
+    def _on_rows(self, rows: pd.DataFrame) -> None:
+        for start in range(0, len(rows), self.batch_size):
+            self.batches += 1
+            t0 = time.perf_counter()
+            _put(self.outbox, rows.iloc[start:start + self.batch_size], self.abort)
+            self.blocked += time.perf_counter() - t0
+
+    def run(self) -> None:
+        start = time.perf_counter()
+        try:
+            # `cancel`: si otra etapa falla, no esperar al próximo checkpoint
+            get_lyrics.run(
+                self.df, batch_save_every=self.batch_size, on_rows=self._on_rows, cancel=self.abort, **self.kwargs
+            )
+            _put(self.outbox, _DONE, self.abort)
+        except _Aborted:
+            pass
+        except BaseException as exc:
+            self.error = exc
+            self.abort.set()
+        finally:
+            self.busy = time.perf_counter() - start - self.blocked
+
+
+def run(
+    df: pd.DataFrame,
+    lyrics_csv: Path | None = LYRICS_RAW_CSV,
+    output_path: Path = LYRICS_TOKENIZED_PARQUET,
+    translated_path: Path | None = LYRICS_TRANSLATED_PARQUET,
+    vocab_path: Path = LYRICS_VOCAB_PARQUET,
+    pos_path: Path | None = POS_NLTK_PARQUET,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    workers: int | None = None,
+    fetch_workers: int = 8,
+    rate_limit: float | None = None,
+    base_url: str = LYRICS_API_URL,
+    use_cache: bool = True,
+    engine: translate_to_english.TranslationEngine | None = None,
+) -> pd.DataFrame:
+    """
+    Corre los pasos 2–7 en modo pipelined sobre el chart `df` (year, rank,
+    artist, song y opcionalmente los ids). Con `pos_path=None` no se
+    etiqueta. Devuelve el tiempo ocupado de cada etapa (para comparar con
+    el total de la corrida).
+    """
+    if batch_size <= 0 or queue_size <= 0:
+        raise ValueError("batch_size and queue_size must be positive")
+
+    if engine is None:
+        engine = translate_to_english.TranslationEngine()
+    workers = resolve_workers(workers)
+    tag = pos_path is not None
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    writers: dict[str, pq.ParquetWriter] = {
+        "tokenized": pq.ParquetWriter(output_path, TOKENIZED_SCHEMA, **parquet_options(TOKENIZED_SCHEMA.names)),
+    }
+    if translated_path is not None:
+        translated_path.parent.mkdir(parents=True, exist_ok=True)
+        writers["translated"] = pq.ParquetWriter(translated_path, TRANSLATED_SCHEMA)
+    if tag:
+        from src.postagging.nltk_tagger import known_tags, model_name
+
+        # El diccionario de tags queda fijo en el esquema: el del tagger
+        pos_schema = pos_format.pos_schema(POS_META_SCHEMA, known_tags(), "nltk", model_name())
+        pos_path.parent.mkdir(parents=True, exist_ok=True)
+        writers["pos"] = pq.ParquetWriter(
+            pos_path, pos_schema, **pos_format.parquet_options(pos_schema.names)
+        )
+
+    def translate(batch: pd.DataFrame) -> pd.DataFrame:
+        out = translate_to_english.run(batch, save_snapshot=False, engine=engine)
+        if "translated" in writers:
+            writers["translated"].write_batch(
+                pa.RecordBatch.from_pandas(
+                    out.reindex(columns=TRANSLATED_SCHEMA.names), schema=TRANSLATED_SCHEMA, preserve_index=False
+                )
+            )
+        return out
+
+    abort = threading.Event()
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(4)]
+    vocab = Vocabulary()
+    rows = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Levantar los procesos antes que los hilos (fork con hilos vivos no es seguro)
+        list(pool.map(int, range(workers)))
+
+        stages = [
+            _FetchThread(
+                df, queues[0], abort, batch_size,
+                output_csv=lyrics_csv, workers=fetch_workers, rate_limit=rate_limit,
+                base_url=base_url, use_cache=use_cache,
+            ),
+            _StageThread("clean+detect", clean_and_detect, queues[0], queues[1], abort, pool, workers),
+            _StageThread("translate", translate, queues[1], queues[2], abort),
+            _StageThread("tokenize+tag", partial(tokenize_and_tag, tag=tag), queues[2], queues[3], abort, pool, workers),
+        ]
+        for stage in stages:
+            stage.start()
+
+        write_busy = 0.0
+        try:
+            while True:
+                batch = _get(queues[-1], abort)
+                if batch is _DONE:
+                    break
+
+                t0 = time.perf_counter()
+                encoded = batch.drop(columns="lyrics").assign(**{TOKEN_IDS_COL: encode_column(batch["lyrics"], vocab)})
+                writers["tokenized"].write_batch(
+                    pa.RecordBatch.from_pandas(
+                        encoded.reindex(columns=TOKENIZED_SCHEMA.names), schema=TOKENIZED_SCHEMA, preserve_index=False
+                    )
+                )
+                if tag:
+                    writers["pos"].write_batch(
+                        pos_format.pos_record_batch(
+                            encoded, list(encoded[TOKEN_IDS_COL]), list(batch["pos_nltk"]),
+                            pos_format.token_hashes(batch["lyrics"]), pos_schema,
+                        )
+                    )
+                rows += len(batch)
+                write_busy += time.perf_counter() - t0
+            if tag:
+                # Los ids se asignaron durante la corrida: recién ahora se conoce el vocabulario
+                writers["pos"].add_key_value_metadata(pos_format.vocab_metadata(vocab.tokens))
+        except _Aborted:
+            pass
+        except BaseException:
+            abort.set()
+            raise
+        finally:
+            for stage in stages:
+                stage.join()
+            for writer in writers.values():
+                writer.close()
+
+    errors = [s.error for s in stages if s.error is not None]
+    if errors:
+        raise errors[0]
+
+    vocab.save(vocab_path)
+    elapsed = time.perf_counter() - start
+
+    report = pd.DataFrame(
+        [(s.name, s.batches, s.busy) for s in stages] + [("write", None, write_busy)],
+        columns=["stage", "batches", "busy_s"],
+    )
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.1f}"))
+    print(f"Pipelined: {rows} filas en {elapsed:.1f} s (etapa más lenta: "
+          f"{report.loc[report['busy_s'].idxmax(), 'stage']}, {report['busy_s'].max():.1f} s ocupada)")
+    print(f"DataSet tokenizado y guardado en: {output_path} ({len(vocab)} tokens en {vocab_path})")
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="Batches en espera entre etapas.")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para las etapas CPU (por defecto, todos los cores).")
+    parser.add_argument("--fetch-workers", type=int, default=8, help="Requests de letras en vuelo.")
+    parser.add_argument("--no-tag", action="store_true", help="No correr el POS tagging NLTK.")
+    args = parser.parse_args()
+
+    run(
+        get_lyrics.load_chart(),
+        pos_path=None if args.no_tag else POS_NLTK_PARQUET,
+        batch_size=args.batch_size,
+        queue_size=args.queue_size,
+        workers=args.workers,
+        fetch_workers=args.fetch_workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
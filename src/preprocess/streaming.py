@@ -0,0 +1,169 @@
+"""
+Modo streaming del preprocesamiento: clean → detect → translate → tokenize.
+
+En lugar de cargar todo el corpus y copiarlo en cada etapa, lee el CSV de
+letras en batches de `batch_size` filas, pasa cada batch por las cuatro
+etapas y lo escribe como Arrow record batch con un `ParquetWriter`
+incremental. En memoria hay un solo batch a la vez, así que el pico no
+crece con el tamaño del corpus (year-end → charts semanales).
+
+Las caches persistentes de idioma y traducción se comparten entre batches,
+así que una letra repetida en batches distintos se procesa una sola vez.
+
+El resultado es el mismo parquet tokenizado que el modo normal (pasos 3–6):
+`token_ids` por canción y el vocabulario global, que crece batch a batch y
+se escribe al final.
+
+Uso:
+    python -m src.preprocess.streaming --batch-size 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.cleaners.lyrics_text_cleaner import clean_frame
+from src.preprocess import detect_language, lyrics_tokenize, translate_to_english
+from src.preprocess.lyrics_tokenize import LINE_LENGTHS_COL
+from src.preprocess.vocabulary import TOKEN_IDS_COL, Vocabulary, encode_column, parquet_options
+from src.utils.config import (
+    LYRICS_RAW_CSV,
+    LYRICS_TOKENIZED_PARQUET,
+    LYRICS_TRANSLATED_PARQUET,
+    LYRICS_VOCAB_PARQUET,
+)
+from src.utils.instrumentation import peak_rss
+from src.utils.kv_cache import KeyValueCache
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Esquema fijo: un batch sin idiomas detectados no debe cambiar el tipo.
+# Los ids de entidad quedan nulos si el CSV no los trae.
+TRANSLATED_SCHEMA = pa.schema([
+    ("year", pa.int64()),
+    ("rank", pa.int64()),
+    ("artist", pa.string()),
+    ("song", pa.string()),
+    ("lyrics", pa.string()),
+    ("language", pa.string()),
+    ("artist_id", pa.int64()),
+    ("song_id", pa.int64()),
+])
+
+TOKENIZED_SCHEMA = TRANSLATED_SCHEMA.remove(TRANSLATED_SCHEMA.get_field_index("lyrics")).append(
+    pa.field(TOKEN_IDS_COL, pa.list_(pa.int32()))
+).append(pa.field(LINE_LENGTHS_COL, pa.list_(pa.int32())))
+
+
+def stream_batches(
+    input_csv: Path = LYRICS_RAW_CSV,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int | None = 1,
+    engine: translate_to_english.TranslationEngine | None = None,
+    translated_writer: pq.ParquetWriter | None = None,
+    vocab: Vocabulary | None = None,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Genera un record batch tokenizado (`token_ids`) por cada `batch_size`
+    filas del CSV; los tokens nuevos se agregan a `vocab`.
+
+    Si se pasa `translated_writer`, cada batch traducido (antes de tokenizar)
+    también se escribe ahí.
+    """
+    if vocab is None:
+        vocab = Vocabulary()
+    if engine is None:
+        engine = translate_to_english.TranslationEngine()
+    language_cache = KeyValueCache("language")
+
+    reader = pd.read_csv(input_csv, encoding="utf-8", chunksize=batch_size)
+    for chunk in reader:
+        df = clean_frame(chunk, workers=workers)
+        df = detect_language.run(df, workers=workers, cache=language_cache)
+        df = translate_to_english.run(df, save_snapshot=False, engine=engine)
+
+        if translated_writer is not None:
+            translated_writer.write_batch(
+                pa.RecordBatch.from_pandas(
+                    df.reindex(columns=TRANSLATED_SCHEMA.names), schema=TRANSLATED_SCHEMA, preserve_index=False
+                )
+            )
+
+        df = lyrics_tokenize.run(df, output_path=None, workers=workers)
+        df = df.drop(columns="lyrics").assign(**{TOKEN_IDS_COL: encode_column(df["lyrics"], vocab)})
+        yield pa.RecordBatch.from_pandas(
+            df.reindex(columns=TOKENIZED_SCHEMA.names), schema=TOKENIZED_SCHEMA, preserve_index=False
+        )
+
+
+def run(
+    input_csv: Path = LYRICS_RAW_CSV,
+    output_path: Path = LYRICS_TOKENIZED_PARQUET,
+    translated_path: Path | None = LYRICS_TRANSLATED_PARQUET,
+    vocab_path: Path = LYRICS_VOCAB_PARQUET,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int | None = 1,
+    engine: translate_to_english.TranslationEngine | None = None,
+) -> int:
+    """
+    Corre los pasos 3–6 en streaming y escribe el parquet tokenizado
+    (y el traducido, si `translated_path` no es None). Devuelve las filas escritas.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    translated_writer = None
+    if translated_path is not None:
+        translated_path.parent.mkdir(parents=True, exist_ok=True)
+        translated_writer = pq.ParquetWriter(translated_path, TRANSLATED_SCHEMA)
+
+    vocab = Vocabulary()
+    rows = 0
+    batches = 0
+    try:
+        with pq.ParquetWriter(output_path, TOKENIZED_SCHEMA, **parquet_options(TOKENIZED_SCHEMA.names)) as writer:
+            for batch in stream_batches(input_csv, batch_size, workers, engine, translated_writer, vocab):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+                batches += 1
+                print(f"Batch {batches}: {rows} filas escritas")
+    finally:
+        if translated_writer is not None:
+            translated_writer.close()
+
+    vocab.save(vocab_path)
+
+    peak = peak_rss()
+    memory = f", pico RSS {peak / 2**20:.0f} MB" if peak is not None else ""
+    print(f"DataSet tokenizado y guardado en: {output_path} ({rows} filas, {batches} batches, {len(vocab)} tokens{memory})")
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para limpieza, detección y tokenización de cada batch.")
+    parser.add_argument("--input", type=Path, default=LYRICS_RAW_CSV)
+    parser.add_argument("--output", type=Path, default=LYRICS_TOKENIZED_PARQUET)
+    parser.add_argument("--no-translated", action="store_true", help="No escribir el parquet traducido.")
+    args = parser.parse_args()
+
+    run(
+        input_csv=args.input,
+        output_path=args.output,
+        translated_path=None if args.no_translated else LYRICS_TRANSLATED_PARQUET,
+        batch_size=args.batch_size,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,189 @@
 """
-Translate non-English lyrics to English (offline/simple version).
+Translate non-English lyrics to English.
 
 Recibe DataFrame con columna `language`
 y traduce solo los que no sean 'en'.
 Devuelve DataFrame actualizado.
+
+La traducción pasa por `TranslationEngine`:
+- reusa un cliente por hilo y par de idiomas (no uno por fila),
+- parte cada letra en chunks bajo el límite de caracteres del backend,
+- traduce los chunks en paralelo,
+- guarda cada traducción en una cache persistente (hash del texto + idiomas),
+- si una traducción falla, la letra queda en su idioma original (no en None)
+  y se reintenta en la próxima corrida.
+
+El backend es intercambiable: `GoogleBackend` (deep_translator) u
+`OfflineBackend` (sin red, para pruebas y benchmarks).
 """
 
 from __future__ import annotations
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import pandas as pd
-from deep_translator import GoogleTranslator
 
+from src.utils.config import LYRICS_TRANSLATED_PARQUET
+from src.utils.helpers import stage_copy
+from src.utils.instrumentation import progress
+from src.utils.kv_cache import KeyValueCache, content_hash
 
-def translate_text(text: str, source_lang: str) -> str | None:
-    if pd.isna(text):
-        return None
 
-    try:
-        return GoogleTranslator(source=source_lang, target="en").translate(text)
-    except Exception:
-        return None
+OUTPUT_DEFAULT = LYRICS_TRANSLATED_PARQUET
 
 
-from pathlib import Path
-from src.utils.config import PROCESSED_DATA_PATH
+class GoogleBackend:
+    """
+    Google Translate vía deep_translator. Un cliente por hilo y par de idiomas
+    (GoogleTranslator guarda estado de la request, no es thread-safe).
+    """
+
+    name = "google"
+    max_chars = 4500  # el límite de la API es 5000
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        from deep_translator import GoogleTranslator  # lazy import
+
+        clients = self._local.__dict__.setdefault("clients", {})
+        if (source, target) not in clients:
+            clients[(source, target)] = GoogleTranslator(source=source, target=target)
+        return clients[(source, target)].translate(text)
+
+
+class OfflineBackend:
+    """
+    Backend sin red: devuelve el texto tal cual (opcionalmente con latencia).
+    """
+
+    name = "offline"
+    max_chars = 4500
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return text
+
+
+def chunk_text(text: str, max_chars: int) -> list[str]:
+    """
+    Parte `text` en trozos de como máximo `max_chars`, cortando en espacios.
+    """
+    chunks = []
+    current = []
+    size = 0
+
+    for word in text.split():
+        # Palabra más larga que el límite: se corta a la fuerza
+        while len(word) > max_chars:
+            chunks.append(word[:max_chars])
+            word = word[max_chars:]
+
+        extra = len(word) + (1 if current else 0)
+        if size + extra > max_chars:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+            extra = len(word)
+
+        current.append(word)
+        size += extra
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class TranslationEngine:
+    """
+    Traduce muchos textos a `target` con chunks concurrentes y cache persistente.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        target: str = "en",
+        workers: int = 8,
+        use_cache: bool = True,
+        cache: KeyValueCache | None = None,
+    ):
+        self.backend = backend if backend is not None else GoogleBackend()
+        self.target = target
+        self.workers = workers
+
+        if use_cache and cache is None:
+            cache = KeyValueCache("translations")
+        self.cache = cache if use_cache else None
+
+    def _key(self, text: str, source: str) -> str:
+        # `chunk_text` descarta los saltos de línea: el backend recibe lo mismo
+        # que con el texto en una línea, así que la clave usa ese texto
+        return content_hash(self.backend.name, source, self.target, " ".join(str(text).split()))
+
+    def _translate_chunk(self, job: tuple[str, str, str]) -> str | None:
+        _, chunk, source = job
+        try:
+            return self.backend.translate(chunk, source, self.target)
+        except Exception:
+            return None
+
+    def translate_many(self, items: list[tuple[str, str]]) -> list[str | None]:
+        """
+        `items` es una lista de (texto, idioma origen). Devuelve la traducción
+        de cada uno en el mismo orden, o None si falló.
+        """
+        keys = [self._key(text, source) for text, source in items]
+        results = self.cache.get_many(keys) if self.cache is not None else {}
+
+        # Textos distintos que faltan traducir, partidos en chunks
+        todo = {}
+        for key, (text, source) in zip(keys, items):
+            if key not in results and key not in todo:
+                todo[key] = (text, source)
+
+        jobs = [
+            (key, chunk, source)
+            for key, (text, source) in todo.items()
+            for chunk in chunk_text(str(text), self.backend.max_chars)
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            translated = pool.map(self._translate_chunk, jobs)
+            translated = list(progress(translated, total=len(jobs), desc="traducción"))
+
+        parts: dict[str, list[str | None]] = {key: [] for key in todo}
+        for (key, _, _), chunk in zip(jobs, translated):
+            parts[key].append(chunk)
+
+        new = {
+            key: " ".join(chunks)
+            for key, chunks in parts.items()
+            if chunks and all(c is not None for c in chunks)
+        }
+        results.update(new)
+
+        if self.cache is not None:
+            self.cache.put_many(new)
+
+        failed = len(todo) - len(new)
+        print(f"Traducciones: {len(keys)} textos, {len(todo)} nuevos ({len(jobs)} chunks), {failed} fallidos")
+        if self.cache is not None:
+            self.cache.report()
+
+        return [results.get(key) for key in keys]
 
 
 def run(df: pd.DataFrame,
         save_snapshot: bool = True,
-        output_path: Path | None = None) -> pd.DataFrame:
+        output_path: Path | None = None,
+        engine: TranslationEngine | None = None) -> pd.DataFrame:
 
     if "lyrics" not in df.columns:
         raise ValueError("Column 'lyrics' not found")
@@ -36,23 +191,32 @@ def run(df: pd.DataFrame,
     if "language" not in df.columns:
         raise ValueError("Column 'language' not found")
 
-    out = df.copy()
+    if engine is None:
+        engine = TranslationEngine()
+
+    out = stage_copy(df)
 
-    mask = (out["language"].notna()) & (out["language"] != "en")
+    mask = (out["language"].notna()) & (out["language"] != "en") & out["lyrics"].notna()
+    idx = out.index[mask]
 
-    for idx in out[mask].index:
-        text = out.at[idx, "lyrics"]
-        lang = out.at[idx, "language"]
+    translated = pd.Series(
+        engine.translate_many(list(zip(out.loc[mask, "lyrics"], out.loc[mask, "language"]))),
+        index=idx,
+        dtype=object,
+    )
 
-        translated = translate_text(text, lang)
-        out.at[idx, "lyrics"] = translated
+    # Solo se marca como 'en' lo que realmente se tradujo
+    ok = translated.notna()
+    out.loc[idx[ok], "lyrics"] = translated[ok]
+    out.loc[idx[ok], "language"] = "en"
 
-    out.loc[mask, "language"] = "en"
+    if (~ok).any():
+        print(f"[WARN] {int((~ok).sum())} letras sin traducir; se conservan en su idioma original.")
 
     # Guardar snapshot listo para NLP
     if save_snapshot:
         if output_path is None:
-            output_path = PROCESSED_DATA_PATH / "songs_with_lyrics_deluxe.parquet"
+            output_path = OUTPUT_DEFAULT
 
         output_path.parent.mkdir(parents=True, exist_ok=True)
         out.to_parquet(output_path, index=False)
@@ -0,0 +1,163 @@
+"""
+Vocabulario global del corpus tokenizado.
+
+El parquet tokenizado guarda cada canción como `token_ids` (list<int32>)
+en lugar de una lista de strings; el vocabulario (id -> token) va en un
+parquet aparte (LYRICS_VOCAB_PARQUET). Los ids se asignan en orden de
+aparición, así que el vocabulario puede crecer batch a batch (modo streaming).
+
+- `Vocabulary`: encode/decode y lectura/escritura del vocabulario.
+- `fingerprint`: hash de los primeros tokens del vocabulario, para que
+  quien guarda ids (p. ej. los parquet de POS) pueda verificar después que
+  se decodifican con el mismo vocabulario.
+- `read_tokenized`: lee el parquet tokenizado; por defecto devuelve la
+  columna `lyrics` como lista de tokens (igual que antes), decodificada en
+  Arrow sin pasar por Python fila a fila. Con `decode=False` devuelve los ids.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.utils.config import LYRICS_TOKENIZED_PARQUET, LYRICS_VOCAB_PARQUET
+
+
+TOKEN_IDS_COL = "token_ids"
+
+
+def parquet_options(columns: Iterable[str]) -> dict:
+    """
+    Opciones de escritura del parquet tokenizado: zstd, y sin diccionario
+    para `token_ids` (ya son ids; el diccionario de parquet solo agrega peso).
+    """
+    return {
+        "compression": "zstd",
+        "use_dictionary": [c for c in columns if c != TOKEN_IDS_COL],
+    }
+
+
+class Vocabulary:
+    """
+    Mapeo token <-> id (int32), con ids en orden de aparición.
+    """
+
+    def __init__(self, tokens: Iterable[str] = ()):
+        self.tokens: list[str] = []
+        self._ids: dict[str, int] = {}
+        for token in tokens:
+            self.add(token)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def add(self, token: str) -> int:
+        token_id = self._ids.get(token)
+        if token_id is None:
+            token_id = self._ids[token] = len(self.tokens)
+            self.tokens.append(token)
+        return token_id
+
+    def encode(self, tokens) -> np.ndarray | None:
+        """
+        Lista/array de tokens -> array int32 de ids (agrega los tokens nuevos).
+        """
+        if tokens is None or (isinstance(tokens, float) and pd.isna(tokens)):
+            return None
+
+        ids = self._ids
+        return np.fromiter(
+            (ids[t] if t in ids else self.add(t) for t in tokens),
+            dtype=np.int32,
+            count=len(tokens),
+        )
+
+    def decode(self, token_ids) -> list[str] | None:
+        if token_ids is None or (isinstance(token_ids, float) and pd.isna(token_ids)):
+            return None
+        return [self.tokens[i] for i in token_ids]
+
+    def to_arrow(self) -> pa.Array:
+        return pa.array(self.tokens, type=pa.string())
+
+    def save(self, path: Path = LYRICS_VOCAB_PARQUET) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.table({
+            "token_id": pa.array(np.arange(len(self.tokens), dtype=np.int32)),
+            "token": self.to_arrow(),
+        })
+        pq.write_table(table, path, compression="zstd")
+
+    @classmethod
+    def load(cls, path: Path = LYRICS_VOCAB_PARQUET) -> "Vocabulary":
+        table = pq.read_table(path).sort_by("token_id")
+        return cls(table.column("token").to_pylist())
+
+
+def fingerprint(tokens, size: int | None = None) -> str:
+    """
+    Hash (hex) de los primeros `size` tokens (por defecto todos), en orden
+    de id. Como los ids se asignan en orden de aparición, un vocabulario que
+    solo creció conserva el hash de su prefijo; uno reconstruido en otro
+    orden (otra corrida del paso 6) no.
+    """
+    tokens = list(tokens if size is None else tokens[:size])
+    return hashlib.blake2b("\x1f".join(tokens).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def encode_column(series: pd.Series, vocab: Vocabulary) -> pd.Series:
+    """
+    Columna de listas de tokens -> columna de arrays int32 (None se mantiene).
+    """
+    return pd.Series([vocab.encode(t) for t in series], index=series.index, dtype=object)
+
+
+def decode_array(token_ids: pa.Array | pa.ChunkedArray, vocab_tokens: pa.Array) -> pa.Array:
+    """
+    list<int32> -> list<string> en Arrow (un `take` sobre el vocabulario).
+    """
+    if isinstance(token_ids, pa.ChunkedArray):
+        token_ids = token_ids.combine_chunks()
+
+    # `values` ignora el offset del slice y `offsets` lo respeta: son consistentes
+    tokens = vocab_tokens.take(token_ids.values)
+    return pa.ListArray.from_arrays(token_ids.offsets, tokens, mask=token_ids.is_null())
+
+
+def read_tokenized(
+    path: Path = LYRICS_TOKENIZED_PARQUET,
+    vocab_path: Path = LYRICS_VOCAB_PARQUET,
+    columns: list[str] | None = None,
+    decode: bool = True,
+) -> pd.DataFrame:
+    """
+    Lee el parquet tokenizado.
+
+    - `decode=True`: columna `lyrics` con la lista de tokens de cada canción.
+    - `decode=False`: columna `token_ids` (arrays int32); decodificar con
+      `Vocabulary.load(vocab_path)`.
+
+    Acepta también el formato anterior (`lyrics` como lista de strings).
+    """
+    if columns is not None and decode:
+        columns = [TOKEN_IDS_COL if c == "lyrics" else c for c in columns]
+
+    schema = pq.read_schema(path)
+    if TOKEN_IDS_COL not in schema.names:
+        # Formato anterior: ya trae los strings
+        legacy = None if columns is None else ["lyrics" if c == TOKEN_IDS_COL else c for c in columns]
+        return pq.read_table(path, columns=legacy).to_pandas()
+
+    table = pq.read_table(path, columns=columns)
+    if decode and TOKEN_IDS_COL in table.column_names:
+        vocab_tokens = pq.read_table(vocab_path).sort_by("token_id").column("token").combine_chunks()
+        i = table.column_names.index(TOKEN_IDS_COL)
+        table = table.set_column(i, "lyrics", decode_array(table.column(TOKEN_IDS_COL), vocab_tokens))
+
+    return table.to_pandas()
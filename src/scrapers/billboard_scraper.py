@@ -4,12 +4,40 @@ Billboard Year-End Hot 100 Scraper.
 Este módulo descarga las tablas anuales del ranking Billboard Year-End Hot 100
 desde Wikipedia, extrae ranking, canción y artista, y devuelve un DataFrame
 (con opción de exportar si algún día lo necesitas, pero el flujo principal es in-memory).
+
+Las páginas se guardan en la cache HTTP persistente (data/cache), así que
+re-ejecutar el scraping casi no toca la red.
+
+Los años se descargan en paralelo y el parseo se limita a las tablas
+`wikitable` (SoupStrainer + lxml si está disponible).
+
+`run_incremental` mantiene una tabla persistente (CHART_RAW_CSV) y solo
+descarga los años que faltan o están incompletos.
 """
 
-import requests
-from bs4 import BeautifulSoup
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from pathlib import Path
+
+from bs4 import BeautifulSoup, SoupStrainer
 import pandas as pd
 
+from src.utils.config import CHART_RAW_CSV, WIKIPEDIA_CHART_URL
+from src.utils.helpers import changed_rows, upsert_rows
+from src.utils.http_cache import HttpCache, build_session
+
+
+CHART_KEYS = ["year", "rank"]
+CHART_COLUMNS = ["year", "rank", "song", "artist"]
+ROWS_PER_YEAR = 100
+
+# lxml es bastante más rápido que html.parser; si no está, se usa el de stdlib
+_FAST_PARSER = "lxml" if find_spec("lxml") is not None else "html.parser"
+# Al filtrar, `class` llega como string completo ("wikitable sortable"), por eso regex
+_WIKITABLE_ONLY = SoupStrainer("table", class_=re.compile(r"(^|\s)wikitable(\s|$)"))
+
 
 class BillboardTop100Scraper:
     """
@@ -17,100 +45,153 @@ class BillboardTop100Scraper:
     para un rango de años determinado.
     """
 
-    def __init__(self, start_year: int = 1973, end_year: int = 2024):
+    def __init__(
+        self,
+        start_year: int = 1973,
+        end_year: int = 2024,
+        use_cache: bool = True,
+        cache: HttpCache | None = None,
+        workers: int = 8,
+        fast_parse: bool = True,
+        base_url: str = WIKIPEDIA_CHART_URL,
+    ):
         self.start_year = start_year
         self.end_year = end_year
+        self.workers = workers
+        self.fast_parse = fast_parse
+
+        if use_cache and cache is None:
+            cache = HttpCache()
+        self.cache = cache if use_cache else None
 
-        self.base_url = "https://en.wikipedia.org/wiki/Billboard_Year-End_Hot_100_singles_of_"
+        # Una sesión por hilo (requests.Session no es thread-safe), con la
+        # misma política de reintentos (429/5xx) que el scraper de lyrics
+        self._local = threading.local()
+
+        self.base_url = base_url
         self.headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
 
         self.songs = {}
         self.singers = {}
         self.ranks = {}
 
-    def fetch_data(self) -> None:
+    def fetch_data(self, years: list[int] | None = None) -> None:
         """
-        Ejecuta el scraping para cada año y almacena los resultados
-        en los diccionarios internos.
+        Ejecuta el scraping para cada año (o solo `years`) y almacena los
+        resultados en los diccionarios internos.
+
+        Los años se descargan en paralelo (`self.workers` hilos); el
+        resultado no depende del orden en que terminan.
         """
-        for year in range(self.start_year, self.end_year + 1):
-            names = []
-            singer_names = []
-            year_ranks = []
-
-            url = f"{self.base_url}{year}"
-            r = requests.get(url, headers=self.headers, timeout=20)
-
-            if r.status_code != 200:
-                print(f"[WARN] {year} status={r.status_code} url={url}")
-                self.songs[year] = names
-                self.singers[year] = singer_names
-                self.ranks[year] = year_ranks
-                continue
+        if years is None:
+            years = list(range(self.start_year, self.end_year + 1))
 
-            soup = BeautifulSoup(r.text, "html.parser")
-            tables = soup.find_all("table", class_="wikitable")
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(self._fetch_year, years))
+        else:
+            results = [self._fetch_year(year) for year in years]
 
-            if not tables:
-                print(f"[WARN] {year} no wikitable found.")
-                self.songs[year] = names
-                self.singers[year] = singer_names
-                self.ranks[year] = year_ranks
+        for year, (names, singer_names, year_ranks) in zip(years, results):
+            self.songs[year] = names
+            self.singers[year] = singer_names
+            self.ranks[year] = year_ranks
+
+        if self.cache is not None:
+            self.cache.report()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = build_session(self.cache)
+        return self._local.session
+
+    def _fetch_year(self, year: int) -> tuple[list, list, list]:
+        """
+        Descarga y parsea la página de un año. Devuelve (songs, singers, ranks).
+        """
+        url = f"{self.base_url}{year}"
+        r = self._session().get(url, headers=self.headers, timeout=20)
+
+        if r.status_code != 200:
+            print(f"[WARN] {year} status={r.status_code} url={url}")
+            return [], [], []
+
+        return self.parse_page(r.text, year=year, fast=self.fast_parse)
+
+    @staticmethod
+    def parse_page(html: str, year: int | None = None, fast: bool = True) -> tuple[list, list, list]:
+        """
+        Extrae (songs, singers, ranks) del HTML de una página year-end.
+
+        Con `fast=True` solo se construye el árbol de las `table.wikitable`
+        (SoupStrainer) y se usa lxml si está instalado. Con `fast=False`
+        se parsea la página completa con html.parser (comportamiento original).
+        """
+        names = []
+        singer_names = []
+        year_ranks = []
+
+        if fast:
+            soup = BeautifulSoup(html, _FAST_PARSER, parse_only=_WIKITABLE_ONLY)
+        else:
+            soup = BeautifulSoup(html, "html.parser")
+        tables = soup.find_all("table", class_="wikitable")
+
+        if not tables:
+            print(f"[WARN] {year} no wikitable found.")
+            return names, singer_names, year_ranks
+
+        # Elegir la tabla más probable (rank + artist(s))
+        target = None
+        for t in tables:
+            header = t.get_text(" ", strip=True).lower()
+            if "rank" in header and ("artist" in header or "artists" in header):
+                target = t
+                break
+        if target is None:
+            target = tables[0]
+
+        for row in target.find_all("tr"):
+            cols = row.find_all("td")
+            if not cols:
                 continue
 
-            # Elegir la tabla más probable (rank + artist(s))
-            target = None
-            for t in tables:
-                header = t.get_text(" ", strip=True).lower()
-                if "rank" in header and ("artist" in header or "artists" in header):
-                    target = t
-                    break
-            if target is None:
-                target = tables[0]
-
-            for row in target.find_all("tr"):
-                cols = row.find_all("td")
-                if not cols:
-                    continue
+            # Rank (usualmente col 0)
+            try:
+                rank = int(cols[0].get_text(strip=True))
+            except Exception:
+                continue
 
-                # Rank (usualmente col 0)
-                try:
-                    rank = int(cols[0].get_text(strip=True))
-                except Exception:
-                    continue
+            # Preferir columnas: más estable que links
+            # Estructura típica: Rank | Song | Artist(s)
+            song = None
+            singer = None
 
-                # Preferir columnas: más estable que links
-                # Estructura típica: Rank | Song | Artist(s)
-                song = None
-                singer = None
+            if len(cols) >= 3:
+                song = cols[1].get_text(" ", strip=True).strip()
+                singer = cols[2].get_text(" ", strip=True).strip()
 
-                if len(cols) >= 3:
-                    song = cols[1].get_text(" ", strip=True).strip()
-                    singer = cols[2].get_text(" ", strip=True).strip()
+                # Wikipedia suele poner las canciones entre comillas
+                song = song.strip('"').strip("“").strip("”").strip()
+            else:
+                # Fallback: lógica basada en links (por si cambia la tabla)
+                links = row.find_all("a")
+                if not links:
+                    continue
 
-                    # Wikipedia suele poner las canciones entre comillas
-                    song = song.strip('"').strip("“").strip("”").strip()
+                if len(links) >= 2:
+                    song = links[0].get_text(strip=True)
+                    singer = links[1].get_text(strip=True)
                 else:
-                    # Fallback: lógica basada en links (por si cambia la tabla)
-                    links = row.find_all("a")
-                    if not links:
-                        continue
-
-                    if len(links) >= 2:
-                        song = links[0].get_text(strip=True)
-                        singer = links[1].get_text(strip=True)
-                    else:
-                        song = links[0].get_text(strip=True)
-                        singer = None
-
-                if song:
-                    names.append(song)
-                    singer_names.append(singer)
-                    year_ranks.append(rank)
+                    song = links[0].get_text(strip=True)
+                    singer = None
 
-            self.songs[year] = names
-            self.singers[year] = singer_names
-            self.ranks[year] = year_ranks
+            if song:
+                names.append(song)
+                singer_names.append(singer)
+                year_ranks.append(rank)
+
+        return names, singer_names, year_ranks
 
     def build_dataframe(self) -> pd.DataFrame:
         """
@@ -136,3 +217,58 @@ class BillboardTop100Scraper:
         self.fetch_data()
         return self.build_dataframe()
 
+    @staticmethod
+    def load_chart(store_path: Path = CHART_RAW_CSV) -> pd.DataFrame:
+        """
+        Lee la tabla persistente (vacía si todavía no existe).
+        """
+        if not store_path.exists():
+            return pd.DataFrame(columns=CHART_COLUMNS)
+        return pd.read_csv(store_path, encoding="utf-8")[CHART_COLUMNS]
+
+    def missing_years(self, stored: pd.DataFrame, refresh_years: tuple[int, ...] = ()) -> list[int]:
+        """
+        Años del rango que no están guardados, están incompletos
+        (menos de ROWS_PER_YEAR filas, p. ej. un fetch fallido) o se piden en `refresh_years`.
+        """
+        counts = stored.groupby("year").size() if not stored.empty else pd.Series(dtype=int)
+        return [
+            year
+            for year in range(self.start_year, self.end_year + 1)
+            if counts.get(year, 0) < ROWS_PER_YEAR or year in refresh_years
+        ]
+
+    def run_incremental(
+        self,
+        store_path: Path = CHART_RAW_CSV,
+        refresh_years: tuple[int, ...] = (),
+    ) -> pd.DataFrame:
+        """
+        Descarga solo los años faltantes/incompletos (y los de `refresh_years`),
+        los integra a la tabla persistente y devuelve únicamente las filas
+        (year, rank) nuevas o cambiadas.
+        """
+        outside = [y for y in refresh_years if not self.start_year <= y <= self.end_year]
+        if outside:
+            raise ValueError(f"refresh_years fuera del rango {self.start_year}-{self.end_year}: {outside}")
+
+        stored = self.load_chart(store_path)
+        years = self.missing_years(stored, refresh_years)
+
+        if not years:
+            print(f"Chart al día: {len(stored)} filas en {store_path}")
+            return pd.DataFrame(columns=CHART_COLUMNS)
+
+        print(f"Años a descargar: {years}")
+        self.fetch_data(years)
+        fetched = self.build_dataframe()
+        if fetched.empty:
+            return pd.DataFrame(columns=CHART_COLUMNS)
+
+        delta = changed_rows(fetched, stored, CHART_KEYS, ["song", "artist"])
+
+        store_path.parent.mkdir(parents=True, exist_ok=True)
+        upsert_rows(stored, fetched, CHART_KEYS).to_csv(store_path, index=False, encoding="utf-8")
+        print(f"Chart actualizado: {len(delta)} filas nuevas/cambiadas -> {store_path}")
+
+        return delta.reset_index(drop=True)
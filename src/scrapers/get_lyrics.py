@@ -5,39 +5,70 @@ Este módulo obtiene lyrics usando https://api.lyrics.ovh/v1/{artist}/{title}.
 Ahora expone una función `run(df, ...)` que recibe un DataFrame (ya limpio)
 y devuelve el DataFrame con la columna `lyrics`.
 
-Opcionalmente puede escribir a CSV (checkpoint + final).
+Opcionalmente puede escribir a CSV. Los checkpoints van a un journal
+append-only (`<output_csv>.journal.jsonl`, un registro por canción); al
+final se compacta todo en el CSV (escritura atómica) y se borra el journal.
+
+Cada canción distinta (artist, song normalizados) se pide una sola vez
+y el resultado se reparte a todas sus filas del chart. Si las filas traen
+`song_id` (tabla de entidades), la deduplicación y el resume usan ese
+entero en lugar de los strings.
+
+Cada fila guarda `fetch_status` (ok, not_found, transient_error, http_error),
+`fetched_at` y `fetch_attempts`. Al retomar, los not_found/http_error no se
+vuelven a pedir hasta que vence `not_found_ttl_days`, y los errores
+transitorios se reintentan con backoff exponencial.
+
+Con `workers > 1` las requests se hacen en paralelo (thread pool) y se
+limitan con un token bucket compartido en lugar de un sleep fijo.
+
+Con `on_rows` las filas se entregan a medida que quedan resueltas (ver
+src.preprocess.pipelined), sin esperar a que termine la descarga.
 """
 
+import json
+import os
 import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
+from typing import Callable
 from urllib.parse import quote
 import csv
 
+import numpy as np
 import pandas as pd
 import requests
-from requests.adapters import HTTPAdapter, Retry
-
-
-def build_session() -> requests.Session:
-    s = requests.Session()
-    retries = Retry(
-        total=6,
-        connect=6,
-        read=6,
-        status=6,
-        backoff_factor=1.0,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET"],
-        raise_on_status=False,
-    )
-    adapter = HTTPAdapter(max_retries=retries, pool_connections=20, pool_maxsize=20)
-    s.mount("https://", adapter)
-    s.mount("http://", adapter)
-    return s
+
+from src.utils.config import CHART_CLEAN_CSV, LYRICS_API_URL
+from src.utils.helpers import stage_copy
+from src.utils.http_cache import HttpCache, build_session
+from src.utils.instrumentation import progress
+from src.utils.rate_limit import TokenBucket
+
+
+STATUS_OK = "ok"
+STATUS_NOT_FOUND = "not_found"
+STATUS_TRANSIENT = "transient_error"
+STATUS_HTTP_ERROR = "http_error"
+
+# Status HTTP que vale la pena reintentar más adelante
+TRANSIENT_HTTP_STATUS = {408, 429, 500, 502, 503, 504}
+
+STATUS_COLUMNS = ["fetch_status", "fetched_at", "fetch_attempts"]
 
 
-def get_lyrics(session: requests.Session, artist: str, title: str, timeout: int = 15) -> str | None:
-    url = f"https://api.lyrics.ovh/v1/{quote(artist)}/{quote(title)}"
+def get_lyrics(
+    session: requests.Session,
+    artist: str,
+    title: str,
+    timeout: int = 15,
+    base_url: str = LYRICS_API_URL,
+) -> str | None:
+    url = f"{base_url}/{quote(artist)}/{quote(title)}"
     r = session.get(url, timeout=timeout)
 
     if r.status_code == 200:
@@ -49,6 +80,57 @@ def get_lyrics(session: requests.Session, artist: str, title: str, timeout: int
     r.raise_for_status()
 
 
+def _fetch_lyrics(
+    session: requests.Session,
+    artist: str,
+    title: str,
+    timeout: int,
+    base_url: str,
+) -> tuple[str | None, str]:
+    """
+    Igual que `get_lyrics`, pero nunca lanza: devuelve (lyrics, fetch_status).
+    """
+    try:
+        lyrics = get_lyrics(session, artist, title, timeout=timeout, base_url=base_url)
+    except (requests.Timeout, requests.ConnectionError):
+        return None, STATUS_TRANSIENT
+    except requests.HTTPError as e:
+        status = e.response.status_code if e.response is not None else None
+        return None, STATUS_TRANSIENT if status in TRANSIENT_HTTP_STATUS else STATUS_HTTP_ERROR
+
+    if lyrics is None:
+        return None, STATUS_NOT_FOUND
+    return lyrics, STATUS_OK
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _needs_fetch(
+    df: pd.DataFrame,
+    not_found_ttl_days: float,
+    retry_backoff_seconds: float,
+) -> pd.Series:
+    """
+    Filas a pedir: sin intento previo, not_found/http_error con TTL vencido,
+    o transient_error cuyo backoff (base * 2^(intentos-1)) ya pasó.
+    """
+    status = df["fetch_status"]
+    age = (pd.Timestamp.now(tz="UTC") - pd.to_datetime(df["fetched_at"], utc=True)).dt.total_seconds()
+    attempts = pd.to_numeric(df["fetch_attempts"], errors="coerce").fillna(0).clip(lower=1)
+
+    ttl = not_found_ttl_days * 24 * 3600
+    backoff = (retry_backoff_seconds * 2 ** (attempts - 1)).clip(upper=ttl)
+
+    never_tried = status.isna() | age.isna()
+    missing_expired = status.isin([STATUS_NOT_FOUND, STATUS_HTTP_ERROR]) & (age >= ttl)
+    transient_due = (status == STATUS_TRANSIENT) & (age >= backoff)
+    ok_without_lyrics = status == STATUS_OK
+
+    return df["lyrics"].isna() & (never_tried | missing_expired | transient_due | ok_without_lyrics)
+
+
 def clean_quotes(series: pd.Series) -> pd.Series:
     # Ojo: si series trae NaN, astype(str) lo vuelve "nan", por eso normalizamos después.
     s = (
@@ -60,40 +142,249 @@ def clean_quotes(series: pd.Series) -> pd.Series:
     return s.replace({"nan": pd.NA})
 
 
+def song_key(artist: pd.Series, song: pd.Series) -> pd.Series:
+    """
+    Clave normalizada (artist, song): `clean_quotes` + casefold.
+    Identifica la misma canción aunque aparezca en varios años/ranks.
+    """
+    a = clean_quotes(artist).fillna("").str.casefold()
+    s = clean_quotes(song).fillna("").str.casefold()
+    return a + "\x1f" + s
+
+
 def _prepare_df(df: pd.DataFrame) -> pd.DataFrame:
     required = {"year", "rank", "artist", "song"}
     missing = required - set(df.columns)
     if missing:
         raise ValueError(f"Missing required columns: {sorted(missing)}")
 
-    out = df.copy()
+    out = stage_copy(df)
     out["song"] = clean_quotes(out["song"])
     out["artist"] = clean_quotes(out["artist"])
 
     if "lyrics" not in out.columns:
         out["lyrics"] = pd.NA
 
+    for col in STATUS_COLUMNS:
+        if col not in out.columns:
+            out[col] = 0 if col == "fetch_attempts" else pd.NA
+
     return out
 
 
+JOURNAL_KEYS = ["year", "rank", "artist", "song"]
+
+# Con ids de entidad (ver src.cleaners.entities) el resume cruza por enteros
+ENTITY_JOURNAL_KEYS = ["year", "rank", "song_id"]
+
+
+def _row_keys(df: pd.DataFrame) -> pd.Series:
+    """
+    Clave de canción para deduplicar: `song_id` si viene, si no `song_key`.
+    """
+    if "song_id" in df.columns:
+        return df["song_id"].astype("Int64")
+    return song_key(df["artist"], df["song"])
+
+
+def _journal_path(output_csv: Path) -> Path:
+    return output_csv.with_name(output_csv.name + ".journal.jsonl")
+
+
+class _Journal:
+    """
+    Journal append-only: una línea JSON por canción procesada.
+
+    `sync()` hace flush + fsync; una línea a medio escribir por un crash
+    se ignora al reproducir el journal.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fh = open(path, "a", encoding="utf-8")
+        if self._fh.tell() > 0 and not self._ends_with_newline(path):
+            # Cerrar la línea truncada para no pegarle el próximo registro
+            self._fh.write("\n")
+
+    @staticmethod
+    def _ends_with_newline(path: Path) -> bool:
+        with open(path, "rb") as fh:
+            fh.seek(-1, os.SEEK_END)
+            return fh.read(1) == b"\n"
+
+    def append(self, record: dict) -> None:
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def sync(self) -> None:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def close(self) -> None:
+        self.sync()
+        self._fh.close()
+
+
+def _read_journal(path: Path) -> pd.DataFrame:
+    records = []
+    if path.exists():
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Última línea truncada por un crash
+                    continue
+
+    return pd.DataFrame(records, columns=JOURNAL_KEYS + ["song_id", "lyrics"] + STATUS_COLUMNS)
+
+
 def _resume_from_output(df: pd.DataFrame, output_csv: Path) -> pd.DataFrame:
-    if not output_csv.exists():
+    """
+    Reconstruye el progreso: CSV consolidado (si existe) + replay del journal.
+    """
+    journal = _read_journal(_journal_path(output_csv))
+    if not output_csv.exists() and journal.empty:
         return df
 
-    done = pd.read_csv(output_csv, encoding="utf-8")
-    if "lyrics" not in done.columns:
-        done["lyrics"] = pd.NA
+    values = ["lyrics"] + STATUS_COLUMNS
+    parts = []
+    if output_csv.exists():
+        done = pd.read_csv(output_csv, encoding="utf-8")
+        for col in ["song_id"] + values:
+            if col not in done.columns:
+                done[col] = pd.NA
+        parts.append(done[JOURNAL_KEYS + ["song_id"] + values])
+    if not journal.empty:
+        parts.append(journal)
+    done = pd.concat(parts, ignore_index=True)
+    done["song_id"] = done["song_id"].astype("Int64")
+
+    # Enteros donde la fila tiene song_id; los 4 strings para el resto (filas
+    # del chart sin artista, que no tienen id, y lo guardado en CSV viejos)
+    with_id = np.zeros(len(df), dtype=bool)
+    if "song_id" in df.columns:
+        df = df.assign(song_id=df["song_id"].astype("Int64"))
+        with_id = df["song_id"].notna().to_numpy()
+
+    def lookup(rows: np.ndarray, keys: list[str], records: pd.DataFrame) -> pd.DataFrame:
+        # El journal es más reciente que el CSV: gana el último registro
+        records = records[keys + values].drop_duplicates(keys, keep="last").assign(_found=True)
+        found = df.loc[rows, keys].merge(records, on=keys, how="left")
+        found.index = np.flatnonzero(rows)
+        return found
+
+    by_id = lookup(with_id, ENTITY_JOURNAL_KEYS, done[done["song_id"].notna()])
+    by_id = by_id[by_id["_found"].notna()]
+    by_strings = np.ones(len(df), dtype=bool)
+    by_strings[by_id.index] = False
+    saved = pd.concat([by_id, lookup(by_strings, JOURNAL_KEYS, done)]).sort_index()
+
+    merged = df.copy()
+    for col in values:
+        stored = pd.Series(saved[col].to_numpy(), index=df.index)
+        if col == "lyrics":
+            merged[col] = merged[col].combine_first(stored)
+        else:
+            # El status guardado manda sobre los defaults de _prepare_df
+            merged[col] = stored.combine_first(merged[col])
+
+    print(f"Resuming: {merged['lyrics'].notna().sum()} rows already have lyrics ({len(journal)} from journal).")
+    return merged
 
-    keys = ["year", "rank", "artist", "song"]
-    done = done[keys + ["lyrics"]].drop_duplicates(keys)
 
-    merged = df.merge(done, on=keys, how="left", suffixes=("", "_done"))
-    if "lyrics_done" in merged.columns:
-        merged["lyrics"] = merged["lyrics"].combine_first(merged["lyrics_done"])
-        merged.drop(columns=["lyrics_done"], inplace=True)
+def _save_csv(df: pd.DataFrame, output_csv: Path) -> None:
+    # Escritura atómica: un crash a mitad no deja el CSV corrupto
+    tmp = output_csv.with_name(output_csv.name + ".tmp")
+    df.to_csv(
+        tmp,
+        index=False,
+        encoding="utf-8",
+        quoting=csv.QUOTE_ALL,
+        escapechar="\\",
+        lineterminator="\n",
+    )
+    os.replace(tmp, output_csv)
 
-    print(f"Resuming: {merged['lyrics'].notna().sum()} rows already have lyrics.")
-    return merged
+
+def compact(df: pd.DataFrame, output_csv: Path) -> None:
+    """
+    Consolida el progreso en `output_csv` y elimina el journal.
+    """
+    _save_csv(df, output_csv)
+    _journal_path(output_csv).unlink(missing_ok=True)
+
+
+def load_chart(path: Path = CHART_CLEAN_CSV) -> pd.DataFrame:
+    """
+    Lee el chart limpio del Paso 1 con las columnas que usa `run`
+    (y `artist_id`/`song_id` si están).
+    """
+    df = pd.read_csv(path, encoding="utf-8")
+    ids = [c for c in ("artist_id", "song_id") if c in df.columns]
+    return df[["year", "rank", "artist", "song"] + ids].astype({c: "Int64" for c in ids})
+
+
+def _iter_serial(
+    rows: list[tuple],
+    sleep_seconds: float,
+    timeout: int,
+    base_url: str,
+    cache: HttpCache | None,
+    cache_ttl: dict[int, float] | None = None,
+):
+    session = build_session(cache, cache_ttl_by_status=cache_ttl)
+
+    for idx, artist, song in rows:
+        hits_before = cache.hits if cache is not None else 0
+        lyrics, status = _fetch_lyrics(session, artist, song, timeout, base_url)
+        yield idx, lyrics, status
+
+        # Un hit de cache no toca la red: no hace falta esperar
+        served_from_cache = cache is not None and cache.hits > hits_before
+        if sleep_seconds and not served_from_cache:
+            time.sleep(sleep_seconds)
+
+
+def _iter_concurrent(
+    rows: list[tuple],
+    workers: int,
+    limiter: TokenBucket | None,
+    timeout: int,
+    base_url: str,
+    cache: HttpCache | None,
+    cache_ttl: dict[int, float] | None = None,
+):
+    """
+    Descarga lyrics en un thread pool y las entrega en el orden de `rows`.
+
+    Cada hilo usa su propia sesión (requests.Session no es thread-safe)
+    y todos comparten el mismo `limiter` y la misma `cache`. Solo hay
+    `2 * workers` requests enviadas al pool a la vez: si el consumidor deja
+    de iterar (Ctrl+C, un error, `close()`), las que no empezaron se
+    cancelan y solo se esperan las que están en curso.
+    """
+    local = threading.local()
+
+    def fetch(row: tuple) -> tuple[str | None, str]:
+        _, artist, song = row
+        if not hasattr(local, "session"):
+            local.session = build_session(cache, limiter, cache_ttl)
+        return _fetch_lyrics(local.session, artist, song, timeout, base_url)
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    queued = iter(rows)
+    window = deque((row[0], pool.submit(fetch, row)) for row in islice(queued, 2 * workers))
+    try:
+        # En orden de entrada -> escritura determinística
+        while window:
+            idx, future = window.popleft()
+            lyrics, status = future.result()
+            row = next(queued, None)
+            if row is not None:
+                window.append((row[0], pool.submit(fetch, row)))
+            yield idx, lyrics, status
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
 
 
 def run(
@@ -102,10 +393,20 @@ def run(
     batch_save_every: int = 100,
     sleep_seconds: float = 0.2,
     timeout: int = 15,
+    workers: int = 1,
+    rate_limit: float | None = None,
+    base_url: str = LYRICS_API_URL,
+    use_cache: bool = True,
+    cache: HttpCache | None = None,
+    not_found_ttl_days: float = 30,
+    retry_backoff_seconds: float = 3600,
+    on_rows: Callable[[pd.DataFrame], None] | None = None,
+    cancel: threading.Event | None = None,
 ) -> pd.DataFrame:
     """
     Recibe DataFrame (idealmente ya con artist limpio) y devuelve el DataFrame con lyrics.
-    Si `output_csv` se provee, hace checkpoints y guarda al final.
+    Si `output_csv` se provee, registra cada canción en un journal
+    append-only y al final compacta todo en `output_csv`.
 
     Parameters
     ----------
@@ -114,11 +415,33 @@ def run(
     output_csv : Path | None
         Si no es None, guarda checkpoints y resultado final en esa ruta.
     batch_save_every : int
-        Cada cuántas filas nuevas con intento de lyrics se guarda checkpoint.
+        Cada cuántas filas nuevas se hace fsync del journal (checkpoint).
     sleep_seconds : float
-        Pausa entre requests para evitar rate limiting.
+        Pausa entre requests para evitar rate limiting (solo modo secuencial).
     timeout : int
         Timeout por request.
+    workers : int
+        Número de requests en vuelo. Con 1 se usa el modo secuencial original.
+    rate_limit : float | None
+        Requests por segundo (token bucket compartido) en modo concurrente.
+        Si es None se deriva de `sleep_seconds` (1 / sleep_seconds).
+    base_url : str
+        Endpoint de lyrics.ovh (configurable para apuntar a un servidor local).
+    use_cache : bool
+        Si es True, las respuestas (200/404) se guardan en la cache HTTP persistente.
+    cache : HttpCache | None
+        Cache a usar; por defecto `HttpCache()` en data/cache.
+    not_found_ttl_days : float
+        Días que un not_found/http_error se da por bueno antes de volver a pedirlo.
+    retry_backoff_seconds : float
+        Espera base antes de reintentar un transient_error; se duplica por intento.
+    on_rows : Callable[[pd.DataFrame], None] | None
+        Si no es None, recibe las filas ya resueltas: primero las que no hay
+        que pedir y después, en cada checkpoint, las recién descargadas.
+        Cada fila se entrega exactamente una vez.
+    cancel : threading.Event | None
+        Si se activa, deja de descargar: lo ya resuelto se entrega y se
+        guarda como siempre y el resto queda pendiente para otra corrida.
 
     Returns
     -------
@@ -129,51 +452,105 @@ def run(
     if output_csv is not None:
         out = _resume_from_output(out, output_csv)
 
-    session = build_session()
+    if use_cache and cache is None:
+        cache = HttpCache()
+    elif not use_cache:
+        cache = None
+    # Un 404 cacheado dura lo mismo que un not_found: con el TTL general de la
+    # cache, el reintento vencido lo contestaría la cache sin llegar a la red
+    cache_ttl = {404: not_found_ttl_days * 24 * 3600}
+
     total = len(out)
+    keys = _row_keys(out)
+
+    # Canciones repetidas (p. ej. en dos años seguidos): reusar lyrics ya conocidas
+    known = out["lyrics"].groupby(keys).first()
+    missing = out["lyrics"].isna()
+    out.loc[missing, "lyrics"] = keys[missing].map(known)
+    out.loc[missing & out["lyrics"].notna(), "fetch_status"] = STATUS_OK
+
+    # Una sola request por clave; el resultado se reparte a todas sus filas.
+    # Sin artist o song no hay URL posible: esas filas quedan sin lyrics.
+    due = _needs_fetch(out, not_found_ttl_days, retry_backoff_seconds)
+    to_fetch = due & out["artist"].notna() & out["song"].notna()
+    skipped = out["lyrics"].isna() & ~due
+    if skipped.any():
+        print(f"Skipping {int(skipped.sum())} rows with a recent miss: "
+              f"{out.loc[skipped, 'fetch_status'].value_counts().to_dict()}")
+    rows_by_key = out.index[to_fetch].groupby(keys[to_fetch])
+    pending = [
+        (rows[0], out.at[rows[0], "artist"], out.at[rows[0], "song"])
+        for rows in rows_by_key.values()
+    ]
+    print(f"Unique songs to fetch: {len(pending)} ({int(to_fetch.sum())} rows pending)")
+
+    if on_rows is not None and not to_fetch.all():
+        on_rows(out.loc[~to_fetch])
+    resolved: list = []
+
+    if workers > 1:
+        if rate_limit is None and sleep_seconds:
+            rate_limit = 1.0 / sleep_seconds
+        limiter = TokenBucket(rate_limit) if rate_limit else None
+        fetched = _iter_concurrent(pending, workers, limiter, timeout, base_url, cache, cache_ttl)
+    else:
+        fetched = _iter_serial(pending, sleep_seconds, timeout, base_url, cache, cache_ttl)
+    results = progress(fetched, total=len(pending), desc="lyrics")
+
+    journal = _Journal(_journal_path(output_csv)) if output_csv is not None else None
     processed_since_save = 0
-
-    for idx, row in out.iterrows():
-        if pd.notna(row.get("lyrics")):
-            continue
-
-        artist = row["artist"]
-        song = row["song"]
-
-        try:
-            lyrics = get_lyrics(session, artist, song, timeout=timeout)
-        except (requests.Timeout, requests.ConnectionError):
-            lyrics = None
-        except requests.HTTPError:
-            lyrics = None
-
-        out.at[idx, "lyrics"] = lyrics
-        processed_since_save += 1
-
-        if sleep_seconds:
-            time.sleep(sleep_seconds)
-
-        if output_csv is not None and processed_since_save >= batch_save_every:
-            out.to_csv(
-                output_csv,
-                index=False,
-                encoding="utf-8",
-                quoting=csv.QUOTE_ALL,
-                escapechar="\\",
-                lineterminator="\n",
-            )
-            print(f"Saved checkpoint ({out['lyrics'].notna().sum()} filled / {total} total)")
-            processed_since_save = 0
+    filled = int(out["lyrics"].notna().sum())
+
+    try:
+        for first_idx, lyrics, status in results:
+            if cancel is not None and cancel.is_set():
+                print("Fetch cancelado: el resto queda pendiente")
+                break
+            fetched_at = _now()
+            for idx in rows_by_key[keys[first_idx]]:
+                previous = pd.to_numeric(out.at[idx, "fetch_attempts"], errors="coerce")
+                attempts = (0 if pd.isna(previous) else int(previous)) + 1
+                out.at[idx, "lyrics"] = lyrics
+                out.at[idx, "fetch_status"] = status
+                out.at[idx, "fetched_at"] = fetched_at
+                out.at[idx, "fetch_attempts"] = attempts
+                filled += lyrics is not None
+                resolved.append(idx)
+
+                if journal is not None:
+                    year, rank, artist, song = out.loc[idx, JOURNAL_KEYS]
+                    song_id = out.at[idx, "song_id"] if "song_id" in out.columns else None
+                    journal.append({
+                        "year": int(year), "rank": int(rank), "artist": artist, "song": song,
+                        "song_id": None if pd.isna(song_id) else int(song_id),
+                        "lyrics": lyrics, "fetch_status": status,
+                        "fetched_at": fetched_at, "fetch_attempts": attempts,
+                    })
+
+            processed_since_save += 1
+            if processed_since_save >= batch_save_every:
+                if journal is not None:
+                    journal.sync()
+                    print(f"Saved checkpoint ({filled} filled / {total} total)")
+                if on_rows is not None:
+                    on_rows(out.loc[resolved])
+                    resolved = []
+                processed_since_save = 0
+    finally:
+        # Si se cortó antes de terminar: cancelar las requests que no empezaron
+        fetched.close()
+        if journal is not None:
+            journal.close()
+
+    if on_rows is not None and resolved:
+        on_rows(out.loc[resolved])
 
     if output_csv is not None:
-        out.to_csv(
-            output_csv,
-            index=False,
-            encoding="utf-8",
-            quoting=csv.QUOTE_ALL,
-            escapechar="\\",
-            lineterminator="\n",
-        )
+        compact(out, output_csv)
         print(f"Done. Saved: {output_csv}")
 
+    print(f"Fetch status: {out['fetch_status'].value_counts().to_dict()}")
+    if cache is not None:
+        cache.report()
+
     return out
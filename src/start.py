@@ -1,18 +1,41 @@
 # pipeline.py
-
-from src.scrapers.billboard_scraper import BillboardTop100Scraper
-from src.cleaners.top100_cleaner import BillboardTop100Cleaner
-from src.scrapers.get_lyrics import run as get_lyrics_run
-from src.utils.config import RAW_DATA_PATH
-
-from src.cleaners.lyrics_text_cleaner import run as clean_lyrics_run
-from src.preprocess.detect_language import run as lang_detect_run
-from src.preprocess.translate_to_english import run as translate_run
-from src.preprocess.lyrics_tokenize import run as tokenize_run
-
-from src.postagging.nltk_tagger import run as nltk_pos_run
-from src.postagging.spacy_tagger import run as spacy_pos_run
-from src.postagging.comparator import run as compare_pos_run
+"""
+Punto de entrada del pipeline.
+
+    python -m src.start                      # menú interactivo
+    python -m src.start --steps 3 4 5        # sin preguntar (cron / batch)
+    python -m src.start --steps all --workers 8 --profile
+    python -m src.start --steps all --copy-free   # copy-on-write de pandas
+
+Cada corrida deja un reporte por paso (tiempo de pared y CPU, filas/s,
+pico de RSS) en data/results/runs: run_<fecha>.json y runs.csv acumulado.
+
+Las dependencias pesadas (spaCy, NLTK, langdetect, requests, bs4...) se
+importan dentro de cada paso, así que arrancar y correr solo el paso 9
+no carga los scrapers ni el traductor.
+"""
+
+import argparse
+import cProfile
+import pstats
+import sys
+import time
+
+from src.utils.config import (
+    CHART_CLEAN_CSV,
+    LYRICS_CLEAN_PARQUET,
+    LYRICS_RAW_CSV,
+    LYRICS_TOKENIZED_PARQUET,
+    LYRICS_TRANSLATED_PARQUET,
+    LYRICS_VOCAB_PARQUET,
+    POS_COMPARISON_BY_YEAR_CSV,
+    POS_NLTK_PARQUET,
+    POS_SPACY_PARQUET,
+    POS_SPEED_COMPARISON_CSV,
+    PROFILES_PATH,
+    RUNS_PATH,
+)
+from src.utils.pipeline import Pipeline, Stage
 
 
 # -------------------------------------------------
@@ -34,79 +57,189 @@ def print_banner():
 
 
 # -------------------------------------------------
-# Pasos
+# Pasos (cada uno importa lo que necesita recién al correr)
 # -------------------------------------------------
 
-def step_1():
-    """Scrapea Billboard Top 100 (1973–2024)."""
-    scraper = BillboardTop100Scraper(1973, 2024)
-    df = scraper.run()
-    df = BillboardTop100Cleaner().clean(df)
-    print("Paso 1 completado: Billboard scrapeado y limpio.")
-
-
-def step_2():
-    """Obtiene letras y guarda CSV."""
-    print("Asegusere de tener el CSV limpio del Paso 1.")
-    # Aquí debería leer el CSV limpio si no trabaja en memoria
-    # df = ...
-    # get_lyrics_run(df, output_csv=RAW_DATA_PATH / "top100_songs_with_lyrics.csv")
+def step_1(workers=None, refresh_years=()):
+    """
+    Scrapea Billboard Top 100 (1973–2024) de forma incremental:
+    solo descarga los años que faltan en la tabla guardada, más los de
+    `refresh_years` (charts corregidos o actualizados).
+    Devuelve solo las filas (year, rank) nuevas o cambiadas, ya limpias
+    (para el log y el reporte: los pasos siguientes leen la tabla completa).
+    """
+    from src.scrapers.billboard_scraper import BillboardTop100Scraper
+    from src.cleaners.top100_cleaner import BillboardTop100Cleaner
+
+    scraper = BillboardTop100Scraper(1973, 2024, workers=workers or 8)
+    scraper.run_incremental(refresh_years=tuple(refresh_years))
+    df = BillboardTop100Cleaner().clean_incremental(scraper.load_chart(), workers=workers or 1)
+    print(f"Paso 1 completado: Billboard scrapeado y limpio ({len(df)} filas nuevas o cambiadas).")
+    return df
+
+
+def step_2(workers=None):
+    """
+    Obtiene letras y guarda CSV. Recibe el chart completo (el CSV de letras
+    es la tabla completa), pero retoma el CSV existente: solo pide las filas nuevas.
+    """
+    from src.scrapers.get_lyrics import load_chart, run as get_lyrics_run
+
+    if not CHART_CLEAN_CSV.exists():
+        print("Asegurese de tener el CSV limpio del Paso 1.")
+        return
+
+    get_lyrics_run(load_chart(CHART_CLEAN_CSV), output_csv=LYRICS_RAW_CSV, workers=workers or 1)
     print("Paso 2 completado: Letras obtenidas.")
 
 
-def step_3():
-    """Limpia texto de las letras."""
-    clean_lyrics_run()
+def step_3(workers=None, keep_lines=False):
+    """Limpia texto de las letras (con `keep_lines`, conservando los saltos de línea)."""
+    from src.cleaners.lyrics_text_cleaner import run as clean_lyrics_run
+
+    df = clean_lyrics_run(workers=workers or 1, keep_lines=keep_lines)
     print("Paso 3 completado: Letras limpias.")
+    return df
 
 
-def step_4():
-    """Detecta idioma."""
-    df = clean_lyrics_run()
-    lang_detect_run(df)
+def step_4(df, workers=None):
+    """Detecta idioma sobre las letras limpias del Paso 3."""
+    from src.preprocess.detect_language import run as lang_detect_run
+
+    df = lang_detect_run(df, workers=workers)
     print("Paso 4 completado: Idioma detectado.")
+    return df
 
 
-def step_5():
+def step_5(df):
     """Traduce a inglés si es necesario."""
-    df = clean_lyrics_run()
-    df = lang_detect_run(df)
-    translate_run(df)
+    from src.preprocess.translate_to_english import run as translate_run
+
+    df = translate_run(df)
     print("Paso 5 completado: Traducción aplicada.")
+    return df
 
 
-def step_6():
+def step_6(df, workers=None):
     """Tokeniza letras."""
-    df = clean_lyrics_run()
-    df = lang_detect_run(df)
-    df = translate_run(df)
-    tokenize_run(df)
+    from src.preprocess.lyrics_tokenize import run as tokenize_run
+
+    df = tokenize_run(df, workers=workers or 1)
     print("Paso 6 completado: Tokenización lista.")
+    return df
 
 
-def step_7():
-    """POS tagging con NLTK."""
-    nltk_pos_run()
+def step_7(workers=None, incremental=True, line_cache=False):
+    """POS tagging con NLTK (batches repartidos en `workers` procesos; solo canciones nuevas o cambiadas)."""
+    from src.postagging.nltk_tagger import run as nltk_pos_run
+
+    df = nltk_pos_run(workers=workers or 1, incremental=incremental, line_cache=line_cache)
     print("Paso 7 completado: POS tagging con NLTK.")
+    return df
+
 
+def step_8(workers=None, incremental=True, line_cache=False):
+    """POS tagging con spaCy (tokens del paso 6 como Doc, en `workers` procesos; solo canciones nuevas o cambiadas)."""
+    from src.postagging.spacy_tagger import run as spacy_pos_run
 
-def step_8():
-    """POS tagging con spaCy."""
-    spacy_pos_run()
+    df = spacy_pos_run(n_process=workers or 1, incremental=incremental, line_cache=line_cache)
     print("Paso 8 completado: POS tagging con spaCy.")
+    return df
 
 
 def step_9():
     """Compara NLTK vs spaCy."""
+    from src.postagging.comparator import run as compare_pos_run
+
     compare_pos_run()
     print("Paso 9 completado: Comparación realizada.")
 
 
-#seleccionar paso
+# -------------------------------------------------
+# Grafo de dependencias
+# -------------------------------------------------
 
-def main():
-    print_banner()
+# Módulos que implementa cada paso: lista de imports que mide
+# src.benchmarks.bench_startup. La versión de código de la cache suma
+# además el fuente de step_N y todo lo que importan (src.utils.pipeline).
+STEP_MODULES = {
+    "1": ["src.scrapers.billboard_scraper", "src.cleaners.top100_cleaner", "src.cleaners.entities"],
+    "2": ["src.scrapers.get_lyrics"],
+    "3": ["src.cleaners.lyrics_text_cleaner"],
+    "4": ["src.preprocess.detect_language"],
+    "5": ["src.preprocess.translate_to_english"],
+    "6": ["src.preprocess.lyrics_tokenize", "src.preprocess.vocabulary"],
+    "7": ["src.postagging.nltk_tagger", "src.preprocess.vocabulary"],
+    "8": ["src.postagging.spacy_tagger", "src.preprocess.vocabulary"],
+    "9": ["src.postagging.comparator"],
+}
+
+
+def build_pipeline(
+    workers=None, use_cache=True, report=None, trace_allocations=False, incremental=True, line_cache=False,
+    refresh_years=(),
+) -> Pipeline:
+    """
+    Pasos 1–9 como grafo. Los pasos 1, 2 y 5 (red) no se cachean: su efecto
+    entra al grafo por el hash de los archivos que escriben. El 5 corre
+    siempre que corre el 6 (le pasa el DataFrame): así reintenta las letras
+    que quedaron sin traducir, y las ya traducidas salen de la cache
+    persistente de traducciones. El resto se carga de cache si no cambió su
+    código, sus parámetros ni sus entradas.
+    7 y 8 solo dependen de 6 y corren a la vez (en procesos aparte).
+
+    Cuando llega un año nuevo, los pasos 3–8 reciben la tabla completa (no
+    solo las filas nuevas del paso 1), pero el trabajo caro es incremental:
+    2 solo pide las letras que faltan, 4 y 5 salen de sus caches
+    persistentes (idioma y traducciones, por hash del texto) y 7 y 8 solo
+    etiquetan canciones nuevas o cambiadas. 3 y 6 (limpieza y tokenización)
+    sí recorren todo el histórico, deduplicando letras repetidas.
+
+    `workers` se pasa a los pasos que lo aceptan (1, 2, 3, 4, 6, 7 y 8); no
+    forma parte de la clave de cache. Con `use_cache=False` se recalcula todo.
+    Con `report` (RunReport) cada paso queda medido en el reporte de corrida.
+    7 y 8 reutilizan los tags de su parquet anterior salvo `incremental=False`.
+    Con `line_cache` el paso 3 conserva los saltos de línea y 7 y 8 etiquetan
+    por línea (cada línea distinta una vez); como cambia el resultado, es
+    parte de la clave de cache. `refresh_years` son los años que el paso 1
+    vuelve a descargar aunque ya estén guardados.
+    """
+    opts = {"workers": workers}
+    tag_opts = {**opts, "incremental": incremental}
+    lines = {"line_cache": line_cache}
+    return Pipeline(
+        [
+            Stage("1", step_1, outputs=[CHART_CLEAN_CSV], cache=False,
+                  options={**opts, "refresh_years": tuple(refresh_years)},
+                  code=STEP_MODULES["1"]),
+            Stage("2", step_2, deps=["1"], outputs=[LYRICS_RAW_CSV], cache=False, options=opts,
+                  code=STEP_MODULES["2"]),
+            Stage("3", step_3, deps=["2"], inputs=[LYRICS_RAW_CSV], params={"keep_lines": line_cache}, options=opts,
+                  code=STEP_MODULES["3"]),
+            Stage("4", step_4, deps=["3"], pass_deps=True, options=opts,
+                  code=STEP_MODULES["4"]),
+            Stage("5", step_5, deps=["4"], pass_deps=True, outputs=[LYRICS_TRANSLATED_PARQUET], cache=False,
+                  code=STEP_MODULES["5"]),
+            Stage("6", step_6, deps=["5"], pass_deps=True, inputs=[LYRICS_TRANSLATED_PARQUET], outputs=[LYRICS_TOKENIZED_PARQUET, LYRICS_VOCAB_PARQUET], options=opts,
+                  code=STEP_MODULES["6"]),
+            Stage("7", step_7, deps=["6"], outputs=[POS_NLTK_PARQUET], process=True, params=lines, options=tag_opts,
+                  code=STEP_MODULES["7"]),
+            Stage("8", step_8, deps=["6"], outputs=[POS_SPACY_PARQUET], process=True, params=lines, options=tag_opts,
+                  code=STEP_MODULES["8"]),
+            Stage("9", step_9, inputs=[LYRICS_CLEAN_PARQUET],
+                  outputs=[POS_COMPARISON_BY_YEAR_CSV, POS_SPEED_COMPARISON_CSV],
+                  code=STEP_MODULES["9"]),
+        ],
+        use_cache=use_cache,
+        report=report,
+        trace_allocations=trace_allocations,
+    )
 
+
+#seleccionar paso
+
+def ask_steps() -> list[str] | None:
+    """Menú interactivo (cuando no se pasa --steps)."""
     print("Seleccione el paso a ejecutar:\n")
     print("1 - Scrape Billboard")
     print("2 - Obtener letras")
@@ -119,28 +252,134 @@ def main():
     print("9 - Comparar taggers")
     print("0 - Ejecutar TODO\n")
 
-    choice = input("Paso: ")
-
-    steps = {
-        "1": step_1,
-        "2": step_2,
-        "3": step_3,
-        "4": step_4,
-        "5": step_5,
-        "6": step_6,
-        "7": step_7,
-        "8": step_8,
-        "9": step_9,
-    }
-
+    choice = input("Paso: ").strip()
     if choice == "0":
-        for s in steps.values():
-            s()
-    elif choice in steps:
-        steps[choice]()
-    else:
+        return list(STEP_MODULES)
+    if choice in STEP_MODULES:
+        return [choice]
+    return None
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.start",
+        description="Pipeline EUTERPE: scraping, limpieza, traducción y POS tagging de letras.",
+    )
+    parser.add_argument(
+        "--steps", nargs="+", metavar="PASO",
+        help="Pasos a ejecutar (1-9), o 'all' / 0 para todos. Sin esto se muestra el menú.",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Workers para scraping y etapas CPU-bound por fila (por defecto, el de cada paso).",
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help=f"Perfila la corrida con cProfile y guarda el .prof en {PROFILES_PATH}.",
+    )
+    parser.add_argument(
+        "--copy-free", action="store_true",
+        help="Copy-on-write de pandas: las etapas no copian el DataFrame que reciben.",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Recalcular todos los pasos aunque haya artefactos en cache.",
+    )
+    parser.add_argument(
+        "--refresh-years", nargs="+", type=int, default=[], metavar="AÑO",
+        help="Paso 1: volver a descargar estos años aunque ya estén guardados (charts corregidos).",
+    )
+    parser.add_argument(
+        "--full-retag", action="store_true",
+        help="Pasos 7 y 8: etiquetar todas las canciones, sin reutilizar el resultado anterior.",
+    )
+    parser.add_argument(
+        "--line-cache", action="store_true",
+        help="Paso 3: conservar los saltos de línea; pasos 7 y 8: etiquetar por línea, "
+             "cada línea distinta una sola vez (estribillos). Cambia los tags en los bordes de línea.",
+    )
+    parser.add_argument(
+        "--trace-alloc", action="store_true",
+        help="Medir bytes asignados por paso con tracemalloc (hace la corrida más lenta).",
+    )
+    parser.add_argument(
+        "--no-report", action="store_true",
+        help=f"No guardar el reporte de corrida (tiempos, memoria) en {RUNS_PATH}.",
+    )
+    parser.add_argument("--no-banner", action="store_true", help="No imprimir el banner.")
+    args = parser.parse_args(argv)
+
+    if args.steps is not None:
+        steps = list(STEP_MODULES) if {"all", "0"} & set(args.steps) else args.steps
+        unknown = [s for s in steps if s not in STEP_MODULES]
+        if unknown:
+            parser.error(f"pasos inválidos: {' '.join(unknown)}")
+        args.steps = steps
+    elif not sys.stdin.isatty():
+        parser.error("sin terminal interactiva hay que indicar --steps")
+
+    if args.refresh_years and args.steps is not None and "1" not in args.steps:
+        parser.error("--refresh-years solo aplica si se ejecuta el paso 1")
+
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if not args.no_banner:
+        print_banner()
+
+    steps = args.steps if args.steps is not None else ask_steps()
+    if steps is None:
         print("Opción inválida.")
+        return 2
+
+    if args.copy_free:
+        from src.utils.helpers import enable_copy_on_write
+        enable_copy_on_write()
+
+    report = None
+    if not args.no_report:
+        from src.utils.instrumentation import RunReport
+        report = RunReport(
+            steps=steps, workers=args.workers, copy_free=args.copy_free,
+            no_cache=args.no_cache, trace_alloc=args.trace_alloc, full_retag=args.full_retag,
+            line_cache=args.line_cache, refresh_years=args.refresh_years,
+        )
+
+    pipeline = build_pipeline(
+        workers=args.workers, use_cache=not args.no_cache,
+        report=report, trace_allocations=args.trace_alloc,
+        incremental=not args.full_retag, line_cache=args.line_cache,
+        refresh_years=args.refresh_years,
+    )
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+
+    # Cada paso arrastra sus dependencias; las que no cambiaron salen de cache
+    try:
+        pipeline.run(steps)
+        if report is not None:
+            report.meta["status"] = "ok"
+    except BaseException as exc:
+        if report is not None:
+            report.meta["status"] = f"error: {type(exc).__name__}: {exc}"
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            PROFILES_PATH.mkdir(parents=True, exist_ok=True)
+            path = PROFILES_PATH / f"start_{'-'.join(steps)}_{time.strftime('%Y%m%d_%H%M%S')}.prof"
+            profiler.dump_stats(path)
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+            print(f"Perfil guardado en: {path}")
+        if report is not None:
+            report.save()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,5 +1,6 @@
 """Configuraciones del proyecto."""
 
+import os
 from pathlib import Path
 
 BASE_PATH = Path(__file__).resolve().parents[2]
@@ -13,10 +14,53 @@ PROCESSED_DATA_PATH.mkdir(parents=True, exist_ok=True)
 RESULTS_DATA_PATH = BASE_PATH / "data" / "results"
 RESULTS_DATA_PATH.mkdir(parents=True, exist_ok=True)
 
+CACHE_DATA_PATH = BASE_PATH / "data" / "cache"
+
+BENCHMARKS_PATH = RESULTS_DATA_PATH / "benchmarks"
+
+PROFILES_PATH = RESULTS_DATA_PATH / "profiles"
+
+RUNS_PATH = RESULTS_DATA_PATH / "runs"
+
 #archivos
 
+CHART_RAW_CSV = RAW_DATA_PATH / "top100_songs_names.csv"
+
+CHART_CLEAN_CSV = RAW_DATA_PATH / "top100_chart_clean.csv"
+
+ARTISTS_CSV = RAW_DATA_PATH / "artists.csv"
+
+ARTIST_ALIASES_CSV = RAW_DATA_PATH / "artist_aliases.csv"
+
+SONGS_CSV = RAW_DATA_PATH / "songs.csv"
+
+LYRICS_RAW_CSV = RAW_DATA_PATH / "top100_songs_with_lyrics.csv"
+
 LYRICS_CLEAN_PARQUET = PROCESSED_DATA_PATH / "songs_with_lyrics_ready.parquet"
 
+LYRICS_TRANSLATED_PARQUET = PROCESSED_DATA_PATH / "songs_with_lyrics_deluxe.parquet"
+
+LYRICS_TOKENIZED_PARQUET = PROCESSED_DATA_PATH / "songs_with_lyrics_tokenized.parquet"
+
+LYRICS_VOCAB_PARQUET = PROCESSED_DATA_PATH / "songs_with_lyrics_vocab.parquet"
+
+POS_NLTK_PARQUET = RESULTS_DATA_PATH / "pos_nltk.parquet"
+
+POS_SPACY_PARQUET = RESULTS_DATA_PATH / "pos_spacy.parquet"
+
 POS_COMPARISON_BY_YEAR_CSV = RESULTS_DATA_PATH /"comparacion"/ "pos_comparison_by_year.csv"
 
 POS_SPEED_COMPARISON_CSV = RESULTS_DATA_PATH /"comparacion"/ "pos_speed_comparison.csv"
+
+HTTP_CACHE_PATH = CACHE_DATA_PATH / "http_cache.sqlite"
+
+KV_CACHE_PATH = CACHE_DATA_PATH / "kv_cache.sqlite"
+
+#endpoints (se pueden redirigir a un servidor local con variables de entorno)
+
+WIKIPEDIA_CHART_URL = os.environ.get(
+    "EUTERPE_WIKIPEDIA_CHART_URL",
+    "https://en.wikipedia.org/wiki/Billboard_Year-End_Hot_100_singles_of_",
+)
+
+LYRICS_API_URL = os.environ.get("EUTERPE_LYRICS_API_URL", "https://api.lyrics.ovh/v1")
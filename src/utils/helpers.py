@@ -1,5 +1,13 @@
 """Funciones auxiliares."""
+import os
 from pathlib import Path
+from typing import Any, Callable, Hashable
+
+import numpy as np
+import pandas as pd
+
+from src.utils.parallel import parallel_map
+
 def check_dir(path: str | Path) -> Path:
     """
     Verifica que el directorio exista.
@@ -13,4 +21,107 @@ def check_dir(path: str | Path) -> Path:
     if not path.exists():
         path.mkdir(parents=True, exist_ok=True)
 
-    return path
\ No newline at end of file
+    return path
+
+def changed_rows(new: pd.DataFrame, stored: pd.DataFrame, keys: list[str], compare: list[str]) -> pd.DataFrame:
+    """
+    Devuelve las filas de `new` que no existen en `stored` (por `keys`)
+    o cuyo contenido en `compare` cambió. NaN se considera igual a NaN.
+    """
+    if stored.empty:
+        return new.copy()
+
+    merged = new.merge(stored[keys + compare], on=keys, how="left", suffixes=("", "_stored"), indicator=True)
+    is_new = merged["_merge"] == "left_only"
+
+    is_changed = pd.Series(False, index=merged.index)
+    for col in compare:
+        a, b = merged[col], merged[f"{col}_stored"]
+        is_changed |= ~((a == b) | (a.isna() & b.isna()))
+
+    return new[(is_new | is_changed).to_numpy()].copy()
+
+
+def upsert_rows(stored: pd.DataFrame, new: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """
+    Reemplaza en `stored` las filas con las mismas `keys` que `new` y
+    agrega las nuevas. Resultado ordenado por `keys`.
+    """
+    if stored.empty:
+        merged = new
+    elif new.empty:
+        merged = stored
+    else:
+        merged = pd.concat([stored, new], ignore_index=True).drop_duplicates(keys, keep="last")
+
+    return merged.sort_values(keys).reset_index(drop=True)
+
+
+def as_hashable(value: Any) -> Hashable:
+    """
+    Convierte listas/arrays (p. ej. tokens leídos de Parquet) en tuplas
+    para poder usarlas como clave.
+    """
+    if isinstance(value, (list, np.ndarray)):
+        return tuple(as_hashable(v) for v in value)
+    return value
+
+
+def apply_unique(
+    series: pd.Series,
+    func: Callable[[Any], Any],
+    key: Callable[[Any], Hashable] | None = None,
+    workers: int | None = 1,
+    desc: str | None = None,
+) -> pd.Series:
+    """
+    Como `series.apply(func)`, pero llama `func` una sola vez por valor
+    distinto y reparte el resultado a todas las filas con ese valor.
+
+    `key` permite deduplicar valores no hasheables (p. ej. `as_hashable`).
+    Los valores nulos comparten una sola llamada.
+    Con `workers != 1` los valores distintos se procesan con `parallel_map`
+    (`func` debe ser picklable). `desc` muestra avance y ETA.
+    """
+    keys = series if key is None else series.map(key)
+    codes, _ = pd.factorize(keys)
+
+    values = series.to_numpy(dtype=object)
+    first_pos = pd.Series(np.arange(len(codes))).groupby(codes).first()
+    unique_results = parallel_map(func, [values[pos] for pos in first_pos], workers=workers, desc=desc)
+    results = dict(zip(first_pos.index, unique_results))
+
+    return pd.Series([results[c] for c in codes], index=series.index, dtype=object)
+
+
+# Variable de entorno para que los procesos hijos (spawn) hereden el modo
+COPY_ON_WRITE_ENV = "EUTERPE_COPY_ON_WRITE"
+
+
+def enable_copy_on_write() -> None:
+    """
+    Activa copy-on-write de pandas en este proceso y en los que lance.
+    Con CoW, `stage_copy` no duplica datos: cada etapa comparte las columnas
+    que no toca con su entrada y solo copia las que modifica.
+    """
+    os.environ[COPY_ON_WRITE_ENV] = "1"
+    pd.set_option("mode.copy_on_write", True)
+
+
+def copy_on_write_enabled() -> bool:
+    return pd.get_option("mode.copy_on_write") is True
+
+
+def stage_copy(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copia de trabajo de la entrada de una etapa (la etapa nunca modifica
+    el DataFrame que recibe). Con copy-on-write es una copia perezosa; sin
+    él, una copia completa como antes.
+    """
+    if copy_on_write_enabled():
+        return df.copy(deep=False)
+    return df.copy()
+
+
+if os.environ.get(COPY_ON_WRITE_ENV) == "1":
+    enable_copy_on_write()
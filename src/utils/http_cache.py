@@ -0,0 +1,228 @@
+"""
+Cache HTTP persistente (SQLite) compartido por los scrapers.
+
+Guarda status, headers y body por URL. Las entradas expiran por TTL y,
+si la base supera `max_bytes`, se eliminan las menos usadas recientemente.
+
+Se integra con requests a nivel de adapter (`CachingAdapter`), así el
+código que hace `session.get(...)` no cambia. `build_session` arma la
+sesión que usan los scrapers (reintentos + cache + rate limit).
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter, Retry
+from requests.structures import CaseInsensitiveDict
+
+from src.utils.config import HTTP_CACHE_PATH
+from src.utils.rate_limit import TokenBucket
+
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class HttpCache:
+    """
+    Cache de respuestas HTTP en SQLite, keyed por URL.
+
+    Thread-safe: una sola conexión protegida por lock.
+    """
+
+    def __init__(
+        self,
+        path: Path = HTTP_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url         TEXT PRIMARY KEY,
+                status      INTEGER NOT NULL,
+                headers     TEXT NOT NULL,
+                body        BLOB NOT NULL,
+                size        INTEGER NOT NULL,
+                created_at  REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._evict()
+        self._conn.commit()
+
+    def get(self, url: str, ttl_by_status: dict[int, float] | None = None) -> tuple[int, dict, bytes] | None:
+        """
+        Devuelve (status, headers, body) o None si no existe o expiró.
+        `ttl_by_status` reemplaza el TTL para esos status (p. ej. 404 más cortos).
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, created_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+            ttl = self.ttl_seconds
+            if row is not None and ttl_by_status and row[0] in ttl_by_status:
+                ttl = ttl_by_status[row[0]]
+            if row is None or (ttl is not None and now - row[3] > ttl):
+                if row is not None:
+                    self._delete(url)
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+            self.hits += 1
+
+        status, headers, body, _ = row
+        return status, json.loads(headers), body
+
+    def put(self, url: str, status: int, headers: dict, body: bytes) -> None:
+        now = time.time()
+        with self._lock:
+            self._delete(url)
+            self._conn.execute(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, status, json.dumps(dict(headers)), body, len(body), now, now),
+            )
+            self._size += len(body)
+            self._evict()
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._size = 0
+
+    def report(self) -> None:
+        print(f"HTTP cache: {self.hits} hits / {self.misses} misses ({self.path})")
+
+    def _delete(self, url: str) -> None:
+        row = self._conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self._size -= row[0]
+
+    def _evict(self) -> None:
+        # LRU: borrar por accessed_at hasta quedar bajo el límite
+        if self.max_bytes is None or self._size <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall()
+        for url, size in rows:
+            if self._size <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self._size -= size
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter que sirve GETs desde `HttpCache` y guarda las respuestas nuevas.
+
+    Solo se guardan los status de `cacheable_status` (por defecto 200 y 404);
+    errores transitorios (429, 5xx) siempre vuelven a la red.
+
+    Si se pasa `limiter`, solo las requests que salen a la red consumen tokens.
+    Con `cache=None` el adapter solo aplica el limiter. `ttl_by_status`
+    acorta (o alarga) el TTL de la cache para esos status.
+    """
+
+    def __init__(
+        self,
+        cache: HttpCache | None,
+        cacheable_status: tuple[int, ...] = (200, 404),
+        limiter: TokenBucket | None = None,
+        ttl_by_status: dict[int, float] | None = None,
+        **kwargs,
+    ):
+        self.cache = cache
+        self.cacheable_status = cacheable_status
+        self.limiter = limiter
+        self.ttl_by_status = ttl_by_status
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        use_cache = self.cache is not None and request.method == "GET"
+
+        if use_cache:
+            cached = self.cache.get(request.url, self.ttl_by_status)
+            if cached is not None:
+                return self._build_cached_response(request, *cached)
+
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+        response = super().send(request, **kwargs)
+        if use_cache and response.status_code in self.cacheable_status:
+            self.cache.put(request.url, response.status_code, response.headers, response.content)
+
+        return response
+
+    @staticmethod
+    def _build_cached_response(request, status: int, headers: dict, body: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.reason = "OK (cached)" if status == 200 else "cached"
+        return response
+
+
+def build_session(
+    cache: HttpCache | None = None,
+    limiter: TokenBucket | None = None,
+    cache_ttl_by_status: dict[int, float] | None = None,
+) -> requests.Session:
+    """
+    Sesión con reintentos. Con `cache` y/o `limiter` monta un CachingAdapter:
+    los hits de cache no consumen tokens del limiter. `cache_ttl_by_status`:
+    TTL de la cache por status (ver `CachingAdapter`). requests.Session no es
+    thread-safe: una sesión por hilo.
+    """
+    s = requests.Session()
+    retries = Retry(
+        total=6,
+        connect=6,
+        read=6,
+        status=6,
+        backoff_factor=1.0,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        raise_on_status=False,
+    )
+    if cache is not None or limiter is not None:
+        adapter = CachingAdapter(
+            cache, limiter=limiter, ttl_by_status=cache_ttl_by_status,
+            max_retries=retries, pool_connections=20, pool_maxsize=20,
+        )
+    else:
+        adapter = HTTPAdapter(max_retries=retries, pool_connections=20, pool_maxsize=20)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
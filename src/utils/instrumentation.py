@@ -0,0 +1,294 @@
+"""
+Instrumentación del pipeline: métricas por etapa, progreso y reporte de corrida.
+
+- `Instrumented(func, name)`: envuelve la función de una etapa; al llamarla
+  devuelve `(resultado, métricas)` con tiempo de pared y de CPU, filas y
+  filas/s, pico de RSS durante la etapa y (opcional) bytes asignados según
+  tracemalloc. Es picklable, así que sirve también para etapas que corren
+  en otro proceso: las métricas se miden en ese proceso.
+- `progress(items, total, desc)`: recorre `items` e imprime avance, ritmo y
+  ETA cada `every_seconds` (para los loops largos: letras, traducción...).
+- `RunReport`: junta las métricas de una corrida y las guarda en
+  data/results/runs como JSON (una corrida) y CSV (todas las corridas, una
+  fila por etapa), y avisa si alguna etapa tardó bastante más que en las
+  corridas anteriores.
+
+El tiempo de CPU incluye los procesos hijos que la etapa lanzó y esperó
+(pools de `parallel_map`). Las etapas que corren a la vez en hilos del
+mismo proceso comparten el RSS y la CPU del proceso, así que en ese caso
+las cifras son aproximadas.
+
+pandas se importa recién al guardar el reporte: el runner del pipeline
+importa este módulo y no debería cargar pandas solo por eso.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
+
+from src.utils.config import RUNS_PATH
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Una etapa se marca como regresión si tarda más que esto por la mediana previa
+REGRESSION_RATIO = 1.25
+
+# Etapas más cortas que esto no se comparan (ruido)
+REGRESSION_MIN_SECONDS = 1.0
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+def progress(
+    items: Iterable[Any],
+    total: int | None = None,
+    desc: str = "",
+    every_seconds: float = 10.0,
+) -> Iterator[Any]:
+    """
+    Igual que iterar `items`, imprimiendo cada `every_seconds`:
+    `[desc] 500/2000 (25%) 12.3/s ETA 2m02s`.
+    """
+    if total is None and hasattr(items, "__len__"):
+        total = len(items)
+
+    start = last = time.perf_counter()
+    done = 0
+    for item in items:
+        yield item
+        done += 1
+
+        now = time.perf_counter()
+        if now - last >= every_seconds:
+            last = now
+            rate = done / (now - start)
+            if total:
+                eta = (total - done) / rate if rate else 0.0
+                print(f"[{desc}] {done}/{total} ({done / total:.0%}) {rate:.1f}/s ETA {_format_seconds(eta)}")
+            else:
+                print(f"[{desc}] {done} {rate:.1f}/s")
+
+    if done and time.perf_counter() - start >= every_seconds:
+        print(f"[{desc}] {done} en {_format_seconds(time.perf_counter() - start)}")
+
+
+def _current_rss() -> int | None:
+    """RSS actual en bytes (Linux); None si no hay /proc."""
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return None
+
+
+class _RssSampler(threading.Thread):
+    """
+    Muestrea el RSS del proceso cada `interval` segundos y guarda el máximo.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = _current_rss() or 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            rss = _current_rss()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        rss = _current_rss()
+        return max(self.peak, rss or 0)
+
+
+def peak_rss() -> int | None:
+    """
+    Pico de RSS del proceso desde que arrancó, en bytes; None si la
+    plataforma no tiene `resource` (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    # KB en Linux, bytes en macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def _cpu_seconds() -> float:
+    """CPU del proceso más la de sus hijos ya esperados."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _rows(result: Any) -> int | None:
+    # Si pandas no está cargado, el resultado no puede ser un DataFrame
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    return None
+
+
+class Instrumented:
+    """
+    Envuelve `func`: la llamada devuelve `(resultado, métricas)`.
+    """
+
+    def __init__(self, func: Callable[..., Any], name: str, trace_allocations: bool = False):
+        self.func = func
+        self.name = name
+        self.trace_allocations = trace_allocations
+
+    def __call__(self, *args, **kwargs) -> tuple[Any, dict]:
+        sampler = _RssSampler() if _current_rss() is not None else None
+        if sampler is not None:
+            sampler.start()
+
+        if self.trace_allocations:
+            # Queda activo hasta el final del proceso: otra etapa concurrente
+            # puede estar midiendo con el mismo tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+
+        rss_before = _current_rss()
+        cpu_before = _cpu_seconds()
+        wall_before = time.perf_counter()
+        try:
+            result = self.func(*args, **kwargs)
+        finally:
+            wall = time.perf_counter() - wall_before
+            cpu = _cpu_seconds() - cpu_before
+
+            allocated = None
+            if self.trace_allocations:
+                allocated = max(0, tracemalloc.get_traced_memory()[1] - traced_before)
+
+            if sampler is not None:
+                peak = sampler.stop()
+            else:
+                # Sin /proc: pico del proceso desde que arrancó
+                peak = peak_rss()
+
+        rows = _rows(result)
+        metrics = {
+            "stage": self.name,
+            "status": "ejecutado",
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "rows": rows,
+            "rows_per_s": rows / wall if rows is not None and wall > 0 else None,
+            "rss_start_mb": rss_before / 2**20 if rss_before is not None else None,
+            "peak_rss_mb": peak / 2**20 if peak is not None else None,
+            "allocated_mb": allocated / 2**20 if allocated is not None else None,
+            "pid": os.getpid(),
+        }
+        return result, metrics
+
+
+def describe(metrics: dict) -> str:
+    """Resumen de una línea para el log del pipeline."""
+    parts = [f"cpu {metrics['cpu_s']:.1f} s"]
+    if metrics["rows_per_s"] is not None:
+        parts.append(f"{metrics['rows']} filas, {metrics['rows_per_s']:.0f} filas/s")
+    if metrics["peak_rss_mb"] is not None:
+        parts.append(f"pico RSS {metrics['peak_rss_mb']:.0f} MB")
+    if metrics["allocated_mb"] is not None:
+        parts.append(f"asignado {metrics['allocated_mb']:.0f} MB")
+    return ", ".join(parts)
+
+
+class RunReport:
+    """
+    Métricas de una corrida. `add` recibe las de cada etapa (ejecutada,
+    cargada de cache u omitida); `save` las escribe en `path`.
+    """
+
+    def __init__(self, path: Path = RUNS_PATH, **meta: Any):
+        self.path = path
+        self.run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        self.started = time.perf_counter()
+        self.meta = {
+            "run_id": self.run_id,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "cpu_count": os.cpu_count(),
+            **meta,
+        }
+        self.stages: list[dict] = []
+
+    def add(self, metrics: dict) -> None:
+        self.stages.append(metrics)
+
+    def skipped(self, name: str, status: str) -> None:
+        self.add({"stage": name, "status": status})
+
+    def regressions(self, history: "pd.DataFrame") -> list[str]:
+        """
+        Etapas ejecutadas que tardaron más de REGRESSION_RATIO veces la
+        mediana de sus corridas anteriores.
+        """
+        if history.empty:
+            return []
+
+        previous = history[history["status"] == "ejecutado"].groupby("stage")["wall_s"].median()
+        found = []
+        for m in self.stages:
+            base = previous.get(m["stage"])
+            if m["status"] != "ejecutado" or base is None or base < REGRESSION_MIN_SECONDS:
+                continue
+            if m["wall_s"] > REGRESSION_RATIO * base:
+                found.append(f"Paso {m['stage']}: {m['wall_s']:.1f} s (mediana previa {base:.1f} s)")
+        return found
+
+    def save(self) -> Path:
+        """
+        Escribe `run_<id>.json` y agrega las filas a `runs.csv`.
+        Devuelve la ruta del JSON.
+        """
+        import pandas as pd
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.meta["wall_s"] = time.perf_counter() - self.started
+
+        json_path = self.path / f"run_{self.run_id}.json"
+        with open(json_path, "w", encoding="utf-8") as fh:
+            json.dump({**self.meta, "stages": self.stages}, fh, ensure_ascii=False, indent=2, default=str)
+
+        csv_path = self.path / "runs.csv"
+        history = pd.read_csv(csv_path) if csv_path.exists() else pd.DataFrame()
+        for line in self.regressions(history):
+            print(f"[WARN] Regresión de tiempo: {line}")
+
+        rows = pd.DataFrame(self.stages)
+        rows.insert(0, "run_id", self.run_id)
+        rows.insert(1, "steps", " ".join(map(str, self.meta.get("steps", []))))
+        pd.concat([history, rows], ignore_index=True).to_csv(csv_path, index=False)
+
+        print(f"Reporte de corrida guardado en: {json_path}")
+        return json_path
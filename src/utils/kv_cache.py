@@ -0,0 +1,100 @@
+"""
+Cache clave-valor persistente (SQLite).
+
+Pensada para resultados caros por contenido (traducciones, idioma
+detectado...): la clave suele ser `content_hash(...)` del input y el
+valor cualquier objeto serializable a JSON. Cada uso tiene su propia
+tabla (`namespace`) dentro del mismo archivo.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterable
+
+from src.utils.config import KV_CACHE_PATH
+
+
+def content_hash(*parts: Any) -> str:
+    """
+    SHA-256 de las partes (texto, idioma, versión...) separadas por \\x1f.
+    """
+    h = hashlib.sha256()
+    for i, part in enumerate(parts):
+        if i:
+            h.update(b"\x1f")
+        h.update(str(part).encode("utf-8"))
+    return h.hexdigest()
+
+
+class KeyValueCache:
+    """
+    Tabla `namespace` con (key TEXT PRIMARY KEY, value JSON). Thread-safe.
+    """
+
+    def __init__(self, namespace: str, path: Path = KV_CACHE_PATH):
+        if not namespace.isidentifier():
+            raise ValueError(f"Invalid namespace: {namespace!r}")
+
+        self.namespace = namespace
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {namespace} (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """
+        Devuelve {key: value} solo para las claves presentes.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+
+        with self._lock:
+            # SQLite limita la cantidad de parámetros por query
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM {self.namespace} WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update((k, json.loads(v)) for k, v in rows)
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        return found
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.get_many([key]).get(key, default)
+
+    def put_many(self, items: dict[str, Any]) -> None:
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.namespace} VALUES (?, ?)",
+                [(k, json.dumps(v, ensure_ascii=False)) for k, v in items.items()],
+            )
+            self._conn.commit()
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_many({key: value})
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.namespace}")
+            self._conn.commit()
+
+    def report(self) -> None:
+        print(f"Cache {self.namespace}: {self.hits} hits / {self.misses} misses ({self.path})")
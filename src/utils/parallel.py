@@ -0,0 +1,86 @@
+"""
+Apply paralelo para etapas CPU-bound por fila.
+
+`parallel_map(func, items, workers=...)` reparte `items` en chunks sobre un
+pool de procesos y devuelve los resultados en el orden original. Por
+debajo de `min_items` (o con `workers <= 1`) corre en serie: levantar
+procesos cuesta más que lo que se gana.
+
+Para que funcione también con el start method `spawn` (macOS, Windows,
+Python 3.14+), `func` y `initializer` tienen que ser funciones de módulo
+(o métodos de objetos picklables), no lambdas ni closures; el estado por
+worker (semillas, modelos cargados...) se arma en `initializer`.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Iterable
+
+from src.utils.instrumentation import progress
+
+
+# Por debajo de esto no vale la pena levantar procesos
+MIN_PARALLEL_ITEMS = 200
+
+# Chunks por worker: más de uno para repartir bien textos de largo desigual
+CHUNKS_PER_WORKER = 4
+
+
+def resolve_workers(workers: int | None) -> int:
+    """
+    None o 0 -> todos los cores; negativo -> todos menos |workers|.
+    """
+    cores = os.cpu_count() or 1
+    if not workers:
+        return cores
+    if workers < 0:
+        return max(1, cores + workers)
+    return workers
+
+
+def parallel_map(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    workers: int | None = None,
+    min_items: int = MIN_PARALLEL_ITEMS,
+    initializer: Callable[..., None] | None = None,
+    initargs: tuple = (),
+    start_method: str | None = None,
+    desc: str | None = None,
+) -> list[Any]:
+    """
+    Equivale a `[func(x) for x in items]`, en paralelo si conviene.
+
+    `start_method` fuerza "spawn", "fork" o "forkserver" (por defecto, el de
+    la plataforma). En modo serie también se llama `initializer`, así el
+    resultado no depende de cuántos workers haya. Con `desc` se imprime
+    el avance y el ETA (ver `instrumentation.progress`).
+    """
+    items = list(items)
+    workers = min(resolve_workers(workers), max(1, len(items)))
+
+    if workers <= 1 or len(items) < min_items:
+        if initializer is not None:
+            initializer(*initargs)
+        if desc is not None:
+            return [func(x) for x in progress(items, desc=desc)]
+        return [func(x) for x in items]
+
+    chunksize = max(1, math.ceil(len(items) / (workers * CHUNKS_PER_WORKER)))
+    context = get_context(start_method) if start_method else None
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=initializer,
+        initargs=initargs,
+    ) as pool:
+        # map conserva el orden de entrada
+        results = pool.map(func, items, chunksize=chunksize)
+        if desc is not None:
+            results = progress(results, total=len(items), desc=desc)
+        return list(results)
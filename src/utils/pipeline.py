@@ -0,0 +1,344 @@
+"""
+Runner del pipeline como grafo de dependencias con cache de artefactos.
+
+Cada `Stage` declara de qué etapas depende, qué archivos lee (`inputs`)
+y qué archivos escribe (`outputs`). La salida de cada etapa se guarda en
+data/cache/artifacts con una clave que combina:
+- el código de la etapa (su función más los módulos src.* que importa,
+  directa o indirectamente),
+- sus parámetros,
+- las claves de las etapas de las que depende,
+- el contenido de sus archivos de entrada.
+
+Si la clave no cambió (y los `outputs` siguen existiendo) la etapa se
+carga de cache en lugar de ejecutarse. Las etapas sin dependencias
+pendientes entre sí corren a la vez (hilos, o procesos con `process=True`).
+
+Con un `RunReport` (src.utils.instrumentation) cada etapa ejecutada se
+mide (tiempos, filas/s, memoria) y las cargadas de cache u omitidas
+quedan registradas como tales.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import inspect
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from src.utils.config import CACHE_DATA_PATH
+from src.utils.instrumentation import Instrumented, describe
+
+
+ARTIFACTS_PATH = CACHE_DATA_PATH / "artifacts"
+
+# Paquete raíz del proyecto (src) y directorio que lo contiene
+_PACKAGE = __name__.split(".")[0]
+_PROJECT_ROOT = Path(__file__).resolve().parents[len(__name__.split(".")) - 1]
+
+
+@dataclass
+class Stage:
+    """
+    Etapa del pipeline.
+
+    - `func` recibe como argumentos las salidas de `deps` si `pass_deps=True`,
+      más `params` y `options` como keyword arguments. `params` forma parte
+      de la clave de cache; `options` no (workers y similares, que no
+      cambian el resultado).
+    - `code` lista módulos extra cuyo código define la etapa. La versión de
+      código ya incluye el fuente de `func` y los módulos src.* que importa.
+    - `cache=False` para etapas que dependen del mundo exterior (red): se
+      ejecutan cuando se piden explícitamente o cuando otra etapa recibe su
+      salida (`pass_deps`); si no, como dependencia solo se ejecutan si
+      falta alguno de sus `outputs`. Las etapas siguientes ven su efecto
+      por sus `inputs`.
+    - `process=True` ejecuta la etapa en un proceso aparte (CPU-bound).
+    """
+
+    name: str
+    func: Callable[..., Any]
+    deps: list[str] = field(default_factory=list)
+    pass_deps: bool = False
+    params: dict[str, Any] = field(default_factory=dict)
+    options: dict[str, Any] = field(default_factory=dict)
+    inputs: list[Path] = field(default_factory=list)
+    outputs: list[Path] = field(default_factory=list)
+    code: list[str] = field(default_factory=list)
+    cache: bool = True
+    process: bool = False
+
+
+def _hash_file(path: Path) -> str:
+    if not path.exists():
+        return "missing"
+
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _module_file(name: str) -> Path | None:
+    """
+    Archivo de un módulo del proyecto, sin importarlo (None si no es uno).
+    """
+    base = _PROJECT_ROOT.joinpath(*name.split("."))
+    for path in (base.with_suffix(".py"), base / "__init__.py"):
+        if path.is_file():
+            return path
+    return None
+
+
+def _project_imports(source: str) -> set[str]:
+    """
+    Módulos del proyecto que importa `source` (también los imports dentro
+    de funciones, que es donde los pasos importan sus dependencias).
+    """
+    names: set[str] = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names.add(node.module)
+            # `from src.x import y`: y puede ser un submódulo
+            names.update(f"{node.module}.{alias.name}" for alias in node.names)
+    return {n for n in names if n.split(".")[0] == _PACKAGE and _module_file(n) is not None}
+
+
+def _code_version(stage: Stage) -> str:
+    """
+    Hash del fuente de `func` y de todos los módulos del proyecto que
+    alcanza por imports (más los de `code`). Se leen los archivos en lugar
+    de importar los módulos (las dependencias pesadas se importan recién
+    cuando la etapa corre). Del módulo de `func` solo cuenta la función: en
+    src.start todas las etapas comparten módulo, y editar el menú no
+    debería invalidar todos los artefactos.
+    """
+    h = hashlib.sha256()
+    try:
+        source = inspect.getsource(stage.func)
+    except (OSError, TypeError):  # sin fuente (builtins, REPL)
+        source = getattr(stage.func, "__qualname__", repr(stage.func))
+    h.update(source.encode("utf-8"))
+
+    pending = _project_imports(source) | set(stage.code)
+    seen: set[str] = set()
+    while pending:
+        name = pending.pop()
+        seen.add(name)
+        path = _module_file(name)
+        if path is not None:
+            text = path.read_text(encoding="utf-8")
+            pending |= _project_imports(text) - seen
+
+    for name in sorted(seen):
+        path = _module_file(name)
+        h.update(name.encode("utf-8"))
+        if path is not None:
+            h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+class Pipeline:
+    """
+    Ejecuta un conjunto de `Stage` respetando dependencias y cache.
+    """
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        workers: int = 2,
+        artifacts_path: Path = ARTIFACTS_PATH,
+        use_cache: bool = True,
+        report=None,
+        trace_allocations: bool = False,
+    ):
+        self.stages = {s.name: s for s in stages}
+        self.workers = workers
+        self.artifacts_path = artifacts_path
+        # Con use_cache=False todo se recalcula (y los artefactos se reescriben)
+        self.use_cache = use_cache
+        self.report = report
+        self.trace_allocations = trace_allocations
+
+        for stage in stages:
+            unknown = set(stage.deps) - set(self.stages)
+            if unknown:
+                raise ValueError(f"Stage {stage.name!r} depends on unknown stages: {sorted(unknown)}")
+
+    def _plan(self, targets: list[str]) -> list[str]:
+        """
+        Etapas a considerar (targets + dependencias), en orden topológico.
+        """
+        order: list[str] = []
+        visiting: set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle at stage {name!r}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in targets:
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage: {name!r}")
+            visit(name)
+        return order
+
+    def _key(self, stage: Stage, keys: dict[str, str]) -> str:
+        h = hashlib.sha256()
+        h.update(stage.name.encode("utf-8"))
+        h.update(_code_version(stage).encode("utf-8"))
+        h.update(repr(sorted(stage.params.items())).encode("utf-8"))
+        for dep in stage.deps:
+            h.update(keys[dep].encode("utf-8"))
+        for path in stage.inputs:
+            h.update(_hash_file(Path(path)).encode("utf-8"))
+        return h.hexdigest()[:16]
+
+    def _artifact(self, stage: Stage, key: str) -> Path:
+        return self.artifacts_path / stage.name / f"{key}.pkl"
+
+    def _cached(self, stage: Stage, key: str) -> bool:
+        return (
+            self.use_cache
+            and stage.cache
+            and self._artifact(stage, key).exists()
+            and all(Path(p).exists() for p in stage.outputs)
+        )
+
+    def run(self, targets: list[str] | None = None) -> dict[str, Any]:
+        """
+        Ejecuta `targets` (por defecto todas las etapas) y lo que necesiten.
+        Devuelve {nombre: salida} de los targets.
+
+        La salida de una etapa intermedia se suelta apenas la recibieron
+        todas las etapas que la consumen, así no quedan vivos a la vez los
+        DataFrames de todos los pasos.
+        """
+        explicit = set(targets) if targets is not None else set(self.stages)
+        order = self._plan([n for n in self.stages if n in explicit] + sorted(explicit - set(self.stages)))
+
+        results: dict[str, Any] = {}
+        finished: set[str] = set()
+        keys: dict[str, str] = {}
+        pending = list(order)
+        running: dict[Future, tuple[str, float]] = {}
+
+        # Cuántas etapas pendientes todavía necesitan la salida de cada una
+        consumers = {name: 0 for name in order}
+        for name in order:
+            if self.stages[name].pass_deps:
+                for dep in self.stages[name].deps:
+                    consumers[dep] += 1
+
+        def release(name: str) -> None:
+            if consumers[name] == 0 and name not in explicit:
+                results.pop(name, None)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as threads, \
+                ProcessPoolExecutor(max_workers=self.workers) as processes:
+            while pending or running:
+                # Lanzar todo lo que ya tiene sus dependencias resueltas
+                for name in [n for n in pending if all(d in finished for d in self.stages[n].deps)]:
+                    pending.remove(name)
+                    future = self._start(name, explicit, consumers[name] > 0, results, keys, threads, processes)
+                    if future is None:
+                        finished.add(name)
+                        release(name)
+                    else:
+                        running[future] = (name, time.perf_counter())
+
+                    # Los argumentos ya se entregaron a la etapa
+                    if self.stages[name].pass_deps:
+                        for dep in self.stages[name].deps:
+                            consumers[dep] -= 1
+                            release(dep)
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, started = running.pop(future)
+                    if future.exception() is not None and self.report is not None:
+                        self.report.skipped(name, "error")
+                    results[name] = future.result()
+                    finished.add(name)
+                    message = f"[pipeline] Paso {name}: ejecutado en {time.perf_counter() - started:.1f} s"
+                    if self.report is not None:
+                        results[name], metrics = results[name]
+                        self.report.add(metrics)
+                        message += f" ({describe(metrics)})"
+                    self._store(self.stages[name], keys[name], results[name])
+                    print(message)
+                    release(name)
+
+        return results
+
+    def _start(
+        self,
+        name: str,
+        explicit: set[str],
+        needed: bool,
+        results: dict[str, Any],
+        keys: dict[str, str],
+        threads: Executor,
+        processes: Executor,
+    ) -> Future | None:
+        """
+        Carga la etapa de cache (devuelve None) o la lanza (devuelve el Future).
+        `needed`: alguna etapa pendiente recibe su salida como argumento.
+        """
+        stage = self.stages[name]
+
+        if not stage.cache:
+            # Sin cache: su efecto lo capturan los `inputs` de las etapas siguientes
+            keys[name] = "uncached"
+            if name not in explicit and not needed and all(Path(p).exists() for p in stage.outputs):
+                results[name] = None
+                print(f"[pipeline] Paso {name}: omitido (outputs existentes)")
+                if self.report is not None:
+                    self.report.skipped(name, "omitido")
+                return None
+        else:
+            keys[name] = self._key(stage, keys)
+            if self._cached(stage, keys[name]):
+                with open(self._artifact(stage, keys[name]), "rb") as fh:
+                    results[name] = pickle.load(fh)
+                print(f"[pipeline] Paso {name}: cargado de cache ({keys[name]})")
+                if self.report is not None:
+                    self.report.skipped(name, "cache")
+                return None
+
+        func = stage.func
+        if self.report is not None:
+            func = Instrumented(func, name, trace_allocations=self.trace_allocations)
+
+        args = [results[d] for d in stage.deps] if stage.pass_deps else []
+        executor = processes if stage.process else threads
+        return executor.submit(func, *args, **stage.params, **stage.options)
+
+    def _store(self, stage: Stage, key: str, result: Any) -> None:
+        if not stage.cache:
+            return
+
+        path = self._artifact(stage, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Solo se conserva el artefacto vigente de cada etapa
+        for old in path.parent.glob("*.pkl"):
+            old.unlink()
+        with open(path, "wb") as fh:
+            pickle.dump(result, fh, protocol=pickle.HIGHEST_PROTOCOL)
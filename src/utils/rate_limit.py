@@ -0,0 +1,50 @@
+"""
+Rate limiting compartido.
+
+Token bucket thread-safe: varios hilos comparten un mismo presupuesto
+de requests por segundo en lugar de dormir un tiempo fijo entre requests.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Limitador token-bucket.
+
+    Se recargan `rate` tokens por segundo hasta un máximo de `capacity`.
+    Cada request consume un token; si no hay, el hilo espera lo justo.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Bloquea hasta que haya `tokens` disponibles y los consume.
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait)